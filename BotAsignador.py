@@ -21,9 +21,14 @@ from sqlalchemy import or_, and_, func
 
 from extensiones import db
 from modelos import Turno, Publicador, SolicitudTurno, Ausencia, PuntoPredicacion, Experiencia
+from disponibilidad import ModeloDisponibilidad
+from validador import validar_rango
+import registro
 
 bot_api = Blueprint("bot_api", __name__, url_prefix="/api/bot")
 
+PIPELINES_CONSERVAR = 100     # archivos bot_pipeline_*.txt que se guardan
+
 
 def now_ts_str():
     return datetime.datetime.utcnow().strftime("%Y%m%d_%H%M%S")
@@ -35,6 +40,8 @@ def write_pipeline_file(content: str) -> str:
     try:
         with open(filename, "w", encoding="utf-8") as f:
             f.write(content)
+        # un archivo por corrida: retención para que tmp/ no crezca sin límite
+        registro.podar("/home/ppamappcaba/mysite/tmp/bot_pipeline_*.txt", conservar=PIPELINES_CONSERVAR)
         return filename
     except Exception:
         # fallback to cwd
@@ -77,6 +84,9 @@ class BotAsignador:
         self.pipeline_lines: List[str] = []
         self.pipeline_filename: Optional[str] = None
         self.pipeline_text: str = ""
+        # modelo de disponibilidad precargado (ver disponibilidad.py) y su rango de fechas
+        self._modelo: Optional[ModeloDisponibilidad] = None
+        self._modelo_rango = (None, None)
 
         # Configurables (valores por defecto tomados del PHP)
         self.auto_approve_pending = True
@@ -142,6 +152,9 @@ class BotAsignador:
             .all()
         )
 
+        # ausencias, asignaciones y solicitudes de todo el rango en una sola carga
+        self.precargar(today, end)
+
         results = []
         processed = 0
         for t in turnos:
@@ -149,13 +162,17 @@ class BotAsignador:
             res = self.run_for_turno(t.id, commit=True)
             results.append(res)
 
+        self._modelo = None
+        validacion = validar_rango(today, end, session=self.session).como_dict()
         duration_ms = round((time.time() - t0) * 1000, 2)
         self.log_pipeline(f"Batch finalizado. Procesados: {processed} - Duracion ms: {duration_ms}")
+        self.log_pipeline(f"Validación del rango: {validacion['errores']} errores, {validacion['advertencias']} advertencias")
         self.finalize_pipeline()
         return {
             "ok": True,
             "processed": processed,
             "results": results,
+            "validacion": validacion,
             "pipeline_file": self.pipeline_filename,
             "pipeline_text": self.pipeline_text,
             "duracion_ms": duration_ms,
@@ -174,6 +191,9 @@ class BotAsignador:
 
             turno_id = turno.id if isinstance(turno, Turno) else int(turno.get("id"))
             self.log_pipeline(f"=== Procesando turno input: {turno_id}")
+            # asignaciones a sumar al modelo de disponibilidad recién cuando el
+            # savepoint se confirma (si se deshace, el modelo no debe verlas)
+            por_registrar = []
             # comenzamos transacción
             with self.session.begin_nested():
                 # refrescar turno
@@ -223,6 +243,7 @@ class BotAsignador:
                         continue
                     ok_insert = self._insert_participante_in_turn(t, uid)
                     if ok_insert:
+                        por_registrar.append((uid, t.fecha, t.hora_inicio, t.hora_fin, t.id))
                         self.log_pipeline(f"Asignado aprobado: Usuario {uid}")
                         assigned.append(uid)
                         assigned_count += 1
@@ -261,6 +282,7 @@ class BotAsignador:
                                 continue
                             ok_insert = self._insert_participante_in_turn(t, uid)
                             if ok_insert:
+                                por_registrar.append((uid, t.fecha, t.hora_inicio, t.hora_fin, t.id))
                                 self.log_pipeline(f"Asignado por scoring user {uid} (score {entry.get('total')})")
                                 assigned.append(uid)
                                 assigned_count += 1
@@ -291,7 +313,7 @@ class BotAsignador:
                 self.log_pipeline(f"Finalizado turno {t.id}. Usuarios asignados: {assigned}")
                 self.finalize_pipeline()
 
-                return {
+                resultado = {
                     "ok": True,
                     "assigned": assigned,
                     "estado": new_estado,
@@ -299,6 +321,11 @@ class BotAsignador:
                     "pipeline_text": self.pipeline_text,
                 }
 
+            # savepoint confirmado: recién ahora las asignaciones cuentan en el modelo
+            for uid, fecha, hora_inicio, hora_fin, tid in por_registrar:
+                self._modelo_para(fecha).registrar_asignacion(uid, fecha, hora_inicio, hora_fin, tid)
+            return resultado
+
         except Exception as e:
             # rollback any pending transaction
             try:
@@ -310,7 +337,19 @@ class BotAsignador:
             self.finalize_pipeline()
             return {"ok": False, "error": str(e), "pipeline_text": self.pipeline_text}
 
+    def precargar(self, desde: datetime.date, hasta: datetime.date):
+        """Carga el modelo de disponibilidad para [desde, hasta] antes de procesar varios turnos."""
+        self._modelo = ModeloDisponibilidad.cargar(desde, hasta, session=self.session)
+        self._modelo_rango = (desde, hasta)
+
     # ---------- Helpers ----------
+    def _modelo_para(self, fecha: datetime.date) -> ModeloDisponibilidad:
+        """Modelo de disponibilidad que cubre `fecha` (el del batch o uno cargado para ese día)."""
+        desde, hasta = self._modelo_rango
+        if self._modelo is None or not desde or not (desde <= fecha <= hasta):
+            self.precargar(fecha, fecha)
+        return self._modelo
+
     def _normalize_turno(self, input_val):
         if isinstance(input_val, Turno):
             return input_val
@@ -341,23 +380,21 @@ class BotAsignador:
          - preferiblemente tengan una SolicitudTurno que cubra la franja (si existen)
          - si no hay solicitudes, devolvemos todos los publicadores que no estén ausentes ni con conflicto
         """
-        weekday = fecha.isoweekday()  # 1..7
+        modelo = self._modelo_para(fecha)
+        dia = self._weekday_to_dia(fecha.isoweekday())  # 1..7
         # Primero: buscar publicadores que tienen SolicitudTurno cuya franja cubre este turno
         candidates = []
-        sol_q = (
-            self.session.query(SolicitudTurno)
-            .filter(SolicitudTurno.hora_inicio <= hora_inicio)
-            .filter(SolicitudTurno.hora_fin >= hora_fin)
-            .filter(SolicitudTurno.dia == self._weekday_to_dia(weekday))
-        ).all()
+        sol_q = sorted(
+            (s for lista in modelo.solicitudes.values() for s in lista),
+            key=lambda s: s.id,
+        )
         for s in sol_q:
-            if s.publicador_id:
+            if s.dia == dia and s.hora_inicio <= hora_inicio and s.hora_fin >= hora_fin:
                 candidates.append(int(s.publicador_id))
 
         # Si no hay candidatos por solicitudes, buscar todos los publicadores y filtrar por ausencias / conflictos
         if not candidates:
-            all_pubs = self.session.query(Publicador).all()
-            for p in all_pubs:
+            for p in modelo.publicadores:
                 if self._user_has_ausencia(p.id, fecha):
                     continue
                 if self._user_has_conflict(p.id, fecha, hora_inicio, hora_fin):
@@ -375,61 +412,25 @@ class BotAsignador:
 
     def _tiene_disponibilidad(self, user_id: int, fecha: datetime.date, hora_inicio: datetime.time, hora_fin: datetime.time) -> bool:
         # En este modelo usamos SolicitudTurno como "disponibilidad explícita"
-        count = (
-            self.session.query(SolicitudTurno)
-            .filter(SolicitudTurno.publicador_id == user_id)
-            .filter(SolicitudTurno.dia == self._weekday_to_dia(fecha.isoweekday()))
-            .filter(SolicitudTurno.hora_inicio <= hora_inicio)
-            .filter(SolicitudTurno.hora_fin >= hora_fin)
-            .count()
-        )
+        solicitudes = self._modelo_para(fecha).solicitudes.get(user_id, [])
         # si no hay filas para ese usuario en disponibilidades, asumimos disponible
-        total_rows_user = (
-            self.session.query(SolicitudTurno).filter(SolicitudTurno.publicador_id == user_id).count()
-        )
-        if total_rows_user == 0:
+        if not solicitudes:
             return True
-        return count > 0
+        dia = self._weekday_to_dia(fecha.isoweekday())
+        return any(
+            s.dia == dia and s.hora_inicio <= hora_inicio and s.hora_fin >= hora_fin
+            for s in solicitudes
+        )
 
     def _user_has_ausencia(self, user_id: int, fecha: datetime.date) -> bool:
-        c = (
-            self.session.query(Ausencia)
-            .filter(Ausencia.publicador_id == user_id)
-            .filter(Ausencia.fecha_inicio <= fecha, Ausencia.fecha_fin >= fecha)
-            .count()
-        )
-        return c > 0
+        return self._modelo_para(fecha).ausente(user_id, fecha)
 
     def _user_has_conflict(self, user_id: int, fecha: datetime.date, hora_inicio: datetime.time, hora_fin: datetime.time) -> bool:
-        # Revisar turnos del mismo día donde el usuario ya esté asignado
-        q = (
-            self.session.query(Turno)
-            .filter(Turno.fecha == fecha)
-            .filter(or_(
-                Turno.publicador1_id == user_id,
-                Turno.publicador2_id == user_id,
-                Turno.publicador3_id == user_id,
-                Turno.publicador4_id == user_id,
-            ))
-            .all()
-        )
-        for t in q:
-            if time_overlap(t.hora_inicio, t.hora_fin, hora_inicio, hora_fin):
-                return True
-        return False
+        # Turnos del mismo día donde el usuario ya esté asignado (como publicador o capitán)
+        return self._modelo_para(fecha).conflicto(user_id, fecha, hora_inicio, hora_fin)
 
     def _count_assignments_for_date(self, user_id: int, fecha: datetime.date) -> int:
-        return (
-            self.session.query(Turno)
-            .filter(Turno.fecha == fecha)
-            .filter(or_(
-                Turno.publicador1_id == user_id,
-                Turno.publicador2_id == user_id,
-                Turno.publicador3_id == user_id,
-                Turno.publicador4_id == user_id,
-            ))
-            .count()
-        )
+        return self._modelo_para(fecha).asignaciones_en(user_id, fecha, incluir_capitan=False)
 
     def _score_candidates(self, candidates: List[int], turno: Turno) -> List[Dict[str, Any]]:
         out = []
@@ -494,13 +495,10 @@ class BotAsignador:
         )
 
     def _has_request_role(self, user_id: int, turno_id: int) -> bool:
-        c = (
-            self.session.query(SolicitudTurno)
-            .filter(SolicitudTurno.publicador_id == user_id)
-            .filter(SolicitudTurno.punto_id == self.session.query(Turno.punto_id).filter(Turno.id == turno_id).scalar_subquery())
-            .count()
-        )
-        return c > 0
+        t = self.session.get(Turno, turno_id)  # ya está en la sesión: no consulta
+        if t is None:
+            return False
+        return any(s.punto_id == t.punto_id for s in self._modelo_para(t.fecha).solicitudes.get(user_id, []))
 
     def _insert_participante_in_turn(self, turno_obj: Turno, user_id: int) -> bool:
         """Inserta el user_id en el primer slot libre del Turno (publicador1..4)."""
@@ -559,6 +557,7 @@ def api_ejecutar():
 
             q = Turno.query.filter(Turno.fecha >= f1, Turno.fecha <= f2).order_by(Turno.fecha, Turno.hora_inicio)
             turnos = q.all()
+            bot.precargar(f1, f2)
 
             asignados = []
 
@@ -578,11 +577,15 @@ def api_ejecutar():
                 asignados_turno = res.get("assigned", [])
                 asignados.extend(asignados_turno)
 
+            validacion = validar_rango(f1, f2, session=bot.session).como_dict()
+            bot.log_pipeline(f"Validación del rango: {validacion['errores']} errores, {validacion['advertencias']} advertencias")
+
             # guardar log + pipeline
             bot.finalize_pipeline()
             return jsonify({
                 "ok": True,
                 "asignados": asignados,
+                "validacion": validacion,
                 "pipeline_text": bot.pipeline_text
             })
         elif mode == "turno":
@@ -2,23 +2,32 @@
 # Adminer casero para DB PPAM (versión "todo integrado")
 # - Lista / CRUD
 # - Estructura (SHOW COLUMNS) con editor visual (preview SQL + ejecutar)
-# - Export CSV / JSON
+# - Export CSV / JSON / NDJSON en streaming (gzip opcional)
+# - Import masivo CSV / NDJSON con validación, upsert y progreso
 # - Buscador simple (filtros)
 # - Endpoints auxiliares: show_create, enum detector
 # - Backup antes de ALTER (opcional)
 # - Logs de estructura
+# - Catálogo del esquema cacheado (catalogo.py), invalidado en cada DDL
 #
 # Autor: Desarrollo PPAM
 # Fecha: 26-11-2025
 
-from flask import Blueprint, render_template_string, request, redirect, url_for, flash, current_app, jsonify, send_file, abort
+from flask import Blueprint, render_template_string, request, redirect, url_for, flash, current_app, jsonify, send_file, abort, Response, stream_with_context
 from extensiones import db
 # Todos los modelos reales deben importarse sin "*"
 from modelos import Publicador, PuntoPredicacion, SolicitudTurno, Experiencia, Ausencia, Turno
 from sqlalchemy import text
+from cacheutils import invalidar
+import grillas
+from almacen_jsonl import LogJSONL
+from paginacion import pagina_tabla, decode_cursor
+from exportacion import exportar, FORMATOS, MIMETYPES
+from importacion import importar, MODOS
+import catalogo
 from flask_login import login_required, current_user
 from functools import wraps
-import os, datetime, json, io, csv, html
+import os, datetime, json, io, csv, html, re, tempfile
 # ----  Admin --------
 def admin_required(func):
     @wraps(func)
@@ -44,6 +53,16 @@ def jinja_getattr(obj, attr):
 @admin_required
 def protect_adminer_routes():
     pass
+
+# El adminer escribe con SQL crudo (INSERT/UPDATE/ALTER) que los eventos del ORM
+# no ven: cualquier POST o borrado invalida las cachés de datos y las grillas
+# semanales precalculadas.
+@adminer_bp.after_request
+def invalidar_caches(resp):
+    if request.method == "POST" or "delete" in (request.endpoint or ""):
+        invalidar()
+        grillas.invalidar_todas()
+    return resp
 # ------------------ CONFIG ------------------
 MODELS = {
     "publicadores": Publicador,
@@ -55,32 +74,59 @@ MODELS = {
 }
 
 BACKUP_DIR = "/home/ppamappcaba/backups"
-STRUCT_LOG_PATH = "/home/ppamappcaba/mysite/tmp/adminer_struct_log.json"
+STRUCT_LOG_PATH = "/home/ppamappcaba/mysite/tmp/adminer_struct_log.jsonl"
 os.makedirs(BACKUP_DIR, exist_ok=True)
 os.makedirs(os.path.dirname(STRUCT_LOG_PATH), exist_ok=True)
+# append-only (una línea por entrada); el .json viejo (más nuevo primero) se migra solo
+STRUCT_LOG = LogJSONL(STRUCT_LOG_PATH, maximo=5000, max_bytes=4 * 1024 * 1024,
+                      legado=STRUCT_LOG_PATH[:-1], legado_reciente_primero=True)
 # ----- usar API Pythonanywhere ------------------------------------------------
 PA_USERNAME = "ppamappcaba"
 API_TOKEN = os.getenv("PA_API_TOKEN")  # Mejor guardarlo en variable de entorno
 WEBAPP_DOMAIN = "ppamappcaba.pythonanywhere.com"
 
 # ------------------ HELPERS / UTIL ------------------
-def _append_struct_log(msg):
-    entry = {"ts": datetime.datetime.utcnow().isoformat(), "msg": str(msg)}
-    logs = []
-    try:
-        if os.path.exists(STRUCT_LOG_PATH):
-            with open(STRUCT_LOG_PATH, "r", encoding="utf-8") as f:
-                logs = json.load(f)
-    except Exception:
-        logs = []
-    logs.insert(0, entry)
-    logs = logs[:500]
+_RE_TABLA_SQL = re.compile(r"\b(?:TABLE|INTO|UPDATE|FROM)\s+(?:IF\s+(?:NOT\s+)?EXISTS\s+)?`?(\w+)`?", re.I)
+_TABLAS_GRILLAS = {"turnos", "puntos_predicacion"}
+
+
+def _toca_grillas(sql):
+    """True si el SQL nombra una tabla de la que salen las grillas semanales."""
+    return any(t.lower() in _TABLAS_GRILLAS for t in _RE_TABLA_SQL.findall(sql or ""))
+
+
+def _append_struct_log(msg, tabla=None):
+    """Agrega una entrada (O(1), sin releer el historial). Si no se indica la tabla se toma del SQL."""
+    msg = str(msg)
+    if tabla is None:
+        m = _RE_TABLA_SQL.search(msg)
+        tabla = m.group(1) if m else None
     try:
-        with open(STRUCT_LOG_PATH, "w", encoding="utf-8") as f:
-            json.dump(logs, f, ensure_ascii=False, indent=2)
+        STRUCT_LOG.agregar({"ts": datetime.datetime.utcnow().isoformat(), "msg": msg, "tabla": tabla})
     except Exception:
         current_app.logger.exception("No pudo guardar struct log")
 
+
+def _buscar_struct_log(limit=50, tabla=None, desde=None, hasta=None):
+    """
+    Entradas más nuevas primero, filtradas por tabla y por rango de fechas
+    (ISO, comparadas como texto contra ts). Recorre el archivo desde el final
+    y corta apenas junta `limit` o pasa de `desde`.
+    """
+    out = []
+    for e in STRUCT_LOG.recorrer():
+        ts = e.get("ts", "")
+        if desde and ts < desde:
+            break
+        if hasta and ts[:len(hasta)] > hasta:
+            continue
+        if tabla and e.get("tabla") != tabla:
+            continue
+        out.append(e)
+        if len(out) >= limit:
+            break
+    return out
+
 def _show_create_table_sql(table):
     try:
         with db.engine.connect() as conn:
@@ -102,10 +148,10 @@ def _backup_table(table):
             f.write(f"-- Backup generated at {ts} UTC\n")
             f.write(create_sql)
             f.write("\n")
-        _append_struct_log(f"Backup creado: {fname}")
+        _append_struct_log(f"Backup creado: {fname}", tabla=table)
         return fname
     except Exception as e:
-        _append_struct_log(f"Error creando backup: {e}")
+        _append_struct_log(f"Error creando backup: {e}", tabla=table)
         current_app.logger.exception("Error backup table")
         return None
 
@@ -114,16 +160,12 @@ def _read_struct_log_text(limit=50):
     Devuelve los últimos registros del log estructural como texto.
     Si no existe el archivo, devuelve string vacío.
     """
-    if not os.path.exists(STRUCT_LOG_PATH):
-        return ""
-
     try:
-        with open(STRUCT_LOG_PATH, "r", encoding="utf-8") as f:
-            logs = json.load(f)
+        # más nuevos primero, sin cargar todo el archivo
+        logs = STRUCT_LOG.ultimos(limit)[::-1]
 
-        # logs = lista de dicts { ts, msg }
         out = []
-        for l in logs[:limit]:
+        for l in logs:
             ts = l.get("ts", "?")
             msg = l.get("msg", "")
             out.append(f"[{ts}] {msg}")
@@ -145,28 +187,17 @@ def _exec_sql(sql):
         current_app.logger.exception("Error ejecutando SQL")
         _append_struct_log(f"Error SQL: {e} -- SQL: {sql}")
         return False, str(e)
+    finally:
+        # un DDL que falla a mitad también puede haber cambiado algo
+        if catalogo.es_ddl(sql):
+            catalogo.invalidar_esquema()
+        if _toca_grillas(sql):
+            grillas.invalidar_todas()
 
 def _get_table_meta(table):
-    """Return result of SHOW COLUMNS FROM table as list of dicts"""
+    """SHOW COLUMNS FROM table as list of dicts (desde el catálogo cacheado)"""
     try:
-        with db.engine.connect() as conn:
-            res = conn.execute(text(f"SHOW COLUMNS FROM `{table}`"))
-
-            meta = []
-            for row in res.fetchall():
-                r = row._mapping    # ← ESTA ES LA CLAVE
-
-                meta.append({
-                    "Field": r.get("Field"),
-                    "Type": r.get("Type"),
-                    "Null": r.get("Null"),
-                    "Key": r.get("Key"),
-                    "Default": r.get("Default"),
-                    "Extra": r.get("Extra")
-                })
-
-            return meta
-
+        return catalogo.columnas_show(table)
     except Exception as e:
         current_app.logger.exception("Error SHOW COLUMNS")
         return []
@@ -179,51 +210,9 @@ def _get_table_meta_from_model(model):
     Devuelve metadata estilo `SHOW COLUMNS`:
     lista de dicts con claves: Field, Type, Null, Key, Default, Extra
     """
-    try:
-        # si te pasan directamente el nombre de tabla en vez del model, soportamos ambos
-        if isinstance(model, str):
-            table_name = model
-        else:
-            table_name = model.__table__.name
-
-        engine = db.get_engine() if hasattr(db, "get_engine") else db.engine
-
-        with engine.connect() as conn:
-            # asegurar que usamos texto literal (escape con backticks)
-            result = conn.execute(text(f"SHOW COLUMNS FROM `{table_name}`"))
-            rows = result.fetchall()
-
-        meta = []
-        # filas pueden venir como RowMapping o tuple; accesible por nombre en RowMapping
-        for row in rows:
-            # row keys normalmente: Field, Type, Null, Key, Default, Extra
-            # algunos drivers devuelven listas; manejamos ambos casos
-            try:
-                # row es mapeo
-                meta.append({
-                    "Field": row["Field"],
-                    "Type": row["Type"],
-                    "Null": row["Null"],
-                    "Key": row.get("Key", "") if hasattr(row, "get") else (row["Key"] if "Key" in row else ""),
-                    "Default": row["Default"],
-                    "Extra": row.get("Extra", "") if hasattr(row, "get") else (row["Extra"] if "Extra" in row else "")
-                })
-            except Exception:
-                # intentar por posición si no es mapping
-                r = list(row)
-                meta.append({
-                    "Field": r[0],
-                    "Type": r[1],
-                    "Null": r[2],
-                    "Key": r[3] if len(r) > 3 else "",
-                    "Default": r[4] if len(r) > 4 else None,
-                    "Extra": r[5] if len(r) > 5 else ""
-                })
-        return meta
-
-    except Exception as e:
-        current_app.logger.exception("Error en _get_table_meta_from_model: %s", e)
-        return []
+    # si te pasan directamente el nombre de tabla en vez del model, soportamos ambos
+    table_name = model if isinstance(model, str) else model.__table__.name
+    return _get_table_meta(table_name)
 
 
 def _validate_table(table):
@@ -231,20 +220,8 @@ def _validate_table(table):
     if table in MODELS:
         return True
 
-    # Aceptamos tablas reales del MySQL
-    result = db.session.execute(text("SHOW TABLES")).fetchall()
-
-    tables = []
-    for row in result:
-        val = row[0]
-        if isinstance(val, (bytes, bytearray)):
-            try:
-                val = val.decode("utf-8")
-            except:
-                val = val.decode("latin1", errors="replace")
-        tables.append(val)
-
-    return table in tables
+    # Aceptamos tablas reales del MySQL (lista cacheada, sin SHOW TABLES por request)
+    return catalogo.existe(table)
 
 # ------------------ TEMPLATES ------------------
 # Keep templates here for single-file convenience.
@@ -274,6 +251,11 @@ LIST_TEMPLATE = """
     .search-row{margin-left:auto;display:flex;gap:6px;align-items:center}
     .small{font-size:12px;color:#666}
     .export-buttons{margin-left:8px}
+    th a{color:#fff;text-decoration:none}
+    td{max-width:320px;overflow:hidden;text-overflow:ellipsis;white-space:nowrap}
+    .info{display:flex;gap:14px;align-items:center;flex-wrap:wrap;margin-top:8px}
+    .pager{display:flex;gap:8px;justify-content:flex-end;margin-top:12px}
+    .btn.off{background:#bbb;pointer-events:none}
   </style>
 </head>
 <body>
@@ -304,8 +286,10 @@ LIST_TEMPLATE = """
       <a class="btn alt" href="{{ url_for('adminer.table_structure', table=table) }}">⚙️ Estructura</a>
       <a class="btn" href="{{ url_for('adminer.table_show_create', table=table) }}">🔎 SHOW CREATE</a>
       <div class="export-buttons">
-        <a class="btn" href="{{ url_for('adminer.export_table', table=table, fmt='csv') }}">Export CSV</a>
-        <a class="btn" href="{{ url_for('adminer.export_table', table=table, fmt='json') }}">Export JSON</a>
+        <a class="btn" href="{{ url_for('adminer.export_table', table=table, fmt='csv', cols=request.args.getlist('cols')) }}">Export CSV</a>
+        <a class="btn" href="{{ url_for('adminer.export_table', table=table, fmt='json', cols=request.args.getlist('cols')) }}">Export JSON</a>
+        <a class="btn" href="{{ url_for('adminer.export_table', table=table, fmt='ndjson', cols=request.args.getlist('cols'), gzip=1) }}">NDJSON.gz</a>
+        <a class="btn alt" href="{{ url_for('adminer.import_table', table=table) }}">⬆ Importar</a>
       </div>
     </div>
 
@@ -318,30 +302,83 @@ LIST_TEMPLATE = """
             <option value="{{ c }}" {% if request.args.get('col')==c %}selected{% endif %}>{{ c }}</option>
           {% endfor %}
         </select>
+        {% for c in request.args.getlist('cols') %}<input type="hidden" name="cols" value="{{ c }}">{% endfor %}
+        <input type="hidden" name="orden" value="{{ p.orden or '' }}">
+        <input type="hidden" name="desc" value="{{ 1 if p.desc else '' }}">
+        <input type="hidden" name="limite" value="{{ p.limite }}">
         <button class="btn" type="submit">Buscar</button>
       </form>
     </div>
   </div>
 
+  <div class="info small">
+    <span>{% if p.estimado is not none %}≈ {{ p.estimado }} filas (estadísticas){% else %}{{ p.filas|length }} filas en esta página{% endif %}</span>
+    <span>Orden: {{ p.orden or '—' }} {{ '↓' if p.desc else '↑' }}</span>
+    <form method="get" action="{{ url_for('adminer.table_view', table=table) }}" style="display:flex;gap:6px;align-items:center">
+      {% for c in request.args.getlist('cols') %}<input type="hidden" name="cols" value="{{ c }}">{% endfor %}
+      <input type="hidden" name="orden" value="{{ p.orden or '' }}">
+      <input type="hidden" name="desc" value="{{ 1 if p.desc else '' }}">
+      <input type="hidden" name="q" value="{{ request.args.get('q','') }}">
+      <input type="hidden" name="col" value="{{ request.args.get('col','') }}">
+      Por página
+      <select name="limite" onchange="this.form.submit()">
+        {% for n in (25, 50, 100, 250, 500, 1000) %}<option {% if p.limite==n %}selected{% endif %}>{{ n }}</option>{% endfor %}
+      </select>
+    </form>
+    <details>
+      <summary>Columnas ({{ p.columnas|length }}/{{ p.todas|length }})</summary>
+      <form method="get" action="{{ url_for('adminer.table_view', table=table) }}">
+        {% for c in p.todas %}
+        <label style="display:inline-block;margin-right:10px"><input type="checkbox" name="cols" value="{{ c }}" {% if c in p.columnas %}checked{% endif %}> {{ c }}</label>
+        {% endfor %}
+        <input type="hidden" name="orden" value="{{ p.orden or '' }}">
+        <input type="hidden" name="desc" value="{{ 1 if p.desc else '' }}">
+        <input type="hidden" name="limite" value="{{ p.limite }}">
+        <input type="hidden" name="q" value="{{ request.args.get('q','') }}">
+        <input type="hidden" name="col" value="{{ request.args.get('col','') }}">
+        <button class="btn" type="submit">Aplicar</button>
+      </form>
+    </details>
+  </div>
+
   <table aria-live="polite">
     <tr>
-      {% for col in columns %}
+      {% for col in p.columnas %}
+      {% if col in p.ordenables %}
+      <th><a href="{{ url_pagina(orden=col, desc=1 if (col == p.orden and not p.desc) else None) }}" title="Ordenar (columna indexada)">{{ col }}{% if col == p.orden %} {{ '↓' if p.desc else '↑' }}{% endif %}</a></th>
+      {% else %}
       <th>{{ col }}</th>
+      {% endif %}
       {% endfor %}
-      <th>Acciones</th>
+      {% if p.pk %}<th>Acciones</th>{% endif %}
     </tr>
-    {% for row in rows %}
+    {% for row in p.filas %}
     <tr>
-      {% for col in columns %}
-      <td>{{ row|getattr(col) }}</td>
+      {% for col in p.columnas %}
+      <td title="{{ row[col] }}">{{ row[col] }}</td>
       {% endfor %}
+      {% if p.pk %}
       <td class="actions">
-        <a class="btn" href="{{ url_for('adminer.edit_record', table=table, id=row.id) }}">✏ Editar</a>
-        <a class="btn danger" href="{{ url_for('adminer.delete_record', table=table, id=row.id) }}" onclick="return confirm('Borrar registro?')">🗑 Borrar</a>
+        <a class="btn" href="{{ url_for('adminer.edit_record', table=table, id=row[p.pk]) }}">✏ Editar</a>
+        <a class="btn danger" href="{{ url_for('adminer.delete_record', table=table, id=row[p.pk]) }}" onclick="return confirm('Borrar registro?')">🗑 Borrar</a>
       </td>
+      {% endif %}
     </tr>
     {% endfor %}
   </table>
+
+  <div class="pager">
+    <a class="btn" href="{{ url_pagina() }}">« Primera</a>
+    <a class="btn {{ '' if p.anterior else 'off' }}" href="{{ url_pagina(antes=p.anterior) if p.anterior else '#' }}">‹ Anterior</a>
+    <a class="btn {{ '' if p.siguiente else 'off' }}" href="{{ url_pagina(despues=p.siguiente) if p.siguiente else '#' }}">Siguiente ›</a>
+  </div>
+
+  {% if not es_modelo %}
+  <p style="margin-top:18px;">
+     Esta tabla no está registrada como modelo SQLAlchemy.<br>
+     Podés agregar columnas en “Estructura”.
+  </p>
+  {% endif %}
 </div>
 </body>
 </html>
@@ -723,6 +760,88 @@ DELETE_TABLE_TEMPLATE = """
 </html>
 """
 
+IMPORT_TEMPLATE = """
+<!doctype html>
+<html>
+<head><meta charset="utf-8"><title>Importar — {{ table }}</title></head>
+<body style="font-family:Arial;background:#f2f2f2;padding:30px">
+<div style="max-width:760px;margin:auto;background:white;padding:20px;border-radius:8px">
+  <h2>Importar en {{ table }}</h2>
+  <p>CSV (con encabezado) o NDJSON (un objeto por línea), opcionalmente .gz. Las columnas
+     se validan contra la estructura de la tabla y se insertan en bloques.</p>
+
+  <form id="form-import" enctype="multipart/form-data">
+      <input type="file" name="archivo" accept=".csv,.ndjson,.jsonl,.gz" required><br><br>
+      <label>Si la clave ya existe:
+        <select name="modo">
+          <option value="insertar">insertar (falla con duplicados)</option>
+          <option value="ignorar">ignorar la fila</option>
+          <option value="actualizar">actualizar la fila (upsert)</option>
+        </select>
+      </label>
+      <label style="margin-left:12px">Clave <input name="clave" placeholder="pk" size="12"></label><br><br>
+      <label><input type="checkbox" name="simular" checked> Simular (solo validar, no escribe)</label><br>
+      <label><input type="checkbox" name="saltar_errores"> Saltar filas con error (si no, se corta en la primera)</label><br><br>
+      <button id="btn-import" style="background:#0b74da;color:white;padding:10px 14px;border:none;border-radius:6px">
+          Importar
+      </button>
+      <a href="{{ url_for('adminer.table_view', table=table) }}" style="margin-left:20px">Volver</a>
+  </form>
+
+  <p id="estado-import" style="font-weight:700"></p>
+  <pre id="errores-import" style="background:#fff4f4;max-height:300px;overflow:auto"></pre>
+</div>
+<script>
+const estado = document.getElementById("estado-import");
+const errores = document.getElementById("errores-import");
+
+function mostrar(p) {
+  let t = p.fin ? (p.ok ? "✔ Terminado" : "✖ Cortado") : "Importando…";
+  t += ` — leídas ${p.leidas}, escritas ${p.escritas}, errores ${p.errores}, ${p.segundos}s`;
+  if (p.segundos) t += ` (${Math.round(p.leidas / p.segundos)} filas/s)`;
+  if (p.motivo) t += ` — ${p.motivo}`;
+  if (p.simulado) t += " (simulación: no se escribió nada)";
+  estado.textContent = t;
+  if (p.detalle && p.detalle.length) {
+    errores.textContent = p.detalle.map(e => `línea ${e.linea}: ${e.error}`).join("\\n");
+  }
+}
+
+document.getElementById("form-import").addEventListener("submit", async (ev) => {
+  ev.preventDefault();
+  const boton = document.getElementById("btn-import");
+  boton.disabled = true;
+  estado.textContent = "Subiendo…";
+  errores.textContent = "";
+  try {
+    const resp = await fetch(location.pathname, { method: "POST", body: new FormData(ev.target) });
+    if (!resp.ok) {
+      estado.textContent = "Error: " + await resp.text();
+      return;
+    }
+    // una línea JSON por bloque confirmado
+    const lector = resp.body.getReader();
+    const dec = new TextDecoder();
+    let resto = "";
+    while (true) {
+      const { done, value } = await lector.read();
+      if (done) break;
+      resto += dec.decode(value, { stream: true });
+      const lineas = resto.split("\\n");
+      resto = lineas.pop();
+      for (const l of lineas) if (l.trim()) mostrar(JSON.parse(l));
+    }
+  } catch (e) {
+    estado.textContent = "Error: " + e;
+  } finally {
+    boton.disabled = false;
+  }
+});
+</script>
+</body>
+</html>
+"""
+
 # ------------------ ROUTES (index / list / CRUD) ------------------
 
 @adminer_bp.route("/")
@@ -737,18 +856,7 @@ def index():
     # print("MODELS:", MODELS)
     # tables = list(MODELS.keys())
     # Obtener TODAS las tablas reales del MySQL
-    with db.engine.connect() as conn:
-        res = conn.execute(text("SHOW TABLES"))
-
-        tables = []
-        for row in res.fetchall():
-            val = row[0]
-            if isinstance(val, (bytes, bytearray)):
-                try:
-                    val = val.decode("utf-8")
-                except:
-                    val = val.decode("latin1", errors="replace")
-            tables.append(val)
+    tables = catalogo.tablas()
 
     INDEX_TEMPLATE = """
     <!doctype html><html><head><meta charset="utf-8"><title>Adminer</title>
@@ -926,6 +1034,9 @@ footer {
     <span class="title">adminer – PPAM</span>
     <div class="header-actions">
         <a href="/ppamtools" class="btn ghost">Volver al Panel</a>
+        <form method="post" action="{{ url_for('adminer.catalogo_esquema') }}" style="display:inline">
+            <button class="btn ghost" title="Volver a leer tablas y columnas de la base">⟳ Refrescar esquema</button>
+        </form>
         <a href="/logout" class="btn alt">Logout</a>
     </div>
 </div>
@@ -999,122 +1110,31 @@ document.getElementById("formCreateTable").onsubmit = async (e) => {
 
 @adminer_bp.route("/table/<table>")
 def table_view(table):
+    """
+    Navegador paginado (keyset sobre la pk, ver paginacion.pagina_tabla).
+    ?cols=a&cols=b  columnas visibles · ?orden=col&desc=1  columna indexada
+    ?despues= / ?antes=  cursor de página · ?limite=  filas por página · ?q=&col=  búsqueda
+    """
     if not _validate_table(table):
         return "Tabla no permitida", 404
 
-    # Caso ORM
-    if table in MODELS and MODELS[table] is not None:
-        model = MODELS[table]
-        columns = [c.name for c in model.__table__.columns]
-        # SELECT * FROM MODEL
-        rows = model.query.limit(500).all()
-        ... # búsqueda ORM normal
-
-        return render_template_string(LIST_TEMPLATE, table=table, columns=columns, rows=rows)
-
-    # Caso tabla genérica
-    # Obtener columnas manualmente
-    meta = _get_table_meta(table)
-    columns = []
-    for m in meta:
-        col = m["Field"]
-        if isinstance(col, (bytes, bytearray)):
-            try:
-                col = col.decode("utf-8")
-            except:
-                col = col.decode("latin1", errors="replace")
-        columns.append(col)
-
-
-    # SELECT * FROM table LIMIT 500
+    args = request.args
+    columnas = [c for v in args.getlist("cols") for c in v.split(",") if c]
     with db.engine.connect() as conn:
-        res = conn.execute(text(f"SELECT * FROM `{table}` LIMIT 500"))
-
-        def normalize_row(r):
-            clean = {}
-            for k, v in r._mapping.items():
-                if isinstance(v, (bytes, bytearray)):
-                    try:
-                        clean[k] = v.decode("utf-8")
-                    except:
-                        clean[k] = v.decode("latin1", errors="replace")
-                else:
-                    clean[k] = v
-            return clean
-
-        rows = [normalize_row(r) for r in res]
-        print("ROWS:", rows)
-        #for r in rows:
-            # print("ROW TYPE:", type(r))
-            # print("DIR:", dir(r))
-            # print("AS MAPPING:", getattr(r, "_mapping", None))
-
-
-    # Usamos un template simplificado para tablas genéricas
-    GENERIC_TEMPLATE = """
-    <!doctype html>
-    <html><head><meta charset="utf-8">
-    <title>{{ table }}</title>
-    <style>
-      body{font-family:Arial;background:#f2f2f2;margin:0;padding:0}
-    .container{width:90%;margin:22px auto;background:#fff;padding:18px;border-radius:8px}
-    .tools{display:flex;gap:8px;margin-bottom:12px;align-items:center}
-    .btn{background:#0b74da;color:#fff;padding:8px 10px;border-radius:6px;text-decoration:none}
-    .btn.alt{background:#6b21a8}
-    .btn.danger{background:#cc3333}
-      table{width:100%;border-collapse:collapse}
-      th{background:#0b74da;color:#fff;padding:8px}
-      td{padding:8px;border-bottom:1px solid #eee}
-    table { width: 100%; border-collapse: collapse; table-layout: fixed;}
-    th, td { padding: 8px; overflow: hidden; text-overflow: ellipsis; white-space: nowrap; text-align: center; vertical-align: middle; }  
-    </style>
-    </head><body>
-    <div class="container">
-     <div style="display:flex;align-items:center">
-    <div class="tools">
-      <a class="btn" href="{{ url_for('adminer.new_record', table=table) }}">➕ Nuevo Registro</a>
-      <a class="btn alt" href="{{ url_for('adminer.table_structure', table=table) }}">⚙️ Estructura</a>
-      <a class="btn" href="{{ url_for('adminer.table_show_create', table=table) }}">🔎 SHOW CREATE</a>
-      <div class="export-buttons">
-        <a class="btn" href="{{ url_for('adminer.export_table', table=table, fmt='csv') }}">Export CSV</a>
-        <a class="btn" href="{{ url_for('adminer.export_table', table=table, fmt='json') }}">Export JSON</a>
-      </div>
-      <div style="margin-bottom: 15px;">
-    <a class="btn" href="{{ url_for('adminer.index') }}"> ← Volver </a>
-</div>
-    </div>
-   </div>
-      <h2>Tabla: {{ table }}</h2>
-      <table>
-        <tr>
-        {% for col in columns %}
-            <th>{{ col }}</th>
-        {% endfor %}
-        <th>Acciones</th>
-        </tr>
-
-        {% for row in rows %}
-        <tr>
-            {% for col in columns %}
-                <td>{{ row[col] }}</td>
-            {% endfor %}
-     <td class="actions">
-        <a class="btn" href="{{ url_for('adminer.edit_record', table=table, id=row.id) }}">✏ Editar</a>
-        <a class="btn danger" href="{{ url_for('adminer.delete_record', table=table, id=row.id) }}" onclick="return confirm('Borrar registro?')">🗑 Borrar</a>
-    </td>
-        </tr>
-        {% endfor %}
-      </table>
-
-      <p style="margin-top:18px;">
-         Esta tabla no está registrada como modelo SQLAlchemy.<br>
-         Podés agregar columnas en “Estructura”.
-      </p>
-    </div>
-    </body></html>
-    """
-
-    return render_template_string(GENERIC_TEMPLATE, table=table, columns=columns, rows=rows)
+        p = pagina_tabla(conn, table, esquema=catalogo.describir(table), columnas=columnas, orden=args.get("orden") or None,
+                         desc=bool(args.get("desc")), despues=decode_cursor(args.get("despues")),
+                         antes=decode_cursor(args.get("antes")), limite=args.get("limite", 100, type=int),
+                         buscar=args.get("q") or None, buscar_en=args.get("col") or None)
+
+    def url_pagina(**cambios):
+        params = {"cols": args.getlist("cols"), "orden": p["orden"], "desc": 1 if p["desc"] else None,
+                  "limite": p["limite"], "q": args.get("q"), "col": args.get("col")}
+        params.update(cambios)
+        return url_for("adminer.table_view", table=table,
+                       **{k: v for k, v in params.items() if v not in (None, "", [])})
+
+    return render_template_string(LIST_TEMPLATE, table=table, columns=p["todas"], p=p,
+                                  es_modelo=table in MODELS, url_pagina=url_pagina)
 # ------------------ GENERIC + ORM: NEW RECORD ------------------
 
 @adminer_bp.route("/table/<table>/new", methods=["GET","POST"])
@@ -1442,35 +1462,79 @@ def table_show_create(table):
 
 @adminer_bp.route("/table/<table>/export.<fmt>")
 def export_table(table, fmt="csv"):
+    """
+    Export en streaming (ver exportacion.py): csv, json o ndjson.
+    export.csv.gz o ?gzip=1 comprime; ?cols=a&cols=b limita las columnas.
+    """
     if not _validate_table(table):
         return "Tabla no permitida", 404
-    model = MODELS[table]
-    rows = model.query.all()
-    columns = [c.name for c in model.__table__.columns]
+    gz = fmt.endswith(".gz") or request.args.get("gzip", "").lower() in ("1", "true", "si")
+    fmt = fmt[:-3] if fmt.endswith(".gz") else fmt
+    if fmt not in FORMATOS:
+        return "Formato no soportado", 400
+    columnas = [c for v in request.args.getlist("cols") for c in v.split(",") if c]
+
+    nombre = f"{table}.{fmt}" + (".gz" if gz else "")
+    gen = exportar(db.engine, table, fmt, columnas=columnas, gzip=gz, esquema=catalogo.describir(table))
+    resp = Response(stream_with_context(gen), mimetype=MIMETYPES["gz" if gz else fmt])
+    resp.headers["Content-Disposition"] = f'attachment; filename="{nombre}"'
+    return resp
+
+@adminer_bp.route("/table/<table>/import", methods=["GET", "POST"])
+def import_table(table):
+    """
+    Import masivo (ver importacion.py). POST multipart: archivo (.csv / .ndjson,
+    .gz opcional), modo, clave, simular, saltar_errores. Responde en streaming
+    una línea JSON de progreso por bloque confirmado; la última trae el resumen.
+    """
+    if not _validate_table(table):
+        return "Tabla no permitida", 404
+    if request.method == "GET":
+        return render_template_string(IMPORT_TEMPLATE, table=table)
+
+    archivo = request.files.get("archivo")
+    if not archivo or not archivo.filename:
+        return "Falta el archivo", 400
+    nombre = archivo.filename.lower()
+    fmt = "ndjson" if nombre.removesuffix(".gz").endswith((".ndjson", ".jsonl")) else "csv"
+    if nombre.endswith(".gz"):
+        fmt += ".gz"
+    modo = request.form.get("modo", "insertar")
+    if modo not in MODOS:
+        return "Modo no soportado", 400
+    clave = [c.strip() for c in request.form.get("clave", "").split(",") if c.strip()]
+    simular = request.form.get("simular") == "on"
+    saltar = request.form.get("saltar_errores") == "on"
+    reflexion = catalogo.tabla(table)
+    # werkzeug cierra request.files al volver de la vista, antes del streaming:
+    # se pasa a un temporal en disco (no a memoria)
+    copia = tempfile.TemporaryFile()
+    archivo.save(copia)
+    copia.seek(0)
+
+    def generar():
+        fin = {}
+        try:
+            for p in importar(db.engine, table, copia, fmt, modo=modo, clave=clave,
+                              saltar_errores=saltar, simular=simular, reflexion=reflexion):
+                fin = p
+                yield json.dumps(p, ensure_ascii=False) + "\n"
+        finally:
+            copia.close()
+        if simular:
+            return
+        # el after_request ya invalidó al empezar la respuesta, antes de escribir
+        invalidar()
+        if table in _TABLAS_GRILLAS:
+            grillas.invalidar_todas()
+        _append_struct_log(
+            f"Importación ({modo}) de {archivo.filename}: {fin.get('escritas', 0)} filas escritas, "
+            f"{fin.get('errores', 0)} con error, {fin.get('segundos', 0)}s"
+            + (f" — cortada: {fin['motivo']}" if fin.get("motivo") else ""),
+            tabla=table,
+        )
 
-    if fmt == "json":
-        out = []
-        for r in rows:
-            d = {}
-            for c in columns:
-                v = getattr(r, c)
-                if isinstance(v, (datetime.date, datetime.datetime)):
-                    d[c] = v.isoformat()
-                else:
-                    d[c] = v
-            out.append(d)
-        return jsonify(out)
-    else:
-        # CSV
-        si = io.StringIO()
-        writer = csv.writer(si)
-        writer.writerow(columns)
-        for r in rows:
-            writer.writerow([getattr(r, c) for c in columns])
-        mem = io.BytesIO()
-        mem.write(si.getvalue().encode("utf-8"))
-        mem.seek(0)
-        return send_file(mem, mimetype="text/csv", download_name=f"{table}.csv", as_attachment=True)
+    return Response(stream_with_context(generar()), mimetype="application/x-ndjson")
 
 @adminer_bp.route("/search", methods=["GET"])
 def adminer_search():
@@ -1512,41 +1576,35 @@ def enum_values(table, col):
     """Return enum possible values for a column, if any (used in UI)."""
     if not _validate_table(table):
         return jsonify({"ok": False, "error": "tabla no permitida"}), 404
-    meta = _get_table_meta(table)
-    c = next((x for x in meta if x.get("Field") == col), None)
-    if not c:
+    info = catalogo.tabla(table)
+    if not any(c["name"] == col for c in info["columnas"]):
         return jsonify({"ok": False, "error": "columna no encontrada"}), 404
-    t = c.get("Type","")
-    if not t.lower().startswith("enum("):
+    if col not in info["enums"]:
         return jsonify({"ok": False, "enum": []})
-    # extract values
-    inside = t[t.find("(")+1:t.rfind(")")]
-    # split by ',' but values are quoted
-    vals = []
-    cur = ""
-    inq = False
-    for ch in inside:
-        if ch == "'" and not inq:
-            inq = True
-            cur = ""
-            continue
-        if ch == "'" and inq:
-            inq = False
-            vals.append(cur)
-            cur = ""
-            continue
-        if inq:
-            cur += ch
-    return jsonify({"ok": True, "enum": vals})
+    return jsonify({"ok": True, "enum": info["enums"][col]})
+
+# ------------------ CATÁLOGO DEL ESQUEMA ------------------
+@adminer_bp.route("/catalogo", methods=["GET", "POST"])
+def catalogo_esquema():
+    """GET: estado del catálogo cacheado. POST: descartarlo (refresco manual)."""
+    if request.method == "POST":
+        catalogo.invalidar_esquema()
+        _append_struct_log("Catálogo del esquema refrescado a mano")
+        flash("Esquema recargado", "success")
+        return redirect(request.referrer or url_for("adminer.index"))
+    return jsonify({"ok": True, "tablas": catalogo.tablas(), **catalogo.estadisticas()})
 
 # ------------------ STRUCT LOG API ------------------
 @adminer_bp.route("/struct_log")
 def struct_log():
-    if not os.path.exists(STRUCT_LOG_PATH):
-        return jsonify({"ok": True, "logs": []})
+    """
+    Entradas más nuevas primero.
+    ?limit= (500, máx 5000) &tabla= &desde=AAAA-MM-DD &hasta=AAAA-MM-DD
+    """
     try:
-        with open(STRUCT_LOG_PATH, "r", encoding="utf-8") as f:
-            logs = json.load(f)
+        limit = max(1, min(request.args.get("limit", 500, type=int), 5000))
+        logs = _buscar_struct_log(limit, request.args.get("tabla") or None,
+                                  request.args.get("desde") or None, request.args.get("hasta") or None)
         return jsonify({"ok": True, "logs": logs})
     except Exception:
         return jsonify({"ok": False, "error": "no pudo leer logs"}), 500
@@ -1622,7 +1680,7 @@ def create_table():
             return jsonify({"ok": False, "error": err}), 500
 
         # Logging
-        _append_struct_log(f"Tabla creada: {table}")
+        _append_struct_log(f"Tabla creada: {table}", tabla=table)
         return jsonify({"ok": True})
     except Exception as e:
         return jsonify({"ok": False, "error": str(e)}), 500
@@ -1645,6 +1703,11 @@ def adminer_execute_sql():
     except Exception as e:
         flash(f"Error al ejecutar SQL: {e}", "danger")
         return redirect(url_for("adminer.table_structure", table=table))
+    finally:
+        if catalogo.es_ddl(sql):
+            catalogo.invalidar_esquema()
+        if _toca_grillas(sql):
+            grillas.invalidar_todas()
 
     return redirect(url_for("adminer.table_structure", table=table))
 # ----------------------- DROP TABLE ------------------------------------
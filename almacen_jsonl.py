@@ -0,0 +1,284 @@
+# almacen_jsonl.py
+# Registro append-only en JSONL (un objeto JSON por línea) para el chat y las
+# notificaciones de ppamtools.
+#
+# Antes cada mensaje leía el .json completo, agregaba uno y lo reescribía
+# entero: O(historial) por escritura y, con dos requests (o workers) a la vez,
+# uno pisaba al otro y se perdían mensajes.
+#
+#   - agregar(): una sola escritura con O_APPEND bajo lock (hilos + flock
+#     sobre <archivo>.lock entre procesos); el id se toma del último registro
+#     legible, así es monótono aunque escriban varios workers.
+#   - ultimos(n): de la cola en memoria (o leyendo desde el final si n > maximo).
+#   - compactación: cuando el archivo pasa de max_bytes se reescribe (temp +
+#     os.replace) con los últimos `maximo` registros.
+#   - recorrer(): generador del más nuevo al más viejo leyendo bloques desde
+#     el final, para buscar/filtrar sin cargar todo el historial.
+#   - legado: si existe el .json viejo y todavía no el .jsonl, se migra una vez
+#     (legado_reciente_primero=True si la lista vieja tenía el más nuevo al inicio)
+#     numerando los registros desde 1.
+#
+# Lecturas incrementales: cada proceso guarda en memoria los últimos `maximo`
+# registros y hasta qué byte leyó. desde(since_id) hace un os.stat(); si el
+# archivo creció lee solo los bytes nuevos, si cambió el inodo (compactación
+# o migración) recarga la cola. esperar() es el long-poll: duerme hasta que
+# llegue algo (aviso inmediato si lo escribió este proceso, os.stat() cada
+# medio segundo para los demás workers) o se cumpla el timeout.
+#
+# Uso:
+#   CHAT = LogJSONL(os.path.join(DATA_DIR, "chat.jsonl"), maximo=1000,
+#                   legado=os.path.join(DATA_DIR, "chat.json"))
+#   msg = CHAT.agregar({"usuario": "ana", "texto": "hola"})   # -> con "id"
+#   CHAT.ultimos(200)
+#   CHAT.desde(ultimo_id_visto)                # solo lo nuevo ([] si nada)
+#   CHAT.esperar(ultimo_id_visto, timeout=20)  # long-poll
+#
+# Equipo de desarrollo PPAM
+
+import os
+import json
+import logging
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:     # Windows: solo el lock entre hilos
+    fcntl = None
+
+logger = logging.getLogger("ppam.almacen")
+
+BLOQUE = 8192
+INTERVALO_ESPERA = 0.5      # segundos entre os.stat() durante esperar()
+
+
+def _linea(registro):
+    texto = json.dumps(registro, ensure_ascii=False, default=str, separators=(",", ":"))
+    return (texto + "\n").encode("utf-8")
+
+
+def _parsear(lineas):
+    out = []
+    for ln in lineas:
+        if not ln.strip():
+            continue
+        try:
+            out.append(json.loads(ln))
+        except ValueError:
+            # línea a medio escribir (lector sin lock) o basura: se saltea
+            continue
+    return out
+
+
+class LogJSONL:
+    """Registro append-only con ids monótonos, lecturas por cola y compactación."""
+
+    def __init__(self, ruta, maximo=1000, max_bytes=512 * 1024, legado=None, legado_reciente_primero=False):
+        self.ruta = ruta
+        self.maximo = maximo
+        self.max_bytes = max_bytes
+        self.legado = legado
+        self.legado_reciente_primero = legado_reciente_primero
+        self._lock = threading.Lock()
+        self._migrado = False
+        # índice de cola en memoria
+        self._mem = deque(maxlen=maximo)
+        self._mem_inodo = None
+        self._mem_offset = 0
+        self._mem_lock = threading.Lock()
+        self._nuevos = threading.Condition()
+
+    # -------------------- lock --------------------
+    @contextmanager
+    def _bloqueado(self):
+        with self._lock:
+            with open(f"{self.ruta}.lock", "a") as fh:
+                if fcntl is not None:
+                    fcntl.flock(fh, fcntl.LOCK_EX)
+                try:
+                    self._migrar_legado()
+                    yield
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(fh, fcntl.LOCK_UN)
+
+    def _migrar_legado(self):
+        if self._migrado:
+            return
+        self._migrado = True
+        if not self.legado or os.path.exists(self.ruta) or not os.path.exists(self.legado):
+            return
+        try:
+            with open(self.legado, "r", encoding="utf-8") as fh:
+                viejos = json.load(fh)
+            if isinstance(viejos, list):
+                if self.legado_reciente_primero:
+                    viejos = viejos[::-1]
+                # el formato viejo no tenía ids: se numeran en orden
+                viejos = [{**r, "id": i}
+                          for i, r in enumerate((r for r in viejos if isinstance(r, dict)), 1)]
+                self._reescribir(viejos[-self.maximo:])
+                logger.info("Migrados %d registros de %s", len(viejos[-self.maximo:]), self.legado)
+        except (OSError, ValueError) as e:
+            logger.warning("No se pudo migrar %s: %s", self.legado, e)
+
+    # -------------------- lectura --------------------
+    def _cola(self, n):
+        """Últimas n líneas completas del archivo (bytes), leyendo desde el final."""
+        try:
+            fh = open(self.ruta, "rb")
+        except FileNotFoundError:
+            return []
+        with fh:
+            fh.seek(0, os.SEEK_END)
+            pos = fh.tell()
+            datos = b""
+            while pos > 0 and datos.count(b"\n") <= n:
+                paso = min(BLOQUE, pos)
+                pos -= paso
+                fh.seek(pos)
+                datos = fh.read(paso) + datos
+        lineas = datos.split(b"\n")
+        if pos > 0:
+            lineas = lineas[1:]     # la primera puede estar cortada
+        return [ln for ln in lineas if ln.strip()][-n:] if n else []
+
+    def recorrer(self):
+        """Registros del más nuevo al más viejo, leyendo el archivo en bloques desde el final."""
+        if not self._migrado:
+            with self._bloqueado():
+                pass
+        try:
+            fh = open(self.ruta, "rb")
+        except FileNotFoundError:
+            return
+        with fh:
+            fh.seek(0, os.SEEK_END)
+            pos = fh.tell()
+            resto = b""
+            while pos > 0:
+                paso = min(BLOQUE, pos)
+                pos -= paso
+                fh.seek(pos)
+                partes = (fh.read(paso) + resto).split(b"\n")
+                # la primera parte puede seguir en el bloque anterior
+                resto = partes[0]
+                for r in reversed(_parsear(partes[1:])):
+                    yield r
+            for r in _parsear([resto]):
+                yield r
+
+    def ultimos(self, n):
+        if n > self.maximo:
+            return _parsear(self._cola(n))
+        self._refrescar()
+        with self._mem_lock:
+            return list(self._mem)[-n:] if n else []
+
+    def _refrescar(self):
+        """Pone al día la cola en memoria leyendo solo lo que falta."""
+        if not self._migrado:
+            with self._bloqueado():
+                pass
+        try:
+            st = os.stat(self.ruta)
+        except FileNotFoundError:
+            with self._mem_lock:
+                self._mem.clear()
+                self._mem_inodo, self._mem_offset = None, 0
+            return
+        if st.st_ino == self._mem_inodo and st.st_size == self._mem_offset:
+            return
+
+        with self._mem_lock:
+            try:
+                fh = open(self.ruta, "rb")
+            except FileNotFoundError:
+                return
+            with fh:
+                inodo = os.fstat(fh.fileno()).st_ino
+                if inodo == self._mem_inodo and os.fstat(fh.fileno()).st_size >= self._mem_offset:
+                    fh.seek(self._mem_offset)
+                    datos = fh.read()
+                    base = self._mem_offset
+                else:
+                    # archivo nuevo o reemplazado: se recarga la cola completa
+                    self._mem.clear()
+                    datos = fh.read()
+                    base = 0
+            corte = datos.rfind(b"\n") + 1    # la última línea puede estar a medio escribir
+            self._mem.extend(_parsear(datos[:corte].split(b"\n")))
+            self._mem_inodo = inodo
+            self._mem_offset = base + corte
+
+    def desde(self, since_id, limite=200):
+        """Registros con id > since_id (a lo sumo los últimos `limite`)."""
+        self._refrescar()
+        with self._mem_lock:
+            nuevos = [r for r in self._mem if r.get("id", 0) > since_id]
+        return nuevos[-limite:]
+
+    def esperar(self, since_id, timeout, limite=200):
+        """Long-poll: como desde(), pero espera hasta `timeout` segundos si no hay nada."""
+        limite_t = time.monotonic() + timeout
+        while True:
+            nuevos = self.desde(since_id, limite)
+            resto = limite_t - time.monotonic()
+            if nuevos or resto <= 0:
+                return nuevos
+            with self._nuevos:
+                self._nuevos.wait(min(INTERVALO_ESPERA, resto))
+
+    def ultimo_visto(self):
+        """Id del último registro según la cola en memoria (para ETag)."""
+        self._refrescar()
+        with self._mem_lock:
+            return self._mem[-1].get("id", 0) if self._mem else 0
+
+    def ultimo_id(self):
+        """Id del último registro legible: una última línea cortada o corrupta no reinicia los ids."""
+        for r in self.recorrer():
+            if isinstance(r, dict) and isinstance(r.get("id"), int):
+                return r["id"]
+        return 0
+
+    # -------------------- escritura --------------------
+    def agregar(self, registro):
+        """Agrega un registro con el id siguiente y lo devuelve."""
+        with self._bloqueado():
+            nuevo = {**registro, "id": self.ultimo_id() + 1}
+            fd = os.open(self.ruta, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                linea = _linea(nuevo)
+                tam = os.fstat(fd).st_size
+                if tam:
+                    # última línea cortada (escritura interrumpida): no pegarse a ella.
+                    # Con O_APPEND el write va al final igual, el lseek es solo para leer
+                    os.lseek(fd, tam - 1, os.SEEK_SET)
+                    if os.read(fd, 1) != b"\n":
+                        linea = b"\n" + linea
+                os.write(fd, linea)
+                tam = os.fstat(fd).st_size
+            finally:
+                os.close(fd)
+            if tam > self.max_bytes:
+                self._reescribir(_parsear(self._cola(self.maximo)))
+        with self._nuevos:
+            self._nuevos.notify_all()
+        return nuevo
+
+    def _reescribir(self, registros):
+        # llamar con el lock tomado
+        tmp = f"{self.ruta}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as fh:
+            for r in registros:
+                fh.write(_linea(r))
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp, self.ruta)
+
+    def compactar(self):
+        with self._bloqueado():
+            self._reescribir(_parsear(self._cola(self.maximo)))
@@ -19,6 +19,7 @@ from flask import (
 from datetime import datetime, timedelta
 from pathlib import Path
 from apiutils import api_response, api_error, normalize_pa, _detect_free_account  # Usá tus helpers existentes
+import logtail
 
 # ------------------------------------------------------------
 # BLUEPRINT PRINCIPAL
@@ -690,23 +691,42 @@ LOG_CANDIDATES = [
 @apiapp_bp.route("/api/logs", methods=["GET"])
 def logs_get():
     """
-    Devuelve los últimos ~200–300 lines de cada log disponible.
+    Devuelve las últimas ?lines= (300) líneas de cada log disponible, leyendo
+    desde el final del archivo (no importa cuánto pese).
+
+    Incremental: ?log=<ruta de LOG_CANDIDATES>&since_offset=N&inode=I&huella=H
+    devuelve solo lo nuevo de ese log. "cursores" trae offset / inodo / huella
+    para el próximo pedido; reset=true si el log rotó o se vació.
     """
+    lineas = max(1, min(request.args.get("lines", 300, type=int), 5000))
+    solo = request.args.get("log")
+    if solo is not None and solo not in LOG_CANDIDATES:
+        return jsonify({"ok": False, "error": "Log desconocido"}), 400
+
     results = {}
+    cursores = {}
     for p in LOG_CANDIDATES:
+        if solo is not None and p != solo:
+            continue
         try:
             abs_p = p
             if not os.path.isabs(p):
                 abs_p = os.path.join(BASE_ALLOWED_DIR, p)
 
             if os.path.exists(abs_p):
-                with open(abs_p, "r", encoding="utf-8", errors="replace") as f:
-                    lines = f.readlines()
-                results[p] = "".join(lines[-300:])
+                desde = request.args.get("since_offset", type=int) if solo else None
+                if desde is None:
+                    r = logtail.cola(abs_p, lineas)
+                else:
+                    r = logtail.leer_desde(abs_p, desde, request.args.get("inode", type=int),
+                                           request.args.get("huella", type=int), lineas_reset=lineas)
+                results[p] = r["texto"]
+                cursores[p] = {"offset": r["offset"], "inodo": r["inodo"], "huella": r["huella"],
+                               "reset": r["reset"], "recortado": r["recortado"]}
         except Exception:
             results[p] = "⚠ Error leyendo log"
 
-    return jsonify({"ok": True, "logs": results})
+    return jsonify({"ok": True, "logs": results, "cursores": cursores})
 
 
 # ============================================================
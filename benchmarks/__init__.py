@@ -0,0 +1,12 @@
+# benchmarks/__init__.py
+# Benchmarks de los caminos calientes de PPAM sobre datos sintéticos.
+#
+#   python -m benchmarks --escalas chica,mediana --salida reporte.json
+#
+# generador.py  -> datos deterministas (publicadores, puntos, solicitudes,
+#                  ausencias, experiencias y meses de turnos) en SQLite
+# escenarios.py -> qué se mide (bot, turnos, planificación, postulantes, ...)
+# __main__.py   -> ejecución por escala y reporte JSON comparable entre corridas
+# comparar.py   -> baselines por escala y control de regresiones (tiempo y SQL)
+#
+# Equipo de desarrollo PPAM
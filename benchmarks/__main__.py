@@ -0,0 +1,158 @@
+# benchmarks/__main__.py
+# Ejecuta los escenarios en una o más escalas y escribe un reporte JSON.
+#
+#   python -m benchmarks                                   # escala chica
+#   python -m benchmarks --escalas chica,mediana,grande --repeticiones 5 \
+#       --salida reporte.json
+#
+# La app corre contra un SQLite temporal (PPAM_DATABASE_URI). Los escenarios
+# que modifican datos (bot, materialización de turnos) arrancan siempre desde
+# una copia de la base recién generada, así cada repetición mide lo mismo.
+# Las cachés en memoria (cacheutils) y las grillas semanales guardadas se
+# vacían antes de cada repetición.
+#
+# Equipo de desarrollo PPAM
+
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import argparse
+import platform
+import statistics
+import tempfile
+from datetime import date, datetime
+
+FORMATO_REPORTE = 1
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _args(argv):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Benchmarks PPAM")
+    parser.add_argument("--escalas", default="chica", help="lista separada por comas (chica,mediana,grande)")
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--calentamiento", type=int, default=1, help="corridas previas sin medir")
+    parser.add_argument("--semilla", type=int, default=2025)
+    parser.add_argument("--ancla", help="lunes de referencia YYYY-MM-DD (default: semana actual)")
+    parser.add_argument("--escenarios", help="filtrar escenarios (separados por comas)")
+    parser.add_argument("--salida", default="reporte_benchmarks.json")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = _args(argv)
+    salida = os.path.abspath(args.salida)
+    ancla = date.fromisoformat(args.ancla) if args.ancla else None
+
+    # Base temporal ANTES de importar la app (flask_app lee PPAM_DATABASE_URI al importar)
+    tmp = tempfile.mkdtemp(prefix="ppam_bench_")
+    base_db = os.path.join(tmp, "base.db")
+    trabajo_db = os.path.join(tmp, "trabajo.db")
+    os.environ["PPAM_DATABASE_URI"] = "sqlite:///" + trabajo_db
+    os.environ["PPAM_GRILLAS_DIR"] = os.path.join(tmp, "grillas")
+    os.environ["PPAM_GRILLAS_FONDO"] = "0"
+    if RAIZ not in sys.path:
+        sys.path.insert(0, RAIZ)
+    # el bot escribe su pipeline y bot_log.json en el directorio actual
+    os.chdir(tmp)
+    logging.getLogger("ppam.perfilador").setLevel(logging.ERROR)
+
+    from flask_app import app
+    from extensiones import db
+    from perfilador import medir
+    from cacheutils import limpiar_todas
+    from grillas import vaciar as vaciar_grillas
+    from benchmarks.generador import ESCALAS, generar
+    from benchmarks.escenarios import ESCENARIOS, preparar
+
+    app.config["TESTING"] = True
+    if not app.config.get("SECRET_KEY"):
+        app.config["SECRET_KEY"] = "benchmarks"
+
+    escenarios = ESCENARIOS
+    if args.escenarios:
+        pedidos = {e.strip() for e in args.escenarios.split(",")}
+        escenarios = [e for e in ESCENARIOS if e[0] in pedidos]
+
+    def restaurar():
+        with app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+        shutil.copyfile(base_db, trabajo_db)
+        vaciar_grillas()
+
+    reporte = {
+        "formato": FORMATO_REPORTE,
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "semilla": args.semilla,
+        "repeticiones": args.repeticiones,
+        "maquina": {"python": platform.python_version(), "plataforma": platform.platform()},
+        "escalas": {},
+    }
+
+    for escala in [e.strip() for e in args.escalas.split(",") if e.strip()]:
+        if escala not in ESCALAS:
+            print(f"Escala desconocida: {escala} (opciones: {', '.join(ESCALAS)})", file=sys.stderr)
+            return 2
+
+        t0 = time.perf_counter()
+        with app.app_context():
+            datos = generar(db, escala, semilla=args.semilla, ancla=ancla)
+            db.session.remove()
+            db.engine.dispose()
+        shutil.copyfile(trabajo_db, base_db)
+        vaciar_grillas()
+        generacion_s = round(time.perf_counter() - t0, 2)
+        print(f"\n== {escala}: {datos['publicadores']} publicadores, {datos['puntos']} puntos, "
+              f"{datos['turnos']} turnos (generado en {generacion_s}s)")
+
+        ctx = preparar(app, datos)
+        resultados = {}
+        for nombre, fn, modifica in escenarios:
+            for _ in range(args.calentamiento):
+                if modifica:
+                    restaurar()
+                fn(ctx)
+
+            tiempos, consultas, db_ms = [], [], []
+            for _ in range(args.repeticiones):
+                if modifica:
+                    restaurar()
+                # se mide el camino en frío: sin lo cacheado por la corrida anterior
+                limpiar_todas()
+                vaciar_grillas()
+                with medir() as m:
+                    fn(ctx)
+                tiempos.append(m.total_ms)
+                consultas.append(m.consultas)
+                db_ms.append(m.db_ms)
+            if modifica:
+                restaurar()
+
+            resultados[nombre] = {
+                "ms_min": round(min(tiempos), 2),
+                "ms_mediana": round(statistics.median(tiempos), 2),
+                "ms_max": round(max(tiempos), 2),
+                "sql": int(statistics.median(consultas)),
+                "db_ms_mediana": round(statistics.median(db_ms), 2),
+            }
+            r = resultados[nombre]
+            print(f"  {nombre:<28} {r['ms_mediana']:>10.1f} ms  {r['sql']:>6} SQL  (db {r['db_ms_mediana']:.1f} ms)")
+
+        reporte["escalas"][escala] = {
+            "datos": datos,
+            "generacion_s": generacion_s,
+            "escenarios": resultados,
+        }
+
+    with open(salida, "w", encoding="utf-8") as fh:
+        json.dump(reporte, fh, ensure_ascii=False, indent=2)
+    print(f"\nReporte: {salida}")
+    shutil.rmtree(tmp, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,225 @@
+# benchmarks/comparar.py
+# Compara un reporte de benchmarks contra las baselines guardadas por escala.
+#
+#   # guardar el reporte actual como baseline (un archivo por escala)
+#   python -m benchmarks.comparar guardar reporte.json
+#
+#   # comparar; sale con código 1 si algún escenario empeoró más que el umbral
+#   # o si una escala del reporte no tiene baseline
+#   python -m benchmarks.comparar reporte.json
+#   python -m benchmarks.comparar reporte.json --solo-sql      # otra máquina
+#   python -m benchmarks.comparar reporte.json --permitir-sin-base   # escala nueva
+#
+# Las baselines de chica, mediana y grande están versionadas en
+# benchmarks/baselines/ (una corrida de 5 repeticiones, semilla 2025). Los
+# tiempos dependen de la máquina: en otra, usar --solo-sql o regenerarlas.
+#
+# Se comparan la mediana de tiempo y la cantidad de sentencias SQL de cada
+# escenario. Un escenario empeora si supera el factor del umbral Y la
+# diferencia absoluta mínima (así el ruido en escenarios de pocos ms no
+# dispara falsos positivos). Un escenario de la baseline que falta en el
+# reporte (se cayó o se sacó) también falla.
+#
+# Solo se compara contra una baseline generada con la misma semilla y los
+# mismos volúmenes de datos; si cambió solo la semana de anclaje se avisa
+# (--ancla con la semana_actual de la baseline la repite).
+#
+# Equipo de desarrollo PPAM
+
+import os
+import sys
+import json
+import argparse
+
+DIR_BASELINES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines")
+
+# factor = nuevo / baseline; minimo = diferencia absoluta mínima para contar
+UMBRALES = {
+    "tiempo_factor": 1.5,
+    "tiempo_minimo_ms": 20.0,
+    "sql_factor": 1.2,
+    "sql_minimo": 3,
+}
+
+# claves de "datos" que dependen solo de la semana de anclaje
+CLAVES_FECHA = ("desde", "hasta", "semana_actual", "semana_sin_turnos")
+
+# ajustes por escenario (se combinan con UMBRALES)
+UMBRALES_ESCENARIO = {
+    # el bot tiene más varianza (escribe pipeline a disco)
+    "bot_run_batch": {"tiempo_factor": 2.0},
+}
+
+
+def _leer(path):
+    with open(path, "r", encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def ruta_baseline(escala, directorio=DIR_BASELINES):
+    return os.path.join(directorio, f"{escala}.json")
+
+
+def guardar(reporte, directorio=DIR_BASELINES):
+    """Guarda cada escala del reporte como baseline. Devuelve las rutas escritas."""
+    os.makedirs(directorio, exist_ok=True)
+    rutas = []
+    for escala, datos in reporte.get("escalas", {}).items():
+        baseline = {
+            "formato": reporte.get("formato"),
+            "fecha": reporte.get("fecha"),
+            "semilla": reporte.get("semilla"),
+            "maquina": reporte.get("maquina"),
+            "escala": escala,
+            **datos,
+        }
+        ruta = ruta_baseline(escala, directorio)
+        with open(ruta, "w", encoding="utf-8") as fh:
+            json.dump(baseline, fh, ensure_ascii=False, indent=2)
+        rutas.append(ruta)
+    return rutas
+
+
+def _umbral(nombre, clave, umbrales):
+    return UMBRALES_ESCENARIO.get(nombre, {}).get(clave, umbrales[clave])
+
+
+def diferencias_datos(reporte, nuevo, base):
+    """
+    (incompatibles, avisos): diferencias de semilla y datos generados entre el
+    reporte (escala `nuevo`) y la baseline. Con incompatibles no se compara.
+    """
+    incompatibles, avisos = [], []
+    if reporte.get("semilla") != base.get("semilla"):
+        incompatibles.append(f"semilla {base.get('semilla')} -> {reporte.get('semilla')}")
+    d_nuevo, d_base = nuevo.get("datos", {}), base.get("datos", {})
+    for clave in sorted(set(d_nuevo) | set(d_base)):
+        if d_nuevo.get(clave) != d_base.get(clave):
+            destino = avisos if clave in CLAVES_FECHA else incompatibles
+            destino.append(f"{clave} {d_base.get(clave)} -> {d_nuevo.get(clave)}")
+    return incompatibles, avisos
+
+
+def comparar_escala(nuevo, base, umbrales=UMBRALES, solo_sql=False):
+    """
+    Compara los escenarios de una escala.
+    Devuelve lista de dicts {escenario, ms_base, ms_nuevo, sql_base, sql_nuevo, estado, motivos}.
+    """
+    filas = []
+    esc_nuevo = nuevo.get("escenarios", {})
+    esc_base = base.get("escenarios", {})
+    for nombre in sorted(set(esc_nuevo) | set(esc_base)):
+        n, b = esc_nuevo.get(nombre), esc_base.get(nombre)
+        if n is None or b is None:
+            filas.append({
+                "escenario": nombre,
+                "ms_base": b and b["ms_mediana"], "ms_nuevo": n and n["ms_mediana"],
+                "sql_base": b and b["sql"], "sql_nuevo": n and n["sql"],
+                # sin baseline es un escenario nuevo; sin medición, uno que se cayó
+                "estado": "sin baseline" if b is None else "NO MEDIDO",
+                "motivos": [],
+            })
+            continue
+
+        motivos = []
+        if not solo_sql:
+            ms_b, ms_n = b["ms_mediana"], n["ms_mediana"]
+            if (ms_n > ms_b * _umbral(nombre, "tiempo_factor", umbrales)
+                    and ms_n - ms_b > _umbral(nombre, "tiempo_minimo_ms", umbrales)):
+                motivos.append(f"tiempo x{ms_n / ms_b:.2f}" if ms_b else "tiempo")
+        sql_b, sql_n = b["sql"], n["sql"]
+        if (sql_n > sql_b * _umbral(nombre, "sql_factor", umbrales)
+                and sql_n - sql_b > _umbral(nombre, "sql_minimo", umbrales)):
+            motivos.append(f"SQL {sql_b} -> {sql_n}")
+
+        filas.append({
+            "escenario": nombre,
+            "ms_base": b["ms_mediana"], "ms_nuevo": n["ms_mediana"],
+            "sql_base": sql_b, "sql_nuevo": sql_n,
+            "estado": "REGRESION" if motivos else "ok",
+            "motivos": motivos,
+        })
+    return filas
+
+
+def _fmt(v, dec=1):
+    if v is None:
+        return "-"
+    return f"{v:.{dec}f}" if isinstance(v, float) else str(v)
+
+
+def _args(argv):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.comparar",
+                                     description="Compara un reporte de benchmarks contra las baselines")
+    parser.add_argument("reporte", nargs="+", help="reporte.json  |  guardar reporte.json")
+    parser.add_argument("--baselines", default=DIR_BASELINES, help="directorio de baselines")
+    parser.add_argument("--solo-sql", action="store_true", help="ignorar tiempos (máquina distinta)")
+    parser.add_argument("--permitir-sin-base", action="store_true",
+                        help="omitir (en vez de fallar) las escalas sin baseline")
+    parser.add_argument("--tiempo-factor", type=float, default=UMBRALES["tiempo_factor"])
+    parser.add_argument("--tiempo-minimo-ms", type=float, default=UMBRALES["tiempo_minimo_ms"])
+    parser.add_argument("--sql-factor", type=float, default=UMBRALES["sql_factor"])
+    parser.add_argument("--sql-minimo", type=int, default=UMBRALES["sql_minimo"])
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = _args(argv)
+
+    if args.reporte[0] == "guardar":
+        if len(args.reporte) != 2:
+            print("Uso: python -m benchmarks.comparar guardar reporte.json", file=sys.stderr)
+            return 2
+        for ruta in guardar(_leer(args.reporte[1]), args.baselines):
+            print(f"Baseline guardada: {ruta}")
+        return 0
+
+    umbrales = {
+        "tiempo_factor": args.tiempo_factor,
+        "tiempo_minimo_ms": args.tiempo_minimo_ms,
+        "sql_factor": args.sql_factor,
+        "sql_minimo": args.sql_minimo,
+    }
+    reporte = _leer(args.reporte[0])
+    regresiones = 0
+    sin_base = 0
+    incomparables = 0
+
+    for escala, nuevo in reporte.get("escalas", {}).items():
+        ruta = ruta_baseline(escala, args.baselines)
+        if not os.path.exists(ruta):
+            if args.permitir_sin_base:
+                print(f"\n== {escala}: sin baseline ({ruta}), se omite")
+            else:
+                print(f"\n== {escala}: sin baseline ({ruta}); guardarla o usar --permitir-sin-base")
+                sin_base += 1
+            continue
+        base = _leer(ruta)
+        print(f"\n== {escala} (baseline {base.get('fecha', '?')})")
+        incompatibles, avisos = diferencias_datos(reporte, nuevo, base)
+        if incompatibles:
+            print(f"   datos distintos a los de la baseline, no se compara: {'; '.join(incompatibles)}")
+            incomparables += 1
+            continue
+        if avisos:
+            print(f"   aviso: otra semana de anclaje ({'; '.join(avisos)}); "
+                  f"--ancla {base.get('datos', {}).get('semana_actual', '?')} repite la de la baseline")
+        if not args.solo_sql and base.get("maquina") != reporte.get("maquina"):
+            print("   aviso: la baseline es de otra máquina; considerar --solo-sql")
+
+        print(f"   {'escenario':<28} {'ms base':>10} {'ms nuevo':>10} {'SQL base':>9} {'SQL nuevo':>10}  estado")
+        for f in comparar_escala(nuevo, base, umbrales, args.solo_sql):
+            print(f"   {f['escenario']:<28} {_fmt(f['ms_base']):>10} {_fmt(f['ms_nuevo']):>10} "
+                  f"{_fmt(f['sql_base']):>9} {_fmt(f['sql_nuevo']):>10}  {f['estado']}"
+                  + (f" ({', '.join(f['motivos'])})" if f["motivos"] else ""))
+            if f["estado"] in ("REGRESION", "NO MEDIDO"):
+                regresiones += 1
+
+    print(f"\n{regresiones} regresión(es)"
+          + (f", {sin_base} escala(s) sin baseline" if sin_base else "")
+          + (f", {incomparables} escala(s) con otros datos" if incomparables else ""))
+    return 1 if regresiones or sin_base or incomparables else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
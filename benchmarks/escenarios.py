@@ -0,0 +1,152 @@
+# benchmarks/escenarios.py
+# Escenarios medidos: los caminos calientes reales de la app.
+#
+# Cada escenario recibe el contexto armado por preparar() y ejecuta una vez el
+# camino a medir. Los que pasan por HTTP usan el test client de Flask (mismo
+# hilo, así perfilador.medir() también cuenta sus sentencias SQL).
+#
+# Equipo de desarrollo PPAM
+
+from datetime import date, timedelta
+
+from extensiones import db
+from modelos import Turno
+
+
+def _login(app, user_id):
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess["_user_id"] = str(user_id)
+        sess["_fresh"] = True
+    return client
+
+
+def _get(client, url):
+    resp = client.get(url)
+    if resp.status_code != 200:
+        raise RuntimeError(f"GET {url} -> HTTP {resp.status_code}")
+    return resp
+
+
+def _payload_bulk(desde, dias):
+    turnos = (
+        Turno.query.filter(
+            Turno.punto_id == 1,
+            Turno.fecha >= desde,
+            Turno.fecha <= desde + timedelta(days=dias - 1),
+        )
+        .order_by(Turno.fecha, Turno.hora_inicio)
+        .all()
+    )
+    return {
+        "accion": "disponibles_bulk",
+        "punto_id": 1,
+        "turnos": [
+            {
+                "id": t.id,
+                "fecha": t.fecha.isoformat(),
+                "hora_inicio": t.hora_inicio.strftime("%H:%M"),
+                "hora_fin": t.hora_fin.strftime("%H:%M"),
+            }
+            for t in turnos
+        ],
+    }
+
+
+def preparar(app, datos):
+    """Contexto compartido por los escenarios de una escala."""
+    semana = date.fromisoformat(datos["semana_actual"])
+    with app.app_context():
+        payload_bulk = _payload_bulk(semana, 7)
+        # vista mensual del planificador (4 semanas desde la actual)
+        payload_bulk_mes = _payload_bulk(semana, 28)
+    return {
+        "app": app,
+        "datos": datos,
+        "semana": semana,
+        "admin": _login(app, datos["admin_id"]),
+        "publicador": _login(app, 2),
+        "payload_bulk": payload_bulk,
+        "payload_bulk_mes": payload_bulk_mes,
+    }
+
+
+# -------------------- Escenarios --------------------
+def bot_run_batch(ctx):
+    from BotAsignador import BotAsignador
+    with ctx["app"].app_context():
+        res = BotAsignador().run_batch(days_ahead=14)
+        if not res.get("ok"):
+            raise RuntimeError("run_batch no devolvió ok")
+
+
+def turnos_index(ctx):
+    _get(ctx["admin"], f"/turnos?week_start={ctx['semana'].isoformat()}")
+
+
+def turnos_index_materializar(ctx):
+    # semana posterior a los datos generados: crea todos los slots
+    _get(ctx["admin"], f"/turnos?week_start={ctx['datos']['semana_sin_turnos']}")
+
+
+def planificacion_index(ctx):
+    _get(ctx["admin"], f"/planificacion?week_start={ctx['semana'].isoformat()}")
+
+
+def _bulk(ctx, payload):
+    resp = ctx["admin"].post("/api/postulantes", json=ctx[payload])
+    if resp.status_code != 200:
+        raise RuntimeError(f"disponibles_bulk -> HTTP {resp.status_code}")
+
+
+def disponibles_bulk(ctx):
+    _bulk(ctx, "payload_bulk")
+
+
+def disponibles_bulk_mes(ctx):
+    _bulk(ctx, "payload_bulk_mes")
+
+
+def listar_disponibles(ctx):
+    t = ctx["payload_bulk"]["turnos"][0] if ctx["payload_bulk"]["turnos"] else None
+    url = "/api/postulantes?accion=listar_disponibles"
+    if t:
+        url += f"&punto_id=1&fecha={t['fecha']}&hora_inicio={t['hora_inicio']}&hora_fin={t['hora_fin']}"
+    _get(ctx["admin"], url)
+
+
+def pubview(ctx):
+    _get(ctx["publicador"], "/pubview")
+
+
+def validar_turnos(ctx):
+    from flask_app import validar_turnos as validar
+    semana = ctx["semana"]
+    with ctx["app"].app_context():
+        turnos = Turno.query.filter(
+            Turno.fecha >= semana,
+            Turno.fecha <= semana + timedelta(days=6),
+        ).all()
+        validar(turnos)
+        db.session.rollback()
+
+
+def validar_rango_mes(ctx):
+    from validador import validar_rango, Reglas
+    with ctx["app"].app_context():
+        validar_rango(ctx["semana"], ctx["semana"] + timedelta(days=27), reglas=Reglas())
+
+
+# (nombre, función, modifica la base)
+ESCENARIOS = [
+    ("bot_run_batch", bot_run_batch, True),
+    ("turnos_index", turnos_index, False),
+    ("turnos_index_materializar", turnos_index_materializar, True),
+    ("planificacion_index", planificacion_index, False),
+    ("disponibles_bulk", disponibles_bulk, False),
+    ("disponibles_bulk_mes", disponibles_bulk_mes, False),
+    ("listar_disponibles", listar_disponibles, False),
+    ("pubview", pubview, False),
+    ("validar_turnos", validar_turnos, False),
+    ("validar_rango_mes", validar_rango_mes, False),
+]
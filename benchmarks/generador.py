@@ -0,0 +1,203 @@
+# benchmarks/generador.py
+# Generador determinista de datos a escala de congregación/circuito.
+#
+# Misma semilla + misma semana ancla => exactamente los mismos datos. Las
+# fechas se arman alrededor del lunes de la semana ancla (por defecto la
+# actual) porque el bot y las vistas trabajan sobre "hoy" y la semana en curso.
+#
+# Equipo de desarrollo PPAM
+
+import random
+from datetime import date, time, timedelta
+
+from sqlalchemy import insert
+from werkzeug.security import generate_password_hash
+
+from modelos import Publicador, PuntoPredicacion, SolicitudTurno, Experiencia, Ausencia, Turno
+
+DIAS = ["lunes", "martes", "miercoles", "jueves", "viernes", "sabado", "domingo"]
+
+# publicadores, puntos y semanas de turnos (la mitad hacia atrás, la mitad hacia adelante)
+ESCALAS = {
+    "chica":   {"publicadores": 60,   "puntos": 4,  "semanas": 8},
+    "mediana": {"publicadores": 300,  "puntos": 12, "semanas": 16},
+    "grande":  {"publicadores": 1200, "puntos": 30, "semanas": 26},
+}
+
+# mezcla de frecuencias de solicitudes (valores del formulario de solicitudes)
+FRECUENCIAS = [("semanal", 60), ("1mes", 10), ("2mes", 10), ("3mes", 8), ("4mes", 8), ("5mes", 4)]
+
+# franjas horarias típicas de un punto
+FRANJAS = [(time(8, 0), time(12, 0)), (time(9, 0), time(13, 0)), (time(16, 0), time(20, 0)), (time(10, 0), time(18, 0))]
+
+LOTE = 2000
+
+
+def lunes_de(d):
+    return d - timedelta(days=d.weekday())
+
+
+def _insertar(db, modelo, filas):
+    for i in range(0, len(filas), LOTE):
+        db.session.execute(insert(modelo), filas[i:i + LOTE])
+
+
+def _slots(inicio, fin, duracion):
+    actual = inicio.hour * 60 + inicio.minute
+    limite = fin.hour * 60 + fin.minute
+    while actual + duracion <= limite:
+        yield time(actual // 60, actual % 60), time((actual + duracion) // 60, (actual + duracion) % 60)
+        actual += duracion
+
+
+def generar(db, escala, semilla=2025, ancla=None):
+    """
+    Crea las tablas y carga los datos de `escala` (clave de ESCALAS o dict).
+    Devuelve un resumen con cantidades y fechas útiles para los escenarios.
+    """
+    cfg = ESCALAS[escala] if isinstance(escala, str) else escala
+    rnd = random.Random(semilla)
+    semana_actual = lunes_de(ancla or date.today())
+    desde = semana_actual - timedelta(weeks=cfg["semanas"] // 2)
+    hasta = semana_actual + timedelta(weeks=cfg["semanas"] - cfg["semanas"] // 2) - timedelta(days=1)
+
+    db.drop_all()
+    db.create_all()
+
+    # ---------- Publicadores ----------
+    hash_comun = generate_password_hash("benchmark")
+    n_pubs = cfg["publicadores"]
+    pubs = []
+    for i in range(1, n_pubs + 1):
+        ultima = semana_actual - timedelta(days=rnd.randint(0, 200)) if rnd.random() < 0.8 else None
+        pubs.append({
+            "id": i,
+            "nombre": f"Nombre{i}",
+            "apellido": f"Apellido{i}",
+            "mail": f"pub{i}@example.org",
+            "congregacion": f"Congregación {i % 15}",
+            "circuito": f"C-{i % 4}",
+            "usuario": f"pub{i:05d}",
+            "rol": "Admin" if i == 1 else "Publicador",
+            "password_hash": hash_comun,
+            "principiante": rnd.random() < 0.1,
+            "ultima_participacion": ultima,
+        })
+    _insertar(db, Publicador, pubs)
+
+    # ---------- Puntos con horario semanal ----------
+    puntos = []
+    for i in range(1, cfg["puntos"] + 1):
+        p = {
+            "id": i,
+            "punto_nombre": f"Punto {i}",
+            "duracion_turno": rnd.choice([60, 60, 120]),
+            "fecha_inicio": None,
+            "fecha_fin": None,
+        }
+        dias_activos = set(rnd.sample(DIAS, rnd.randint(3, 7)))
+        for d in DIAS:
+            ini, fin = rnd.choice(FRANJAS) if d in dias_activos else (None, None)
+            p[f"{d}_inicio"] = ini
+            p[f"{d}_fin"] = fin
+        puntos.append(p)
+    _insertar(db, PuntoPredicacion, puntos)
+
+    # ---------- Solicitudes ----------
+    frecs = [f for f, _ in FRECUENCIAS]
+    pesos = [w for _, w in FRECUENCIAS]
+    solicitudes = []
+    for pub in pubs:
+        for _ in range(rnd.choices([0, 1, 2, 3], weights=[15, 45, 30, 10])[0]):
+            punto = rnd.choice(puntos)
+            dias_punto = [d for d in DIAS if punto[f"{d}_inicio"]]
+            dia = rnd.choice(dias_punto)
+            ini, fin = punto[f"{dia}_inicio"], punto[f"{dia}_fin"]
+            if rnd.random() < 0.5:
+                # solo una parte de la franja del punto
+                medio = time((ini.hour + fin.hour) // 2, 0)
+                ini, fin = (ini, medio) if rnd.random() < 0.5 else (medio, fin)
+            solicitudes.append({
+                "publicador_id": pub["id"],
+                "punto_id": punto["id"],
+                "dia": dia,
+                "hora_inicio": ini,
+                "hora_fin": fin,
+                "frecuencia": rnd.choices(frecs, weights=pesos)[0],
+                "prioridad": rnd.randint(1, 3),
+                "fecha_inicio": desde if rnd.random() < 0.2 else None,
+                "fecha_fin": None,
+            })
+    _insertar(db, SolicitudTurno, solicitudes)
+
+    # ---------- Ausencias ----------
+    ausencias = []
+    for pub in pubs:
+        if rnd.random() < 0.15:
+            ini = desde + timedelta(days=rnd.randint(0, (hasta - desde).days))
+            ausencias.append({
+                "publicador_id": pub["id"],
+                "fecha_inicio": ini,
+                "fecha_fin": ini + timedelta(days=rnd.randint(0, 13)),
+                "motivo": rnd.choice(["viaje", "salud", "trabajo", "otro"]),
+            })
+    _insertar(db, Ausencia, ausencias)
+
+    # ---------- Experiencias ----------
+    experiencias = [
+        {
+            "publicador_id": rnd.randint(1, n_pubs),
+            "punto_id": rnd.randint(1, len(puntos)),
+            "fecha": desde + timedelta(days=rnd.randint(0, (hasta - desde).days)),
+            "notas": f"Experiencia {i}",
+            "is_public": rnd.random() < 0.5,
+        }
+        for i in range(max(5, n_pubs // 5))
+    ]
+    _insertar(db, Experiencia, experiencias)
+
+    # ---------- Turnos ----------
+    # pasados: casi completos; futuros: con vacantes para que el bot tenga trabajo
+    turnos = []
+    ids_pubs = [p["id"] for p in pubs]
+    dia = desde
+    while dia <= hasta:
+        nombre_dia = DIAS[dia.weekday()]
+        futuro = dia >= semana_actual
+        for punto in puntos:
+            ini, fin = punto[f"{nombre_dia}_inicio"], punto[f"{nombre_dia}_fin"]
+            if not ini:
+                continue
+            for hi, hf in _slots(ini, fin, punto["duracion_turno"]):
+                llenos = rnd.randint(0, 2) if futuro else rnd.randint(2, 4)
+                elegidos = rnd.sample(ids_pubs, llenos + 1)
+                fila = {
+                    "punto_id": punto["id"],
+                    "dia": nombre_dia,
+                    "fecha": dia,
+                    "hora_inicio": hi,
+                    "hora_fin": hf,
+                    "is_public": rnd.random() < 0.3,
+                    "capitan_id": elegidos[0] if (not futuro or rnd.random() < 0.5) else None,
+                }
+                for k in range(4):
+                    fila[f"publicador{k + 1}_id"] = elegidos[k + 1] if k < llenos else None
+                turnos.append(fila)
+        dia += timedelta(days=1)
+    _insertar(db, Turno, turnos)
+
+    db.session.commit()
+
+    return {
+        "publicadores": len(pubs),
+        "puntos": len(puntos),
+        "solicitudes": len(solicitudes),
+        "ausencias": len(ausencias),
+        "experiencias": len(experiencias),
+        "turnos": len(turnos),
+        "desde": desde.isoformat(),
+        "hasta": hasta.isoformat(),
+        "semana_actual": semana_actual.isoformat(),
+        "semana_sin_turnos": (lunes_de(hasta) + timedelta(weeks=1)).isoformat(),
+        "admin_id": 1,
+    }
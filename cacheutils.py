@@ -0,0 +1,227 @@
+# cacheutils.py
+# Cachés en memoria del proceso y versión global de los datos.
+#
+# CacheLRU: diccionario con tope de entradas (descarta la usada hace más
+# tiempo) y contadores de aciertos/fallos, seguro entre hilos.
+#
+# Versión de datos: cada commit que toca Turno, Ausencia, SolicitudTurno o
+# Publicador la incrementa (eventos de sesión de SQLAlchemy). Las cachés de
+# resultados incluyen la versión en la clave, así una escritura invalida todo
+# lo anterior sin tener que saber qué entradas afecta.
+#
+# PythonAnywhere corre varios workers: además del contador local, la versión
+# se publica en un archivo (instance/version_datos) que se reemplaza en cada
+# cambio. Leer la versión es un os.stat(), sin consultar la base, y un cambio
+# hecho en otro worker se ve en la siguiente lectura.
+#
+# Uso:
+#   from cacheutils import CacheLRU, version_datos
+#   CACHE = CacheLRU("disponibles", maximo=512)
+#   valor = CACHE.obtener((version_datos(), punto_id, fecha), lambda: calcular())
+#
+#   init_version_datos(app)     # una vez, en flask_app
+#   invalidar()                 # tras SQL crudo (adminer) que el ORM no ve
+#
+#   VersionArchivo es el mismo mecanismo para otras versiones (catalogo.py
+#   la usa para el esquema).
+#
+# Equipo de desarrollo PPAM
+
+import os
+import logging
+import threading
+from collections import OrderedDict
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger("ppam.cache")
+
+_CACHES = {}            # nombre -> CacheLRU (para estadísticas)
+_FALTA = object()
+
+
+class CacheLRU:
+    """Caché con tope de entradas y descarte LRU."""
+
+    def __init__(self, nombre, maximo=256):
+        self.nombre = nombre
+        self.maximo = maximo
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.descartes = 0
+        _CACHES[nombre] = self
+
+    def get(self, clave, default=None):
+        with self._lock:
+            valor = self._datos.get(clave, _FALTA)
+            if valor is _FALTA:
+                self.fallos += 1
+                return default
+            self._datos.move_to_end(clave)
+            self.aciertos += 1
+            return valor
+
+    def set(self, clave, valor):
+        with self._lock:
+            self._datos[clave] = valor
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.maximo:
+                self._datos.popitem(last=False)
+                self.descartes += 1
+
+    def obtener(self, clave, calcular):
+        """Devuelve el valor cacheado o lo calcula (fuera del lock) y lo guarda."""
+        valor = self.get(clave, _FALTA)
+        if valor is _FALTA:
+            valor = calcular()
+            self.set(clave, valor)
+        return valor
+
+    def limpiar(self):
+        with self._lock:
+            self._datos.clear()
+
+    def __len__(self):
+        return len(self._datos)
+
+    def estadisticas(self):
+        with self._lock:
+            total = self.aciertos + self.fallos
+            return {
+                "nombre": self.nombre,
+                "entradas": len(self._datos),
+                "maximo": self.maximo,
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "descartes": self.descartes,
+                "tasa_aciertos": round(self.aciertos / total, 3) if total else None,
+            }
+
+
+def estadisticas():
+    return [c.estadisticas() for c in _CACHES.values()]
+
+
+def limpiar_todas():
+    for c in _CACHES.values():
+        c.limpiar()
+
+
+# -------------------- Versiones compartidas por archivo --------------------
+class VersionArchivo:
+    """
+    Versión de algo cacheado que puede cambiar en cualquier worker: contador
+    del proceso + firma (inodo, mtime) de un archivo que se reemplaza en cada
+    cambio. Leerla es un os.stat(), sin consultar la base.
+
+    ruta: archivo compartido; resolver: función que la devuelve la primera
+    vez que hace falta (p. ej. necesita un app context). Sin ruta la versión
+    es solo local.
+    """
+
+    def __init__(self, nombre, ruta=None, resolver=None):
+        self.nombre = nombre
+        self.ruta = ruta
+        self._resolver = resolver
+        self.local = 0
+        self._lock = threading.Lock()
+
+    def _archivo(self):
+        if self.ruta is None and self._resolver is not None:
+            self.ruta = self._resolver()
+        return self.ruta
+
+    def actual(self):
+        firma = None
+        ruta = self._archivo()
+        if ruta:
+            try:
+                st = os.stat(ruta)
+                firma = (st.st_ino, st.st_mtime_ns)
+            except OSError:
+                pass
+        return (self.local, firma)
+
+    def incrementar(self):
+        """Nueva versión en este proceso y, vía archivo, en los demás workers."""
+        with self._lock:
+            self.local += 1
+            ruta = self._archivo()
+            if not ruta:
+                return
+            tmp = f"{ruta}.{os.getpid()}.tmp"
+            try:
+                os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+                with open(tmp, "w", encoding="utf-8") as fh:
+                    fh.write(str(self.local))
+                os.replace(tmp, ruta)   # inodo nuevo: los otros workers ven el cambio
+            except OSError as e:
+                logger.warning("No se pudo publicar la versión de %s en %s: %s", self.nombre, ruta, e)
+
+
+# -------------------- Versión de datos --------------------
+TABLAS_VERSIONADAS = set()      # nombres de clase de los modelos que invalidan
+VERSION_DATOS = VersionArchivo("datos")
+
+
+def version_datos():
+    """Versión actual: contador del proceso + firma del archivo compartido."""
+    return VERSION_DATOS.actual()
+
+
+def invalidar():
+    """Incrementa la versión (este proceso y, vía archivo, los demás workers)."""
+    VERSION_DATOS.incrementar()
+
+
+def _toca_versionados(objetos):
+    return any(type(o).__name__ in TABLAS_VERSIONADAS for o in objetos)
+
+
+def _despues_flush(session, flush_context):
+    if (_toca_versionados(session.new) or _toca_versionados(session.dirty)
+            or _toca_versionados(session.deleted)):
+        session.info["ppam_datos_cambiados"] = True
+
+
+def _despues_bulk(update_context):
+    # Query.update()/delete() no pasan por el flush
+    update_context.session.info["ppam_datos_cambiados"] = True
+
+
+def _despues_commit(session):
+    # recién después del commit: antes, otro request podría cachear datos viejos
+    # con la versión nueva
+    if session.info.pop("ppam_datos_cambiados", False):
+        invalidar()
+
+
+def _despues_rollback(session):
+    session.info.pop("ppam_datos_cambiados", None)
+
+
+def init_version_datos(app, modelos=None):
+    """Engancha los eventos de sesión y fija el archivo de versión compartido."""
+    if modelos is None:
+        from modelos import Turno, Ausencia, SolicitudTurno, Publicador
+        modelos = (Turno, Ausencia, SolicitudTurno, Publicador)
+    TABLAS_VERSIONADAS.update(m.__name__ for m in modelos)
+
+    ruta = os.getenv("PPAM_VERSION_DATOS") or os.path.join(app.instance_path, "version_datos")
+    try:
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        VERSION_DATOS.ruta = ruta
+        if not os.path.exists(ruta):
+            invalidar()
+    except OSError as e:
+        logger.warning("Versión de datos solo local (%s): %s", ruta, e)
+
+    if not event.contains(Session, "after_flush", _despues_flush):
+        event.listen(Session, "after_flush", _despues_flush)
+        event.listen(Session, "after_bulk_update", _despues_bulk)
+        event.listen(Session, "after_bulk_delete", _despues_bulk)
+        event.listen(Session, "after_commit", _despues_commit)
+        event.listen(Session, "after_rollback", _despues_rollback)
@@ -0,0 +1,44 @@
+# cargas.py
+# Perfiles de carga de relaciones (eager loading) por vista.
+#
+# Cada vista declara qué relaciones va a leer y las trae en la misma consulta
+# con joinedload (todas son muchos-a-uno, así el JOIN no multiplica filas). Así
+# el costo en SQL de una vista no crece con la cantidad de filas (N+1).
+#
+# Uso:
+#   q = con_perfil(SolicitudTurno.query, "solicitud_lista")
+#
+# verificar_consultas.py controla que cada vista se mantenga dentro de su
+# presupuesto de sentencias SQL.
+#
+# Equipo de desarrollo PPAM
+
+from sqlalchemy.orm import joinedload
+
+from modelos import SolicitudTurno, Experiencia, Ausencia
+
+PERFILES = {
+    # listado de solicitudes: punto y publicador de cada fila
+    "solicitud_lista": (
+        joinedload(SolicitudTurno.punto),
+        joinedload(SolicitudTurno.publicador),
+    ),
+    # experiencias y ausencias ya son lazy="joined" en el modelo; el perfil lo
+    # deja explícito para que un cambio en modelos.py no reintroduzca el N+1
+    "experiencia_lista": (
+        joinedload(Experiencia.publicador),
+        joinedload(Experiencia.punto),
+    ),
+    "ausencia_lista": (
+        joinedload(Ausencia.publicador),
+    ),
+}
+
+
+def con_perfil(query, nombre):
+    """Aplica a `query` las opciones de carga del perfil `nombre`."""
+    try:
+        opciones = PERFILES[nombre]
+    except KeyError:
+        raise ValueError(f"Perfil de carga desconocido: {nombre}")
+    return query.options(*opciones)
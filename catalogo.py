@@ -0,0 +1,164 @@
+# catalogo.py
+# Caché del esquema de la base (tablas, columnas, índices, enums, FKs) para el
+# adminer.
+#
+# Antes cada request del adminer hacía SHOW TABLES (_validate_table) y cada
+# vista, formulario, enum o página de estructura un SHOW COLUMNS: idas y
+# vueltas al MySQL remoto por datos que solo cambian con un DDL. Acá:
+#   - tablas() se carga una vez; tabla(nombre) refleja la tabla la primera vez
+#     que se pide (en MySQL el inspector arma columnas, pk, índices y FKs de un
+#     solo SHOW CREATE TABLE) más su SHOW COLUMNS tal cual, que es lo que
+#     muestran y editan las páginas de estructura;
+#   - todo vive en una CacheLRU con la versión del esquema en la clave:
+#     invalidar_esquema() (el adminer la llama después de cada DDL) la
+#     incrementa y publica en un archivo (instance/version_esquema) con el
+#     mismo VersionArchivo de cacheutils que version_datos, así los demás
+#     workers recargan en su próximo request;
+#   - un TTL (PPAM_CATALOGO_TTL, 10 minutos) cubre los DDL hechos por fuera
+#     del adminer (migraciones, consola de MySQL).
+#
+# Uso:
+#   from catalogo import tablas, existe, tabla, describir, columnas_show, invalidar_esquema
+#   existe("turnos")                 # sin consultar la base si está cacheado
+#   tabla("turnos")["fks"]           # {"columnas", "pk", "indices", "fks", "enums", "meta"}
+#   columnas_show("turnos")          # filas estilo SHOW COLUMNS
+#   invalidar_esquema()              # tras ALTER / CREATE / DROP
+#
+# Equipo de desarrollo PPAM
+
+import os
+import re
+import time
+
+from flask import current_app, has_app_context
+from sqlalchemy import inspect, text
+
+from extensiones import db
+from cacheutils import CacheLRU, VersionArchivo
+from paginacion import esquema_de
+
+CATALOGO_TTL = int(os.getenv("PPAM_CATALOGO_TTL", "600"))     # segundos
+CACHE_CATALOGO = CacheLRU("catalogo_esquema", maximo=256)
+
+RE_DDL = re.compile(r"^\s*(ALTER|CREATE|DROP|RENAME)\b", re.I)
+
+
+# -------------------- Versión del esquema --------------------
+def _ruta_version():
+    ruta = os.getenv("PPAM_VERSION_ESQUEMA")
+    if not ruta and has_app_context():
+        ruta = os.path.join(current_app.instance_path, "version_esquema")
+    return ruta
+
+
+VERSION_ESQUEMA = VersionArchivo("esquema", resolver=_ruta_version)
+
+
+def version_esquema():
+    """Contador del proceso + firma del archivo compartido (un os.stat)."""
+    return VERSION_ESQUEMA.actual()
+
+
+def invalidar_esquema():
+    """Descarta el catálogo en este proceso y, vía archivo, en los demás workers."""
+    VERSION_ESQUEMA.incrementar()
+
+
+def es_ddl(sql):
+    return bool(RE_DDL.match(sql or ""))
+
+
+def _clave(*partes):
+    return (version_esquema(), int(time.time() // CATALOGO_TTL)) + partes
+
+
+# -------------------- Carga --------------------
+def _texto(v):
+    if isinstance(v, (bytes, bytearray)):
+        try:
+            return v.decode("utf-8")
+        except UnicodeDecodeError:
+            return v.decode("latin1", errors="replace")
+    return v
+
+
+def _cargar_tablas():
+    with db.engine.connect() as conn:
+        return tuple(inspect(conn).get_table_names())
+
+
+def _show_columns(conn, nombre, columnas, pks, indices):
+    """Filas estilo SHOW COLUMNS: las reales en MySQL, armadas desde la reflexión en otros motores."""
+    if conn.dialect.name == "mysql":
+        res = conn.execute(text(f"SHOW COLUMNS FROM `{nombre}`"))
+        return [{k: _texto(r._mapping.get(k)) for k in ("Field", "Type", "Null", "Key", "Default", "Extra")}
+                for r in res]
+    unicas = {ix["column_names"][0] for ix in indices if ix.get("unique") and len(ix["column_names"]) == 1}
+    multiples = {ix["column_names"][0] for ix in indices if ix.get("column_names")}
+    meta = []
+    for c in columnas:
+        n = c["name"]
+        key = "PRI" if n in pks else "UNI" if n in unicas else "MUL" if n in multiples else ""
+        meta.append({
+            "Field": n,
+            "Type": c["type"].compile(dialect=conn.dialect).lower(),
+            "Null": "YES" if c.get("nullable", True) else "NO",
+            "Key": key,
+            "Default": c.get("default"),
+            "Extra": "auto_increment" if c.get("autoincrement") is True else "",
+        })
+    return meta
+
+
+def _cargar_tabla(nombre):
+    with db.engine.connect() as conn:
+        insp = inspect(conn)
+        columnas = insp.get_columns(nombre)
+        pks = (insp.get_pk_constraint(nombre) or {}).get("constrained_columns") or []
+        indices = insp.get_indexes(nombre)
+        fks = insp.get_foreign_keys(nombre)
+        meta = _show_columns(conn, nombre, columnas, pks, indices)
+    return {
+        "nombre": nombre,
+        "columnas": columnas,
+        "pk": pks,
+        "indices": indices,
+        "fks": fks,
+        "enums": {c["name"]: list(c["type"].enums) for c in columnas if getattr(c["type"], "enums", None)},
+        "meta": meta,
+        "cargado": time.time(),
+    }
+
+
+# -------------------- API --------------------
+def tablas():
+    """Nombres de las tablas de la base (cacheado)."""
+    return list(CACHE_CATALOGO.obtener(_clave("tablas"), _cargar_tablas))
+
+
+def existe(nombre):
+    return nombre in CACHE_CATALOGO.obtener(_clave("tablas"), _cargar_tablas)
+
+
+def tabla(nombre):
+    """Reflexión cacheada de `nombre` (no la modifiques: es compartida)."""
+    return CACHE_CATALOGO.obtener(_clave("tabla", nombre), lambda: _cargar_tabla(nombre))
+
+
+def describir(nombre):
+    """Como paginacion.describir_tabla, pero desde la caché."""
+    t = tabla(nombre)
+    return esquema_de(t["columnas"], t["pk"], t["indices"])
+
+
+def columnas_show(nombre):
+    """Copia de las filas estilo SHOW COLUMNS de `nombre`."""
+    return [dict(m) for m in tabla(nombre)["meta"]]
+
+
+def estadisticas():
+    return {
+        "version": str(version_esquema()),
+        "ttl": CATALOGO_TTL,
+        **CACHE_CATALOGO.estadisticas(),
+    }
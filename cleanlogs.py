@@ -1,5 +1,13 @@
 #!/usr/bin/env python3
+# Rota los logs de la webapp en PythonAnywhere: el contenido actual pasa a un
+# segmento .gz (copia + truncado, el servidor mantiene el archivo abierto) y se
+# conservan los últimos registro.CONSERVAR segmentos. Antes se truncaban y se
+# perdía el historial.
 import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import registro
 
 LOG_DIR = "/var/log/ppamappcaba.pythonanywhere.com"
 
@@ -11,8 +19,9 @@ FILES = [
 for f in FILES:
     path = os.path.join(LOG_DIR, f)
     if os.path.exists(path):
-        print(f"Limpiando {path}...")
-        with open(path, "w") as log:
-            log.truncate(0)
+        print(f"Rotando {path}...")
+        segmento = registro.rotar(path, copiar_y_truncar=True)
+        if segmento:
+            print(f"  -> {segmento}")
 
-print("Logs limpiados.")
+print("Logs rotados.")
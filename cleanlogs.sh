@@ -1,12 +1,4 @@
 #!/bin/bash
-LOG_DIR="/var/log/ppamappcaba.pythonanywhere.com"
-
-echo "Limpiando logs en $LOG_DIR..."
-
-# Truncar archivo error.log
-: > "$LOG_DIR/ppamappcaba.pythonanywhere.com.error.log"
-
-# Truncar archivo server.log
-: > "$LOG_DIR/ppamappcaba.pythonanywhere.com.server.log"
-
-echo "Logs limpiados correctamente."
+# Rota (gzip + retención) en lugar de truncar: ver cleanlogs.py
+echo "Rotando logs de la webapp..."
+python3 "$(dirname "$0")/cleanlogs.py"
@@ -0,0 +1,160 @@
+# configuracion.py
+# Configuración de la app (config.json) cacheada en memoria del proceso.
+#
+# Leer: un os.stat() por llamada. Si la firma del archivo (inodo, mtime, tamaño)
+# no cambió se devuelve la configuración ya parseada; si cambió (otro worker o
+# una edición a mano) se vuelve a leer. Si el archivo no existe se usan los
+# valores por defecto sin crearlo: recién se escribe al guardar.
+#
+# Guardar: archivo temporal + os.replace (nunca queda un config.json a medio
+# escribir), serializado con un lock entre hilos y flock sobre config.json.lock
+# entre procesos. El inodo nuevo hace que los demás workers lo relean.
+#
+# Config expone los valores tipados como atributos (cfg.min_publicadores,
+# cfg.turnos_consecutivos, ...) y las Reglas del validador ya armadas.
+#
+# Uso:
+#   from configuracion import config_actual, load_config, save_config
+#   cfg = config_actual()          # Config (no modificar)
+#   cfg.min_publicadores, cfg.reglas
+#   datos = load_config()          # copia en dict, como antes
+#   save_config(datos)
+#
+# Equipo de desarrollo PPAM
+
+import os
+import json
+import logging
+import threading
+
+try:
+    import fcntl
+except ImportError:     # Windows: solo el lock entre hilos
+    fcntl = None
+
+logger = logging.getLogger("ppam.config")
+
+CONFIG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "config.json")
+
+DEFAULTS = {
+    "turnos_consecutivos": False,
+    "dos_turnos_mismo_dia": False,
+    "validar_ausencias": True,
+    "alerta_dos_turnos": "",
+    "alerta_sin_capitan": "advertencia",
+    "alerta_sin_publicadores": "advertencia",
+    "alerta_un_publicador": "alerta",
+    "min_publicadores": 2,
+}
+
+
+def _entero(valor, defecto):
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        return defecto
+
+
+class Config:
+    """Configuración parseada e inmutable por convención (se reemplaza entera al cambiar)."""
+
+    def __init__(self, datos, firma=None):
+        self.datos = datos
+        self.firma = firma
+        self.turnos_consecutivos = bool(datos.get("turnos_consecutivos", False))
+        self.dos_turnos_mismo_dia = bool(datos.get("dos_turnos_mismo_dia", False))
+        self.validar_ausencias = bool(datos.get("validar_ausencias", True))
+        self.alerta_dos_turnos = datos.get("alerta_dos_turnos") or ""
+        self.alerta_sin_capitan = datos.get("alerta_sin_capitan") or ""
+        self.alerta_sin_publicadores = datos.get("alerta_sin_publicadores") or ""
+        self.alerta_un_publicador = datos.get("alerta_un_publicador") or ""
+        self.min_publicadores = _entero(datos.get("min_publicadores"), 2)
+        self._reglas = None
+
+    @property
+    def reglas(self):
+        """Reglas del validador para esta configuración (se arman una sola vez)."""
+        if self._reglas is None:
+            from validador import Reglas
+            self._reglas = Reglas.desde_config(self.datos)
+        return self._reglas
+
+    def get(self, clave, defecto=None):
+        return self.datos.get(clave, defecto)
+
+    def como_dict(self):
+        return dict(self.datos)
+
+
+_ACTUAL = {"config": None}
+_LOCK = threading.Lock()
+
+
+def _firma(ruta):
+    try:
+        st = os.stat(ruta)
+    except OSError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+def _leer(ruta):
+    with open(ruta, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if not isinstance(data, dict):
+        raise ValueError("config.json no es un objeto")
+    # config.json viejo: se completan los campos que falten
+    return {**DEFAULTS, **data}
+
+
+def config_actual():
+    """Config vigente; relee config.json solo si cambió su firma."""
+    firma = _firma(CONFIG_FILE)
+    cfg = _ACTUAL["config"]
+    if cfg is not None and cfg.firma == firma:
+        return cfg
+
+    with _LOCK:
+        cfg = _ACTUAL["config"]
+        if cfg is not None and cfg.firma == firma:
+            return cfg
+        if firma is None:
+            cfg = Config(dict(DEFAULTS))
+        else:
+            try:
+                cfg = Config(_leer(CONFIG_FILE), firma)
+            except (OSError, ValueError) as e:
+                # se conserva la última válida (o los defaults) hasta que se corrija
+                logger.warning("No se pudo leer %s: %s", CONFIG_FILE, e)
+                previa = cfg.datos if cfg is not None else dict(DEFAULTS)
+                cfg = Config(previa, firma)
+        _ACTUAL["config"] = cfg
+        return cfg
+
+
+def load_config():
+    """Copia en dict de la configuración (se puede modificar y pasar a save_config)."""
+    return config_actual().como_dict()
+
+
+def save_config(data):
+    """Escribe config.json de forma atómica y actualiza la caché de este proceso."""
+    datos = {**DEFAULTS, **data}
+    tmp = f"{CONFIG_FILE}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with _LOCK:
+        with open(f"{CONFIG_FILE}.lock", "a") as lock_fh:
+            if fcntl is not None:
+                fcntl.flock(lock_fh, fcntl.LOCK_EX)
+            try:
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump(datos, f, indent=4)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp, CONFIG_FILE)
+            finally:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+                if fcntl is not None:
+                    fcntl.flock(lock_fh, fcntl.LOCK_UN)
+        _ACTUAL["config"] = Config(datos, _firma(CONFIG_FILE))
+    return datos
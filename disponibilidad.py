@@ -0,0 +1,362 @@
+# disponibilidad.py
+# Motor único de disponibilidad de publicadores.
+#
+# Antes cada acción de /api/postulantes (y el BotAsignador) consultaba
+# ausencias, turnos y solicitudes publicador por publicador (3 x N consultas).
+# Acá se cargan en bloque, una vez por request, para el rango de fechas
+# pedido, y se responde todo en memoria.
+#
+# Reglas (las mismas para todas las acciones):
+#   1) ausente       -> tiene una Ausencia que cubre la fecha
+#   2) ya asignado   -> ya está (publicador1..4 o capitán) en un turno de esa
+#                       fecha que se solapa con [hora_inicio, hora_fin)
+#   3) sin solicitud -> solo si se indica punto_id: no tiene una SolicitudTurno
+#                       de ese punto, vigente en la fecha, que cubra el horario
+# Cada regla se aplica solo si vienen los datos que necesita (fecha, horas).
+#
+# Uso:
+#   modelo = ModeloDisponibilidad.cargar(fecha, fecha, punto_id=3)
+#   libres = modelo.disponibles(fecha, hi, hf, punto_id=3)
+#
+#   # muchas franjas (vista semanal/mensual del planificador)
+#   matriz = MatrizDisponibilidad(modelo, punto_id=3)
+#   libres = matriz.disponibles(fecha, hi, hf)
+#
+#   disponibilidad_lote([{"turno_id": 91, "publicador_id": 7}, ...])
+#
+# Equipo de desarrollo PPAM
+
+from datetime import date
+
+from sqlalchemy import or_
+
+from extensiones import db
+from modelos import Publicador, Ausencia, Turno, SolicitudTurno
+
+AUSENTE = "ausente"
+ASIGNADO = "ya asignado"
+SIN_SOLICITUD = "no solicita ese horario"
+
+COLUMNAS_PUBLICADOR = (
+    Publicador.id, Publicador.nombre, Publicador.apellido, Publicador.usuario, Publicador.mail,
+)
+
+
+def a_minutos(t):
+    return t.hour * 60 + t.minute if t else None
+
+
+def _se_solapan(a0, a1, b0, b1):
+    return max(a0, b0) < min(a1, b1)
+
+
+class ModeloDisponibilidad:
+    """Ausencias, asignaciones y solicitudes precargadas e indexadas por publicador."""
+
+    def __init__(self, publicadores, ausencias, turnos, solicitudes):
+        self.publicadores = list(publicadores)
+
+        # publicador_id -> [(fecha_inicio, fecha_fin)]
+        self.ausencias = {}
+        for pid, ini, fin in ausencias:
+            self.ausencias.setdefault(pid, []).append((ini, fin))
+
+        # (publicador_id, fecha) -> [(hi_min, hf_min, turno_id, es_capitan)]
+        self.asignaciones = {}
+        for t in turnos:
+            for pid, es_capitan in ((t.publicador1_id, False), (t.publicador2_id, False),
+                                    (t.publicador3_id, False), (t.publicador4_id, False),
+                                    (t.capitan_id, True)):
+                if pid:
+                    self.registrar_asignacion(pid, t.fecha, t.hora_inicio, t.hora_fin, t.id, es_capitan)
+
+        # publicador_id -> [solicitud (row con punto_id, dia, fechas y horas)]
+        self.solicitudes = {}
+        for s in solicitudes:
+            self.solicitudes.setdefault(s.publicador_id, []).append(s)
+
+    # -------------------- Carga --------------------
+    @classmethod
+    def cargar(cls, desde=None, hasta=None, punto_id=None, publicador_ids=None, session=None):
+        """
+        Carga en 4 consultas todo lo necesario para evaluar fechas en [desde, hasta].
+        punto_id: limita las solicitudes a ese punto (None = todas).
+        publicador_ids: limita a esos publicadores (None = todos).
+        """
+        session = session or db.session
+        hasta = hasta or desde
+
+        q_pubs = session.query(*COLUMNAS_PUBLICADOR).order_by(Publicador.nombre, Publicador.apellido)
+        if publicador_ids is not None:
+            q_pubs = q_pubs.filter(Publicador.id.in_(publicador_ids))
+        publicadores = q_pubs.all()
+
+        ausencias, turnos = [], []
+        if desde:
+            q_aus = session.query(Ausencia.publicador_id, Ausencia.fecha_inicio, Ausencia.fecha_fin).filter(
+                Ausencia.fecha_inicio <= hasta, Ausencia.fecha_fin >= desde
+            )
+            q_tur = session.query(
+                Turno.id, Turno.fecha, Turno.hora_inicio, Turno.hora_fin,
+                Turno.publicador1_id, Turno.publicador2_id, Turno.publicador3_id,
+                Turno.publicador4_id, Turno.capitan_id,
+            ).filter(Turno.fecha >= desde, Turno.fecha <= hasta)
+            if publicador_ids is not None:
+                q_aus = q_aus.filter(Ausencia.publicador_id.in_(publicador_ids))
+                q_tur = q_tur.filter(or_(
+                    Turno.publicador1_id.in_(publicador_ids),
+                    Turno.publicador2_id.in_(publicador_ids),
+                    Turno.publicador3_id.in_(publicador_ids),
+                    Turno.publicador4_id.in_(publicador_ids),
+                    Turno.capitan_id.in_(publicador_ids),
+                ))
+            ausencias = q_aus.all()
+            turnos = q_tur.all()
+
+        q_sol = session.query(
+            SolicitudTurno.id, SolicitudTurno.publicador_id, SolicitudTurno.punto_id, SolicitudTurno.dia,
+            SolicitudTurno.fecha_inicio, SolicitudTurno.fecha_fin,
+            SolicitudTurno.hora_inicio, SolicitudTurno.hora_fin, SolicitudTurno.prioridad,
+        ).filter(SolicitudTurno.publicador_id.isnot(None))
+        if punto_id is not None:
+            q_sol = q_sol.filter(SolicitudTurno.punto_id == punto_id)
+        if publicador_ids is not None:
+            q_sol = q_sol.filter(SolicitudTurno.publicador_id.in_(publicador_ids))
+        solicitudes = q_sol.all()
+
+        return cls(publicadores, ausencias, turnos, solicitudes)
+
+    def registrar_asignacion(self, pid, fecha, hora_inicio, hora_fin, turno_id=None, es_capitan=False):
+        """Suma una asignación al modelo (el bot la llama al asignar en memoria)."""
+        self.asignaciones.setdefault((pid, fecha), []).append(
+            (a_minutos(hora_inicio), a_minutos(hora_fin), turno_id, es_capitan)
+        )
+
+    # -------------------- Reglas --------------------
+    def ausente(self, pid, fecha):
+        return any(ini <= fecha <= fin for ini, fin in self.ausencias.get(pid, ()))
+
+    def conflicto(self, pid, fecha, hora_inicio, hora_fin, incluir_capitan=True):
+        q0, q1 = a_minutos(hora_inicio), a_minutos(hora_fin)
+        for s0, s1, _, es_capitan in self.asignaciones.get((pid, fecha), ()):
+            if es_capitan and not incluir_capitan:
+                continue
+            if s0 is None or s1 is None:
+                continue
+            if _se_solapan(s0, s1, q0, q1):
+                return True
+        return False
+
+    def asignaciones_en(self, pid, fecha, incluir_capitan=True):
+        return sum(1 for a in self.asignaciones.get((pid, fecha), ()) if incluir_capitan or not a[3])
+
+    def solicitud_cubre(self, pid, punto_id, fecha, hora_inicio, hora_fin):
+        for s in self.solicitudes.get(pid, ()):
+            if s.punto_id != punto_id:
+                continue
+            if s.fecha_inicio and fecha < s.fecha_inicio:
+                continue
+            if s.fecha_fin and fecha > s.fecha_fin:
+                continue
+            if s.hora_inicio and s.hora_fin and s.hora_inicio <= hora_inicio and s.hora_fin >= hora_fin:
+                return True
+        return False
+
+    def motivo(self, pid, fecha=None, hora_inicio=None, hora_fin=None, punto_id=None):
+        """None si está disponible; si no, el motivo (AUSENTE, ASIGNADO, SIN_SOLICITUD)."""
+        if fecha and self.ausente(pid, fecha):
+            return AUSENTE
+        if fecha and hora_inicio and hora_fin:
+            if self.conflicto(pid, fecha, hora_inicio, hora_fin):
+                return ASIGNADO
+            if punto_id and not self.solicitud_cubre(pid, punto_id, fecha, hora_inicio, hora_fin):
+                return SIN_SOLICITUD
+        return None
+
+    def disponibles(self, fecha=None, hora_inicio=None, hora_fin=None, punto_id=None):
+        """Publicadores (rows id/nombre/apellido/usuario/mail) disponibles para la franja."""
+        return [
+            p for p in self.publicadores
+            if self.motivo(p.id, fecha, hora_inicio, hora_fin, punto_id) is None
+        ]
+
+
+# -------------------- Matriz de bits --------------------
+MINUTOS_BLOQUE = 15
+BLOQUES_DIA = 24 * 60 // MINUTOS_BLOQUE
+
+
+def _bloques(m0, m1):
+    """Bloques de 15' que toca el intervalo [m0, m1) en minutos."""
+    return range(m0 // MINUTOS_BLOQUE, min(-(-m1 // MINUTOS_BLOQUE), BLOQUES_DIA))
+
+
+def _alineado(m):
+    return m is not None and m % MINUTOS_BLOQUE == 0
+
+
+class MatrizDisponibilidad:
+    """
+    Disponibilidad como bitsets para evaluar muchas franjas de un punto.
+
+    Cada publicador del modelo es un bit (en el orden de modelo.publicadores).
+    Por fecha se arma, en bloques de 15 minutos:
+      ausentes       -> bits de quienes tienen ausencia ese día
+      ocupado[b]     -> bits de quienes ya tienen un turno que toca el bloque b
+      cubre[b]       -> bits de quienes tienen una solicitud del punto, vigente
+                        ese día, que cubre el bloque b completo
+      revisar        -> bits que no se pueden resolver con bloques (horarios no
+                        múltiplos de 15' o solicitudes que se tocan entre sí);
+                        esos se evalúan con el modelo, regla por regla
+
+    Una franja [hi, hf) se resuelve con OR/AND de enteros sobre sus bloques
+    (operaciones de a 64 bits en C), sin recorrer publicadores. Las fechas se
+    arman la primera vez que se consultan.
+    """
+
+    def __init__(self, modelo, punto_id=None):
+        self.modelo = modelo
+        self.punto_id = punto_id
+        self.todos = (1 << len(modelo.publicadores)) - 1
+        self._bit = {p.id: 1 << i for i, p in enumerate(modelo.publicadores)}
+        self._fechas = {}
+        # fecha -> [(publicador_id, asignaciones)]
+        self._asignaciones = {}
+        for (pid, f), asignaciones in modelo.asignaciones.items():
+            self._asignaciones.setdefault(f, []).append((pid, asignaciones))
+
+    def _armar(self, fecha):
+        m = self.modelo
+        bit = self._bit
+        ausentes = revisar = 0
+        ocupado = [0] * BLOQUES_DIA
+        cubre = [0] * BLOQUES_DIA
+
+        for pid, b in bit.items():
+            if m.ausente(pid, fecha):
+                ausentes |= b
+
+        for pid, asignaciones in self._asignaciones.get(fecha, ()):
+            b = bit.get(pid)
+            if b is None:
+                continue
+            for s0, s1, _, _ in asignaciones:
+                if s0 is None or s1 is None:
+                    continue
+                if not (_alineado(s0) and _alineado(s1)):
+                    revisar |= b
+                for k in _bloques(s0, s1):
+                    ocupado[k] |= b
+
+        if self.punto_id:
+            for pid, solicitudes in m.solicitudes.items():
+                b = bit.get(pid)
+                if b is None:
+                    continue
+                intervalos = sorted(
+                    (a_minutos(s.hora_inicio), a_minutos(s.hora_fin))
+                    for s in solicitudes
+                    if s.punto_id == self.punto_id and s.hora_inicio and s.hora_fin
+                    and not (s.fecha_inicio and fecha < s.fecha_inicio)
+                    and not (s.fecha_fin and fecha > s.fecha_fin)
+                )
+                # dos solicitudes contiguas (8-9 y 9-10) cubrirían 8-10 por bloques,
+                # pero la regla pide que una sola cubra la franja
+                for (a0, a1), (b0, _) in zip(intervalos, intervalos[1:]):
+                    if b0 <= a1:
+                        revisar |= b
+                        break
+                for s0, s1 in intervalos:
+                    if not (_alineado(s0) and _alineado(s1)):
+                        revisar |= b
+                        continue
+                    for k in range(s0 // MINUTOS_BLOQUE, s1 // MINUTOS_BLOQUE):
+                        cubre[k] |= b
+
+        return ausentes, ocupado, cubre, revisar
+
+    def _publicadores(self, bits):
+        pubs = self.modelo.publicadores
+        out = []
+        while bits:
+            bajo = bits & -bits
+            out.append(pubs[bajo.bit_length() - 1])
+            bits ^= bajo
+        return out
+
+    def disponibles(self, fecha=None, hora_inicio=None, hora_fin=None):
+        """Igual que modelo.disponibles(fecha, hi, hf, punto_id) para el punto de la matriz."""
+        q0, q1 = a_minutos(hora_inicio), a_minutos(hora_fin)
+        if not fecha or q0 is None or q1 is None or q0 >= q1 or not (_alineado(q0) and _alineado(q1)):
+            return self.modelo.disponibles(fecha, hora_inicio, hora_fin, self.punto_id)
+
+        if fecha not in self._fechas:
+            self._fechas[fecha] = self._armar(fecha)
+        ausentes, ocupado, cubre, revisar = self._fechas[fecha]
+
+        k0, k1 = q0 // MINUTOS_BLOQUE, q1 // MINUTOS_BLOQUE
+        libres = self.todos & ~ausentes
+        candidatos_revisar = libres & revisar
+        for k in range(k0, k1):
+            libres &= ~ocupado[k]
+            if self.punto_id:
+                libres &= cubre[k]
+
+        libres &= ~revisar
+        for p in self._publicadores(candidatos_revisar):
+            if self.modelo.motivo(p.id, fecha, hora_inicio, hora_fin, self.punto_id) is None:
+                libres |= self._bit[p.id]
+        return self._publicadores(libres)
+
+
+# -------------------- API de lote --------------------
+def disponibilidad_lote(pares, session=None):
+    """
+    Evalúa muchos pares (turno, publicador) en una sola carga.
+
+    pares: [{"publicador_id": 7, "turno_id": 91}, ...] o, sin turno,
+           [{"publicador_id": 7, "fecha": date, "hora_inicio": time, "hora_fin": time, "punto_id": 3}, ...]
+    Devuelve la misma lista con "ok" y "motivo" agregados.
+
+    La carga se limita a los publicadores pedidos: el costo depende de la
+    cantidad de pares, no de cuántos publicadores tiene la congregación.
+    """
+    session = session or db.session
+    pares = [dict(p) for p in pares]
+
+    turno_ids = {int(p["turno_id"]) for p in pares if p.get("turno_id") and not p.get("fecha")}
+    if turno_ids:
+        filas = session.query(
+            Turno.id, Turno.fecha, Turno.hora_inicio, Turno.hora_fin, Turno.punto_id
+        ).filter(Turno.id.in_(turno_ids)).all()
+        por_id = {f.id: f for f in filas}
+        for p in pares:
+            f = por_id.get(int(p["turno_id"])) if p.get("turno_id") and not p.get("fecha") else None
+            if f:
+                p.setdefault("punto_id", f.punto_id)
+                p["fecha"], p["hora_inicio"], p["hora_fin"] = f.fecha, f.hora_inicio, f.hora_fin
+
+    fechas = [p["fecha"] for p in pares if isinstance(p.get("fecha"), date)]
+    pids = {int(p["publicador_id"]) for p in pares if p.get("publicador_id")}
+    if not pids:
+        return [dict(p, ok=False, motivo="publicador_id faltante") for p in pares]
+
+    modelo = ModeloDisponibilidad.cargar(
+        min(fechas) if fechas else None,
+        max(fechas) if fechas else None,
+        publicador_ids=pids,
+        session=session,
+    )
+    existentes = {p.id for p in modelo.publicadores}
+
+    salida = []
+    for p in pares:
+        pid = int(p["publicador_id"]) if p.get("publicador_id") else None
+        if pid not in existentes:
+            motivo = "publicador inexistente"
+        elif p.get("turno_id") and not p.get("fecha"):
+            motivo = "turno inexistente"
+        else:
+            motivo = modelo.motivo(pid, p.get("fecha"), p.get("hora_inicio"), p.get("hora_fin"), p.get("punto_id"))
+        salida.append(dict(p, ok=motivo is None, motivo=motivo))
+    return salida
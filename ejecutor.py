@@ -0,0 +1,160 @@
+# ejecutor.py
+# Ejecutor de tareas diferidas: pocos hilos fijos y una cola acotada.
+#
+# Reemplaza el "un threading.Thread por mensaje que duerme y después trabaja"
+# del PPAM-BOT. Acá:
+#   - un hilo planificador guarda las tareas en un heap por hora de ejecución
+#     (la demora de "escribiendo..." no ocupa ningún hilo);
+#   - al vencer pasan a una cola acotada que atienden `trabajadores` hilos;
+#   - las tareas llevan una clave (el usuario): si ya hay una pendiente con la
+#     misma clave se reemplazan sus argumentos en lugar de encolar otra, así
+#     una ráfaga de mensajes produce una sola respuesta;
+#   - si la cola está llena la tarea se descarta y se cuenta.
+#
+# Los hilos arrancan con la primera tarea (y de nuevo si el proceso es un
+# fork: los hilos no sobreviven al fork de los workers).
+#
+# Uso:
+#   EJECUTOR = EjecutorProgramado("bot", trabajadores=2, max_cola=50)
+#   EJECUTOR.programar("ana", 1.2, responder, "ana", "hola")
+#   EJECUTOR.estadisticas()    # en cola, programadas, activas, procesadas, ...
+#
+# Equipo de desarrollo PPAM
+
+import os
+import time
+import heapq
+import queue
+import logging
+import itertools
+import threading
+
+logger = logging.getLogger("ppam.ejecutor")
+
+_EJECUTORES = {}        # nombre -> EjecutorProgramado (para estadísticas)
+
+
+class _Tarea:
+    __slots__ = ("clave", "cuando", "funcion", "args", "iniciada")
+
+    def __init__(self, clave, cuando, funcion, args):
+        self.clave = clave
+        self.cuando = cuando
+        self.funcion = funcion
+        self.args = args
+        self.iniciada = False
+
+
+class EjecutorProgramado:
+    """Pool fijo de hilos con tareas programadas, coalescidas por clave."""
+
+    def __init__(self, nombre, trabajadores=2, max_cola=50):
+        self.nombre = nombre
+        self.trabajadores = trabajadores
+        self.max_cola = max_cola
+        self._cond = threading.Condition()
+        self._heap = []                 # (cuando, secuencia, tarea)
+        self._secuencia = itertools.count()
+        self._pendientes = {}           # clave -> _Tarea todavía no iniciada
+        self._cola = queue.Queue(maxsize=max_cola)
+        self._pid = None
+        self.activas = 0
+        self.procesadas = 0
+        self.coalescidas = 0
+        self.descartadas = 0
+        self.errores = 0
+        self.max_en_cola = 0
+        _EJECUTORES[nombre] = self
+
+    # -------------------- hilos --------------------
+    def _asegurar_hilos(self):
+        if self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        threading.Thread(target=self._planificador, name=f"{self.nombre}-planificador", daemon=True).start()
+        for i in range(self.trabajadores):
+            threading.Thread(target=self._trabajador, name=f"{self.nombre}-{i}", daemon=True).start()
+
+    def _planificador(self):
+        while True:
+            with self._cond:
+                while not self._heap:
+                    self._cond.wait()
+                cuando, _, tarea = self._heap[0]
+                falta = cuando - time.monotonic()
+                if falta > 0:
+                    self._cond.wait(falta)
+                    continue
+                heapq.heappop(self._heap)
+            try:
+                self._cola.put_nowait(tarea)
+            except queue.Full:
+                with self._cond:
+                    self._pendientes.pop(tarea.clave, None)
+                    self.descartadas += 1
+                logger.warning("Ejecutor %s: cola llena, tarea %r descartada", self.nombre, tarea.clave)
+                continue
+            with self._cond:
+                self.max_en_cola = max(self.max_en_cola, self._cola.qsize())
+
+    def _trabajador(self):
+        while True:
+            tarea = self._cola.get()
+            with self._cond:
+                # desde acá ya no se coalescen mensajes nuevos en esta tarea
+                tarea.iniciada = True
+                if self._pendientes.get(tarea.clave) is tarea:
+                    del self._pendientes[tarea.clave]
+                funcion, args = tarea.funcion, tarea.args
+                self.activas += 1
+            try:
+                funcion(*args)
+            except Exception:
+                logger.exception("Ejecutor %s: error en tarea %r", self.nombre, tarea.clave)
+                with self._cond:
+                    self.errores += 1
+            finally:
+                with self._cond:
+                    self.activas -= 1
+                    self.procesadas += 1
+                self._cola.task_done()
+
+    # -------------------- API --------------------
+    def programar(self, clave, demora, funcion, *args):
+        """
+        Ejecuta funcion(*args) dentro de `demora` segundos. Si ya hay una tarea
+        pendiente con la misma clave, se le cambian la función y los argumentos
+        (conserva su horario) y devuelve False; si no, la programa y devuelve True.
+        """
+        with self._cond:
+            self._asegurar_hilos()
+            previa = self._pendientes.get(clave)
+            if previa is not None and not previa.iniciada:
+                previa.funcion, previa.args = funcion, args
+                self.coalescidas += 1
+                return False
+            tarea = _Tarea(clave, time.monotonic() + max(0.0, demora), funcion, args)
+            self._pendientes[clave] = tarea
+            heapq.heappush(self._heap, (tarea.cuando, next(self._secuencia), tarea))
+            self._cond.notify()
+            return True
+
+    def estadisticas(self):
+        with self._cond:
+            return {
+                "nombre": self.nombre,
+                "trabajadores": self.trabajadores,
+                "programadas": len(self._heap),
+                "en_cola": self._cola.qsize(),
+                "max_cola": self.max_cola,
+                "max_en_cola": self.max_en_cola,
+                "activas": self.activas,
+                "procesadas": self.procesadas,
+                "coalescidas": self.coalescidas,
+                "descartadas": self.descartadas,
+                "errores": self.errores,
+            }
+
+
+def estadisticas():
+    return [e.estadisticas() for e in _EJECUTORES.values()]
@@ -0,0 +1,142 @@
+# exportacion.py
+# Exportación en streaming de tablas completas (CSV / JSON / NDJSON, con gzip
+# opcional) para el adminer.
+#
+# Antes el export hacía model.query.all(), armaba todo el CSV en un StringIO,
+# lo copiaba a un BytesIO y recién ahí lo mandaba: varias veces el tamaño de
+# la tabla en RAM, y solo andaba con tablas que tienen modelo ORM. Acá:
+#   - se lee con un cursor del lado del servidor (stream_results, en MySQL un
+#     SSCursor) trayendo `tanda` filas por vez, sin objetos ORM;
+#   - cada tanda se serializa y se entrega al response enseguida: la memoria
+#     no depende del tamaño de la tabla;
+#   - gzip=True comprime de a pedazos con zlib (formato gzip, wbits=31).
+# Sirve para cualquier tabla: las columnas salen de paginacion.describir_tabla
+# (o del esquema ya cacheado que pase el llamador).
+#
+# La conexión queda abierta mientras dura la descarga y se cierra al terminar
+# (o si el cliente corta), por eso se abre dentro del generador.
+#
+# Uso:
+#   gen = exportar(db.engine, "turnos", "ndjson", gzip=True)
+#   return Response(stream_with_context(gen), mimetype=MIMETYPES["ndjson"])
+#
+# Equipo de desarrollo PPAM
+
+import io
+import csv
+import json
+import zlib
+from datetime import date, datetime, time
+
+from sqlalchemy import select, table, column
+
+from paginacion import describir_tabla
+
+FORMATOS = ("csv", "json", "ndjson")
+MIMETYPES = {
+    "csv": "text/csv",
+    "json": "application/json",
+    "ndjson": "application/x-ndjson",
+    "gz": "application/gzip",
+}
+TANDA = 1000
+
+
+def _valor(v):
+    if isinstance(v, (bytes, bytearray)):
+        try:
+            return v.decode("utf-8")
+        except UnicodeDecodeError:
+            return v.decode("latin1", errors="replace")
+    return v
+
+
+def _a_json(v):
+    if isinstance(v, (date, datetime, time)):
+        return v.isoformat()
+    return str(v)       # Decimal, timedelta (TIME de MySQL), ...
+
+
+def filas_tabla(conn, tabla, columnas=None, tanda=TANDA, esquema=None):
+    """
+    (columnas, resultado) de `tabla` ordenada por pk, leída con cursor del
+    lado del servidor de a `tanda` filas. `columnas` limita las exportadas;
+    `esquema` (de describir_tabla) evita reflejar la tabla de nuevo.
+    """
+    esquema = esquema or describir_tabla(conn, tabla)
+    todas = [nombre for nombre, _ in esquema["columnas"]]
+    cols = [c for c in (columnas or []) if c in todas] or todas
+    t = table(tabla, *[column(c) for c in todas])
+    q = select(*[t.c[c] for c in cols]).select_from(t)
+    if esquema["pk"]:
+        q = q.order_by(t.c[esquema["pk"]])
+    res = conn.execution_options(stream_results=True, yield_per=tanda).execute(q)
+    return cols, res
+
+
+def _csv(columnas, filas, tanda):
+    buf = io.StringIO()
+    w = csv.writer(buf)
+    w.writerow(columnas)
+    for n, fila in enumerate(filas, 1):
+        w.writerow([_valor(v) for v in fila])
+        if n % tanda == 0:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    yield buf.getvalue()
+
+
+def _dumps(columnas, fila):
+    return json.dumps(dict(zip(columnas, (_valor(v) for v in fila))),
+                      default=_a_json, ensure_ascii=False, separators=(",", ":"))
+
+
+def _ndjson(columnas, filas, tanda):
+    buf = []
+    for fila in filas:
+        buf.append(_dumps(columnas, fila) + "\n")
+        if len(buf) >= tanda:
+            yield "".join(buf)
+            buf = []
+    yield "".join(buf)
+
+
+def _json(columnas, filas, tanda):
+    buf = ["["]
+    primero = True
+    for fila in filas:
+        buf.append(("" if primero else ",") + _dumps(columnas, fila))
+        primero = False
+        if len(buf) >= tanda:
+            yield "".join(buf)
+            buf = []
+    buf.append("]")
+    yield "".join(buf)
+
+
+_GENERADORES = {"csv": _csv, "json": _json, "ndjson": _ndjson}
+
+
+def _gzip(partes, nivel=6):
+    z = zlib.compressobj(nivel, zlib.DEFLATED, 31)     # 31 = cabecera gzip
+    for p in partes:
+        datos = z.compress(p)
+        if datos:
+            yield datos
+    yield z.flush()
+
+
+def exportar(engine, tabla, fmt="csv", columnas=None, gzip=False, tanda=TANDA, esquema=None):
+    """Generador de bytes con `tabla` en `fmt` (ver FORMATOS), comprimido si gzip."""
+    if fmt not in FORMATOS:
+        raise ValueError(f"fmt debe ser uno de {FORMATOS}")
+
+    def partes():
+        with engine.connect() as conn:
+            cols, filas = filas_tabla(conn, tabla, columnas, tanda, esquema)
+            for texto in _GENERADORES[fmt](cols, filas, tanda):
+                if texto:
+                    yield texto.encode("utf-8")
+
+    return _gzip(partes()) if gzip else partes()
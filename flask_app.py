@@ -22,7 +22,13 @@ from modelos import (
 from werkzeug.security import generate_password_hash, check_password_hash
 from dotenv import load_dotenv
 from datetime import datetime, timedelta, date, time
-from sqlalchemy import func
+from sqlalchemy import func, select, union_all
+from paginacion import leer_parametros, paginar, headers_paginacion
+from cargas import con_perfil
+from perfilador import init_perfilador
+from cacheutils import init_version_datos
+from grillas import init_grillas, grilla_semana
+from validador import validar
 # from turnos import api
 from turnos import bp_turnos
 from postulantes import bp_post
@@ -74,7 +80,8 @@ if __name__ == "__main__":
 # app.config['FILEBROWSER_ROOT'] = '/home/ppamappcaba/mysite'
 app.config["DEBUG"] = True
 app.config["SECRET_KEY"] = SECRET_KEY
-app.config["SQLALCHEMY_DATABASE_URI"] = (
+# PPAM_DATABASE_URI permite apuntar a otra base (ej. SQLite en verificar_consultas.py)
+app.config["SQLALCHEMY_DATABASE_URI"] = os.getenv("PPAM_DATABASE_URI") or (
     f"mysql+mysqlconnector://{NOMBRE_CUENTA}:{PASSWORD_DB}"
     f"@{NOMBRE_CUENTA}.mysql.pythonanywhere-services.com/{NOMBRE_CUENTA}${INSTANCIA}"
 )
@@ -83,6 +90,9 @@ app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
     "pool_pre_ping": True,
 }
 db.init_app(app)
+init_perfilador(app)
+init_version_datos(app)
+init_grillas(app)
 login_manager.init_app(app)
 login_manager.login_view = "login"
 login_manager.login_message_category = "info"
@@ -102,6 +112,12 @@ def load_user(user_id):
 def time_to_str(t):
     return t.strftime("%H:%M") if t else ""
 
+def pagina_html(modelo, perfil=None):
+    """Página (keyset por id) del listado principal de las vistas ABM."""
+    limite, cursor, con_total = leer_parametros(default=100)
+    q = con_perfil(modelo.query, perfil) if perfil else modelo.query
+    return paginar(q, [modelo.id], cursor, limite, con_total)
+
 
 
 # -------------------------------------------
@@ -247,8 +263,8 @@ def handle_exception(e):
 def publicadores_index():
     if current_user.rol != 'Admin':
         abort(403, description="No tenés permisos para acceder a esta función.")
-    publicadores = Publicador.query.all()
-    return render_template("publicadores.html", publicadores=publicadores, publicador=None)
+    pagina = pagina_html(Publicador)
+    return render_template("publicadores.html", publicadores=pagina["items"], publicador=None, pagina=pagina)
 
 
 @app.route("/publicadores/guardar", methods=["POST"])
@@ -318,8 +334,8 @@ def publicadores_editar(id):
     if current_user.rol != 'Admin':
         abort(403, description="No tenés permisos para acceder a esta función.")
     publicador = Publicador.query.get_or_404(id)
-    publicadores = Publicador.query.all()
-    return render_template("publicadores.html", publicadores=publicadores, publicador=publicador)
+    pagina = pagina_html(Publicador)
+    return render_template("publicadores.html", publicadores=pagina["items"], publicador=publicador, pagina=pagina)
 
 
 @app.route("/publicadores/eliminar/<int:id>")
@@ -450,15 +466,16 @@ def puntos_eliminar(id):
 def solicitudes_index():
     if current_user.rol != 'Admin':
         abort(403, description="No tenés permisos para acceder a esta función.")
-    solicitudes = SolicitudTurno.query.all()
+    pagina = pagina_html(SolicitudTurno, "solicitud_lista")
     publicadores = Publicador.query.all()
     puntos = PuntoPredicacion.query.all()
     return render_template(
         "solicitudes.html",
-        solicitudes=solicitudes,
+        solicitudes=pagina["items"],
         solicitud=None,
         publicadores=publicadores,
         puntos=puntos,
+        pagina=pagina,
     )
 
 @app.route("/solicitudes/guardar", methods=["POST"])
@@ -520,11 +537,12 @@ def solicitudes_editar(id):
     if current_user.rol != 'Admin':
         abort(403, description="No tenés permisos para acceder a esta función.")
     solicitud = SolicitudTurno.query.get_or_404(id)
-    solicitudes = SolicitudTurno.query.all()
+    pagina = pagina_html(SolicitudTurno, "solicitud_lista")
     publicadores = Publicador.query.all()
     puntos = PuntoPredicacion.query.all()
     return render_template(
-        "solicitudes.html", solicitudes=solicitudes, solicitud=solicitud, publicadores=publicadores, puntos=puntos
+        "solicitudes.html", solicitudes=pagina["items"], solicitud=solicitud, publicadores=publicadores, puntos=puntos,
+        pagina=pagina
     )
 
 
@@ -545,10 +563,12 @@ def solicitudes_eliminar(id):
 # -------------------------
 @app.route("/api/solicitudez", methods=["GET"])
 def api_listar_solicitudes():
-    solicitudes = SolicitudTurno.query.all()
+    limite, cursor, con_total = leer_parametros(sin_limite=True)
+    q = con_perfil(SolicitudTurno.query, "solicitud_lista")
+    pagina = paginar(q, [SolicitudTurno.id], cursor, limite, con_total)
 
     data = []
-    for s in solicitudes:
+    for s in pagina["items"]:
         data.append({
             "id": s.id,
             "punto": s.punto.punto_nombre if s.punto else "",
@@ -558,7 +578,9 @@ def api_listar_solicitudes():
             "estado": "Activa"
         })
 
-    return jsonify(data)
+    resp = jsonify(data)
+    resp.headers.update(headers_paginacion(pagina))
+    return resp
 
 
 # -------------------------
@@ -651,16 +673,17 @@ def date_to_str(d):
 def experiencias_index():
     if current_user.rol != 'Admin':
         abort(403, description="No tenés permisos para acceder a esta función.")
-    experiencias = Experiencia.query.all()
+    pagina = pagina_html(Experiencia, "experiencia_lista")
     publicadores = Publicador.query.all()
     puntos = PuntoPredicacion.query.all()
     return render_template(
         "experiencias.html",
-        experiencias=experiencias,
+        experiencias=pagina["items"],
         publicadores=publicadores,
         puntos=puntos,
         experiencia=None,
         date_to_str=date_to_str,
+        pagina=pagina,
     )
 
 @app.route("/experiencias/guardar", methods=["POST"])
@@ -699,16 +722,17 @@ def experiencias_guardar():
 
     db.session.commit()
 
-    experiencias = Experiencia.query.all()
+    pagina = pagina_html(Experiencia, "experiencia_lista")
     publicadores = Publicador.query.all()
     puntos = PuntoPredicacion.query.all()
     return render_template(
         "experiencias.html",
-        experiencias=experiencias,
+        experiencias=pagina["items"],
         publicadores=publicadores,
         puntos=puntos,
         experiencia=exp,
         date_to_str=date_to_str,
+        pagina=pagina,
     )
 
 @app.route("/experiencias/editar/<int:id>")
@@ -717,16 +741,17 @@ def experiencias_editar(id):
     if current_user.rol != 'Admin':
         abort(403, description="No tenés permisos para acceder a esta función.")
     exp = Experiencia.query.get_or_404(id)
-    experiencias = Experiencia.query.all()
+    pagina = pagina_html(Experiencia, "experiencia_lista")
     publicadores = Publicador.query.all()
     puntos = PuntoPredicacion.query.all()
     return render_template(
         "experiencias.html",
-        experiencias=experiencias,
+        experiencias=pagina["items"],
         publicadores=publicadores,
         puntos=puntos,
         experiencia=exp,
         date_to_str=date_to_str,
+        pagina=pagina,
     )
 
 @app.route("/experiencias/eliminar/<int:id>")
@@ -750,9 +775,9 @@ def experiencias_eliminar(id):
 def ausencias_index():
     if current_user.rol != 'Admin':
         abort(403, description="No tenés permisos para acceder a esta función.")
-    ausencias = Ausencia.query.all()
+    pagina = pagina_html(Ausencia, "ausencia_lista")
     publicadores = Publicador.query.all()
-    return render_template("ausencias.html", ausencias=ausencias, publicadores=publicadores, ausencia=None)
+    return render_template("ausencias.html", ausencias=pagina["items"], publicadores=publicadores, ausencia=None, pagina=pagina)
 
 
 @app.route("/ausencias/guardar", methods=["POST"])
@@ -794,9 +819,9 @@ def ausencias_editar(id):
     if current_user.rol != 'Admin':
         abort(403, description="No tenés permisos para acceder a esta función.")
     ausencia = Ausencia.query.get_or_404(id)
-    ausencias = Ausencia.query.all()
+    pagina = pagina_html(Ausencia, "ausencia_lista")
     publicadores = Publicador.query.all()
-    return render_template("ausencias.html", ausencias=ausencias, publicadores=publicadores, ausencia=ausencia)
+    return render_template("ausencias.html", ausencias=pagina["items"], publicadores=publicadores, ausencia=ausencia, pagina=pagina)
 
 
 @app.route("/ausencias/eliminar/<int:id>")
@@ -814,45 +839,8 @@ def ausencias_eliminar(id):
 
 #----------------------CONFIGURACION---------------------------------------------------------------------------------
 
-CONFIG_FILE = os.path.join(os.path.dirname(__file__), "config.json")
-
-def load_config():
-    if not os.path.exists(CONFIG_FILE):
-        default = {
-            "turnos_consecutivos": False,
-            "dos_turnos_mismo_dia": False,
-            "validar_ausencias": True,
-            # Nuevos campos de alertas
-            "alerta_dos_turnos": "",
-            "alerta_sin_capitan": "advertencia",
-            "alerta_sin_publicadores": "advertencia",
-            "alerta_un_publicador": "alerta",
-            "min_publicadores": 2
-        }
-        with open(CONFIG_FILE, "w") as f:
-            json.dump(default, f, indent=4)
-        return default
-
-    with open(CONFIG_FILE, "r") as f:
-        data = json.load(f)
-
-    # Aseguramos que existan todos los campos nuevos aunque el config.json sea viejo
-    defaults = {
-        "alerta_dos_turnos": "",
-        "alerta_sin_capitan": "advertencia",
-        "alerta_sin_publicadores": "advertencia",
-        "alerta_un_publicador": "alerta",
-        "min_publicadores": 2
-    }
-    for k, v in defaults.items():
-        if k not in data:
-            data[k] = v
-
-    return data
-
-def save_config(data):
-    with open(CONFIG_FILE, "w") as f:
-        json.dump(data, f, indent=4)
+# config.json cacheado por proceso (ver configuracion.py)
+from configuracion import CONFIG_FILE, config_actual, load_config, save_config
 
 
 # ------------------------------
@@ -909,7 +897,7 @@ def api_config_list():
     if current_user.rol != "Admin":
         return jsonify({"ok": False, "error": "Sin permisos"}), 403
 
-    cfg = load_config()
+    cfg = config_actual().datos
     configuraciones = []
 
     # convertimos el dict en lista de objetos (idéntico a tu frontend)
@@ -990,7 +978,7 @@ def turnos_index():
 
     if current_user.rol != 'Admin':
         abort(403, description="No tenés permisos para acceder a esta función.")
-    config = load_config()
+    config = config_actual().datos
     puntos = PuntoPredicacion.query.all()
     publicadores = Publicador.query.all()
     turnos = {}
@@ -1007,6 +995,15 @@ def turnos_index():
 
     dias = ["lunes", "martes", "miercoles", "jueves", "viernes", "sabado", "domingo"]
 
+    # Turnos de la semana desde la grilla precalculada (grillas.py)
+    grilla = grilla_semana(week_start, [p.id for p in puntos])
+    existentes = {
+        (punto_id, t["fecha"], t["hora_inicio"]): t
+        for punto_id, lista in grilla.items()
+        for t in lista
+    }
+    nuevos = []
+
     for punto in puntos:
         turnos[punto.id] = {}
 
@@ -1032,15 +1029,10 @@ def turnos_index():
             end_time = datetime.combine(fecha_dia, hora_fin)
 
             while current < end_time:
-                turno = Turno.query.filter_by(
-                    punto_id=punto.id,
-                    dia=dia,
-                    hora_inicio=current.time(),
-                    fecha=fecha_dia
-                ).first()
+                turno = existentes.get((punto.id, fecha_dia, current.time()))
 
                 if not turno:
-                    # Crear turno y guardar en DB
+                    # Crear turno (se guardan todos juntos al final)
                     turno = Turno(
                         punto_id=punto.id,
                         dia=dia,
@@ -1049,9 +1041,19 @@ def turnos_index():
                         hora_fin=(current + timedelta(minutes=duracion)).time()
                     )
                     db.session.add(turno)
-                    db.session.commit()
+                    nuevos.append(turno)
+
+                turnos[punto.id][dia].append(turno)
+                current += timedelta(minutes=duracion)
 
-                turno_dict = {
+    if nuevos:
+        db.session.flush()  # asigna ids; el commit va al final para no expirar puntos/publicadores
+
+    # los de la grilla ya son dicts; los recién creados se pasan a dict
+    for por_dia in turnos.values():
+        for dia, lista in por_dia.items():
+            por_dia[dia] = [
+                turno if isinstance(turno, dict) else {
                     "id": turno.id,
                     "dia": turno.dia,
                     "fecha": turno.fecha,
@@ -1063,9 +1065,8 @@ def turnos_index():
                     "publicador4_id": turno.publicador4_id,
                     "capitan_id": turno.capitan_id
                 }
-
-                turnos[punto.id][dia].append(turno_dict)
-                current += timedelta(minutes=duracion)
+                for turno in lista
+            ]
 
     # URLs para semana anterior y siguiente
     prev_week = week_start - timedelta(days=7)
@@ -1074,7 +1075,7 @@ def turnos_index():
     prev_week_url = url_for('turnos_index', week_start=prev_week.strftime('%Y-%m-%d'))
     next_week_url = url_for('turnos_index', week_start=next_week.strftime('%Y-%m-%d'))
 
-    return render_template(
+    html = render_template(
         "turnos.html",
         config=config,
         puntos=puntos,
@@ -1087,6 +1088,9 @@ def turnos_index():
         prev_week_url=prev_week_url,
         next_week_url=next_week_url
     )
+    if nuevos:
+        db.session.commit()
+    return html
 
 
 @app.route("/turnos/guardar", methods=["POST"])
@@ -1155,104 +1159,13 @@ def turnos_guardar():
 
 def validar_turnos(turnos):
     """
-    Valida los turnos según reglas de configuración.
+    Valida los turnos según reglas de configuración (motor en validador.py).
     Devuelve tres valores:
       - errores: lista de mensajes críticos
       - advertencias: lista de mensajes leves
       - marcados: diccionario con IDs de publicadores afectados
     """
-    from datetime import time
-
-    config = load_config() or {}
-    errores = []
-    advertencias = []
-    marcados = {"error": set(), "advertencia": set()}  # 👈 para colorear en HTML
-
-    turnos_por_pub = {}
-
-    for t in turnos:
-        dia = t.dia
-        publicadores = [
-            t.publicador1_id,
-            t.publicador2_id,
-            t.publicador3_id,
-            t.publicador4_id,
-        ]
-        llenos = [p for p in publicadores if p]
-
-        # === 1. Validar capitán ===
-        if not t.capitan_id:
-            modo = config.get("turno_sin_capitan", "advertencia")
-            msg = f"Turno {t.id} sin capitán"
-            if modo == "alerta":
-                errores.append(msg)
-                marcados["error"].update(llenos)
-            elif modo == "advertencia":
-                advertencias.append(msg)
-                marcados["advertencia"].update(llenos)
-
-        # === 2. Validar cantidad de publicadores ===
-        if len(llenos) == 0:
-            modo = config.get("turno_sin_publicadores", "advertencia")
-            msg = f"Turno {t.id} sin publicadores"
-            if modo == "alerta":
-                errores.append(msg)
-            elif modo == "advertencia":
-                advertencias.append(msg)
-
-        elif len(llenos) == 1:
-            modo = config.get("turno_un_publicador", "advertencia")
-            msg = f"Turno {t.id} con un solo publicador"
-            if modo == "alerta":
-                errores.append(msg)
-                marcados["error"].update(llenos)
-            elif modo == "advertencia":
-                advertencias.append(msg)
-                marcados["advertencia"].update(llenos)
-
-        # === 3. Validar cantidad mínima ===
-        min_pub = int(config.get("cantidad_minima_por_turno", 2))
-        if len(llenos) < min_pub:
-            errores.append(f"Turno {t.id} no cumple la cantidad mínima ({len(llenos)}/{min_pub})")
-            marcados["error"].update(llenos)
-        elif len(llenos) == min_pub:
-            advertencias.append(f"Turno {t.id} justo con la cantidad mínima de publicadores")
-            marcados["advertencia"].update(llenos)
-
-        # === 4. Registrar turnos para validar más adelante ===
-        for p in llenos:
-            turnos_por_pub.setdefault(p, {}).setdefault(dia, []).append(t)
-
-    # === 5. Validar solapamientos y cantidad de turnos por día ===
-    for pub, dias in turnos_por_pub.items():
-        for dia, lista in dias.items():
-            t_list = sorted(lista, key=lambda x: x.hora_inicio or time(0, 0))
-            for i in range(len(t_list) - 1):
-                t_actual = t_list[i]
-                t_siguiente = t_list[i + 1]
-
-                # Solapamiento o consecutivo
-                if t_siguiente.hora_inicio <= t_actual.hora_fin:
-                    if not config.get("turnos_consecutivos", False):
-                        errores.append(f"Publicador {pub} tiene turnos consecutivos o solapados el {dia}")
-                        marcados["error"].add(pub)
-
-            # Cantidad máxima por día
-            cant = len(t_list)
-            permitir_dos = config.get("dos_turnos_mismo_dia", False)
-
-            if not permitir_dos and cant > 1:
-                errores.append(f"Publicador {pub} tiene más de un turno el {dia}")
-                marcados["error"].add(pub)
-            elif permitir_dos:
-                if cant > 2:
-                    errores.append(f"Publicador {pub} tiene más de 2 turnos el {dia}")
-                    marcados["error"].add(pub)
-                elif cant == 2:
-                    advertencias.append(f"Publicador {pub} tiene 2 turnos el {dia} (advertencia)")
-                    marcados["advertencia"].add(pub)
-
-    return errores, advertencias, marcados
+    return validar(turnos, config_actual().reglas).como_tupla()
 
 
 
@@ -1383,48 +1296,29 @@ def planificacion_index():
     # Estructura final: { punto_id: { dia: [turno_dicts...] } }
     turnos_by_punto = {}
 
-    # Traer todos los turnos de la semana para optimizar
-    all_turnos = Turno.query.filter(Turno.fecha >= week_start, Turno.fecha <= week_end).all()
-    for t in all_turnos:   # ya lo tenés
-        for pid in [t.capitan_id, t.publicador1_id, t.publicador2_id, t.publicador3_id, t.publicador4_id]:
-            if pid:
-                turno_count[pid] += 1
+    # Turnos de la semana desde la grilla precalculada (grillas.py), ya ordenados
+    grilla = grilla_semana(week_start, [p.id for p in puntos])
+    for lista in grilla.values():
+        for t in lista:
+            for pid in [t["capitan_id"], t["publicador1_id"], t["publicador2_id"], t["publicador3_id"], t["publicador4_id"]]:
+                if pid:
+                    turno_count[pid] = turno_count.get(pid, 0) + 1
     # hoy
     hoy = date.today()            
     # Agrupar por punto y por dia
     for punto in puntos:
         turnos_by_punto[punto.id] = {}
-        # filtrar turnos de este punto
-        t_punto = [t for t in all_turnos if t.punto_id == punto.id]
         for dia in dias:
-            lista_dia = [t for t in t_punto if t.dia == dia]
-            if not lista_dia:
+            turnos_list = [t for t in grilla[punto.id] if t["dia"] == dia]
+            if not turnos_list:
                 continue
-            # ordenar por hora_inicio
-            lista_dia.sort(key=lambda x: (x.fecha or date.min, x.hora_inicio or datetime.min.time()))
-            turnos_list = []
-            for t in lista_dia:
-                # construir dict con nombres al lado
-                d = {
-                    "id": t.id,
-                    "dia": t.dia,
-                    "fecha": t.fecha,
-                    "hora_inicio": t.hora_inicio,
-                    "hora_fin": t.hora_fin,
-                    "capitan_id": t.capitan_id,
-                    "publicador1_id": t.publicador1_id,
-                    "publicador2_id": t.publicador2_id,
-                    "publicador3_id": t.publicador3_id,
-                    "publicador4_id": t.publicador4_id,
-                    "is_public": bool(t.is_public)
-                }
-                # nombres (si no existe el id, queda cadena vacía)
-                d["capitan_nombre"] = pub_map.get(t.capitan_id, "")
-                d["publicador1_nombre"] = pub_map.get(t.publicador1_id, "")
-                d["publicador2_nombre"] = pub_map.get(t.publicador2_id, "")
-                d["publicador3_nombre"] = pub_map.get(t.publicador3_id, "")
-                d["publicador4_nombre"] = pub_map.get(t.publicador4_id, "")
-                turnos_list.append(d)
+            for d in turnos_list:
+                # nombres al lado (si no existe el id, queda cadena vacía)
+                d["capitan_nombre"] = pub_map.get(d["capitan_id"], "")
+                d["publicador1_nombre"] = pub_map.get(d["publicador1_id"], "")
+                d["publicador2_nombre"] = pub_map.get(d["publicador2_id"], "")
+                d["publicador3_nombre"] = pub_map.get(d["publicador3_id"], "")
+                d["publicador4_nombre"] = pub_map.get(d["publicador4_id"], "")
             turnos_by_punto[punto.id][dia] = turnos_list
 
     # URLs para semana anterior y siguiente
@@ -1434,48 +1328,22 @@ def planificacion_index():
     next_week_url = url_for("planificacion_index", week_start=next_week.strftime("%Y-%m-%d"))
     
     
-    turnos_semana = Turno.query.filter(
-    Turno.fecha >= week_start,
-    Turno.fecha <= week_end
-    ).all()
-
-    turnos_por_publicador = {}
-
-    for t in turnos_semana:
-        for pid in [
-            t.publicador1_id,
-            t.publicador2_id,
-            t.publicador3_id,
-            t.publicador4_id,
-            t.capitan_id,
-        ]:
-            if pid:
-                turnos_por_publicador.setdefault(pid, 0)
-                turnos_por_publicador[pid] += 1
-        
-        
-    ultimos_turnos = db.session.query(
-        Turno.publicador1_id.label("pid"),
-        Turno.fecha
-    ).filter(Turno.publicador1_id != None)
-
-    # repetir para publicador2/3/4/capitan si querés exacto
-
-    # o alternativa rápida:
-    ultima_participacion = {}
-    for t in Turno.query.order_by(Turno.fecha.desc()).all():
-        for pid in [
-            t.publicador1_id, t.publicador2_id,
-            t.publicador3_id, t.publicador4_id,
-            t.capitan_id
-        ]:
-            if pid and pid not in ultima_participacion:
-                ultima_participacion[pid] = t.fecha
+    # última fecha con turno de cada publicador (en cualquier rol), agregada en
+    # la base en vez de recorrer toda la tabla turnos
+    participaciones = union_all(*[
+        select(col.label("pid"), Turno.fecha).where(col.isnot(None))
+        for col in (Turno.publicador1_id, Turno.publicador2_id, Turno.publicador3_id,
+                    Turno.publicador4_id, Turno.capitan_id)
+    ]).subquery()
+    ultima_participacion = dict(
+        db.session.query(participaciones.c.pid, func.max(participaciones.c.fecha))
+        .group_by(participaciones.c.pid)
+        .all()
+    )
 
 
     pub_info = {}
     for p in publicadores:
-        cant = turnos_por_publicador.get(p.id, 0)
         fecha_ultima = ultima_participacion.get(p.id)
         semanas = None
 
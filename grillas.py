@@ -0,0 +1,396 @@
+# grillas.py
+# Grillas semanales precalculadas (snapshot por semana y punto).
+#
+# /turnos, /planificacion y /api/planificacion/ arman la grilla semanal de
+# turnos. Acá cada (lunes, punto) se guarda ya armado en un blob compacto
+# (msgpack si está instalado, si no JSON) y se sirve sin tocar la tabla turnos.
+#
+# Invalidación:
+#   - cada (semana, punto) tiene un archivo marca; un commit que crea, cambia
+#     o borra turnos de esa semana/punto reemplaza la marca (os.replace)
+#   - una marca global cubre lo que afecta a todas las grillas (cambios en
+#     puntos, SQL crudo del adminer)
+#   - el blob guarda las firmas (inodo, mtime) de las marcas leídas ANTES de
+#     consultar la base; si no coinciden con las actuales, se regenera
+#   Las marcas son archivos, así que un commit en un worker invalida la grilla
+#   en todos los workers.
+#
+# Sin PPAM_GRILLAS_DIR hay un directorio por base en instance/grillas/; los de
+# otras bases que no se tocan hace DIAS_VIGENCIA días se borran al arrancar.
+#
+# Después del commit, las grillas afectadas se regeneran en un único hilo de
+# fondo por proceso que junta las claves pendientes (PPAM_GRILLAS_FONDO=0 lo
+# desactiva); si alguien las pide antes, se arman en el momento.
+#
+# Uso:
+#   init_grillas(app)                               # una vez, en flask_app
+#   grilla = grilla_semana(week_start, [p.id for p in puntos])
+#   grilla[punto_id] -> [{"id", "dia", "fecha", "hora_inicio", ..., "is_public"}]
+#
+# Equipo de desarrollo PPAM
+
+import os
+import json
+import hashlib
+import shutil
+import logging
+import threading
+import time as _time
+from datetime import date, time, timedelta
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+try:
+    import msgpack  # opcional: serialización binaria más compacta
+except ImportError:
+    msgpack = None
+
+from extensiones import db
+from modelos import Turno, PuntoPredicacion, Publicador
+from cacheutils import CacheLRU, version_datos
+
+logger = logging.getLogger("ppam.grillas")
+
+FORMATO = 1
+EXTENSION = ".msgpack" if msgpack is not None else ".json"
+# directorios de grillas de otras bases sin uso por más de estos días se borran
+DIAS_VIGENCIA = int(os.getenv("PPAM_GRILLAS_VIGENCIA_DIAS", "7"))
+
+# (lunes, punto_id, firma) -> lista de turnos ya decodificada
+CACHE_GRILLAS = CacheLRU("grillas_semanales", maximo=512)
+
+# versión de datos -> {publicador_id: (nombre, apellido)}
+CACHE_NOMBRES = CacheLRU("nombres_publicadores", maximo=4)
+
+_ESTADO = {"app": None, "dir": None, "fondo": True}
+
+# regeneración en segundo plano: un solo hilo por proceso que toma de una vez
+# todas las claves pendientes (una ráfaga de commits se junta en una pasada)
+_FONDO = {"pendientes": set(), "pid": None}
+_LOCK_FONDO = threading.Lock()
+_HAY_PENDIENTES = threading.Event()
+
+# orden de las columnas dentro del blob
+COLUMNAS = (
+    "id", "dia", "fecha", "hora_inicio", "hora_fin",
+    "publicador1_id", "publicador2_id", "publicador3_id", "publicador4_id",
+    "capitan_id", "is_public",
+)
+
+
+def lunes_de(d):
+    return d - timedelta(days=d.weekday())
+
+
+# -------------------- Marcas --------------------
+def _ruta(nombre):
+    return os.path.join(_ESTADO["dir"], nombre)
+
+
+def _marca_nombre(lunes, punto_id):
+    return f"{lunes.isoformat()}_{punto_id}.marca"
+
+
+def _tocar(nombre):
+    ruta = _ruta(nombre)
+    tmp = f"{ruta}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8"):
+            pass
+        os.replace(tmp, ruta)   # inodo nuevo: cambia la firma
+    except OSError as e:
+        logger.warning("No se pudo actualizar la marca %s: %s", ruta, e)
+
+
+def _firma(nombre):
+    ruta = _ruta(nombre)
+    try:
+        st = os.stat(ruta)
+    except FileNotFoundError:
+        # sin marca todavía: se crea, así la firma nunca queda vacía
+        _tocar(nombre)
+        try:
+            st = os.stat(ruta)
+        except OSError:
+            return None
+    except OSError:
+        return None
+    return [st.st_ino, st.st_mtime_ns]
+
+
+def _firma_grilla(lunes, punto_id, todas=None):
+    return [todas or _firma("todas.marca"), _firma(_marca_nombre(lunes, punto_id))]
+
+
+def invalidar(claves):
+    """Marca como viejas las grillas [(lunes, punto_id)] y las regenera en segundo plano."""
+    if not _ESTADO["dir"] or not claves:
+        return
+    for lunes, punto_id in claves:
+        _tocar(_marca_nombre(lunes, punto_id))
+    if _ESTADO["fondo"] and _ESTADO["app"] is not None:
+        _encolar(claves)
+
+
+def invalidar_todas():
+    if _ESTADO["dir"]:
+        _tocar("todas.marca")
+
+
+def vaciar():
+    """Borra todas las grillas y marcas guardadas (benchmarks, cambio de base)."""
+    CACHE_GRILLAS.limpiar()
+    if not _ESTADO["dir"]:
+        return
+    for nombre in os.listdir(_ESTADO["dir"]):
+        try:
+            os.remove(_ruta(nombre))
+        except OSError:
+            pass
+
+
+# -------------------- Blob --------------------
+def _a_fila(t, lunes):
+    return [
+        t.id, t.dia, (t.fecha - lunes).days,
+        t.hora_inicio.hour * 60 + t.hora_inicio.minute,
+        t.hora_fin.hour * 60 + t.hora_fin.minute,
+        t.publicador1_id, t.publicador2_id, t.publicador3_id, t.publicador4_id,
+        t.capitan_id, bool(t.is_public),
+    ]
+
+
+def _de_fila(f, lunes):
+    d = dict(zip(COLUMNAS, f))
+    d["fecha"] = lunes + timedelta(days=d["fecha"])
+    d["hora_inicio"] = time(d["hora_inicio"] // 60, d["hora_inicio"] % 60)
+    d["hora_fin"] = time(d["hora_fin"] // 60, d["hora_fin"] % 60)
+    return d
+
+
+def _serializar(obj):
+    if msgpack is not None:
+        return msgpack.packb(obj, use_bin_type=True)
+    return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+
+def _deserializar(blob):
+    if msgpack is not None:
+        return msgpack.unpackb(blob, raw=False)
+    return json.loads(blob.decode("utf-8"))
+
+
+def _guardar(lunes, punto_id, firma, filas):
+    ruta = _ruta(f"{lunes.isoformat()}_{punto_id}{EXTENSION}")
+    tmp = f"{ruta}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp, "wb") as fh:
+            fh.write(_serializar({"formato": FORMATO, "firma": firma, "turnos": filas}))
+        os.replace(tmp, ruta)
+    except OSError as e:
+        logger.warning("No se pudo guardar la grilla %s: %s", ruta, e)
+
+
+def _leer(lunes, punto_id, firma):
+    ruta = _ruta(f"{lunes.isoformat()}_{punto_id}{EXTENSION}")
+    try:
+        with open(ruta, "rb") as fh:
+            datos = _deserializar(fh.read())
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning("Grilla ilegible %s: %s", ruta, e)
+        return None
+    if datos.get("formato") != FORMATO or datos.get("firma") != firma:
+        return None
+    return datos["turnos"]
+
+
+# -------------------- Armado --------------------
+def _construir(lunes, punto_ids, firmas):
+    """Arma las grillas pedidas con una sola consulta y las guarda."""
+    filas = {pid: [] for pid in punto_ids}
+    q = (
+        db.session.query(*(getattr(Turno, c) for c in COLUMNAS), Turno.punto_id)
+        .filter(
+            Turno.fecha >= lunes,
+            Turno.fecha <= lunes + timedelta(days=6),
+            Turno.punto_id.in_(punto_ids),
+        )
+        .order_by(Turno.fecha, Turno.hora_inicio, Turno.id)
+    )
+    for t in q:
+        filas[t.punto_id].append(_a_fila(t, lunes))
+    if _ESTADO["dir"]:
+        for pid in punto_ids:
+            _guardar(lunes, pid, firmas[pid], filas[pid])
+    return filas
+
+
+def _grilla_lunes(lunes, punto_ids):
+    if not _ESTADO["dir"]:
+        crudas = _construir(lunes, punto_ids, {})
+        return {pid: [_de_fila(f, lunes) for f in filas] for pid, filas in crudas.items()}
+
+    salida, faltan, firmas = {}, [], {}
+    todas = _firma("todas.marca")
+    for pid in punto_ids:
+        firma = _firma_grilla(lunes, pid, todas)
+        firmas[pid] = firma
+        clave = (lunes, pid, json.dumps(firma))
+        turnos = CACHE_GRILLAS.get(clave)
+        if turnos is None:
+            filas = _leer(lunes, pid, firma)
+            if filas is None:
+                faltan.append(pid)
+                continue
+            turnos = [_de_fila(f, lunes) for f in filas]
+            CACHE_GRILLAS.set(clave, turnos)
+        salida[pid] = turnos
+
+    if faltan:
+        for pid, filas in _construir(lunes, faltan, firmas).items():
+            turnos = [_de_fila(f, lunes) for f in filas]
+            CACHE_GRILLAS.set((lunes, pid, json.dumps(firmas[pid])), turnos)
+            salida[pid] = turnos
+    return salida
+
+
+def grilla_semana(desde, punto_ids):
+    """
+    {punto_id: [turnos de [desde, desde + 6] ordenados por fecha y hora]}.
+    Lo que no está guardado (o quedó viejo) se arma en una sola consulta.
+    Si desde no es lunes se combinan las dos semanas que toca.
+    """
+    punto_ids = list(punto_ids)
+    hasta = desde + timedelta(days=6)
+    semanas = [_grilla_lunes(lunes, punto_ids) for lunes in sorted({lunes_de(desde), lunes_de(hasta)})]
+    # copias superficiales: las vistas agregan claves (nombres) a cada turno
+    return {
+        pid: [dict(t) for g in semanas for t in g[pid] if desde <= t["fecha"] <= hasta]
+        for pid in punto_ids
+    }
+
+
+def nombres_publicadores():
+    """{id: (nombre, apellido)} para mostrar junto a la grilla (se renueva con la versión de datos)."""
+    return CACHE_NOMBRES.obtener(version_datos(), lambda: {
+        p.id: (p.nombre, p.apellido)
+        for p in db.session.query(Publicador.id, Publicador.nombre, Publicador.apellido)
+    })
+
+
+def _encolar(claves):
+    with _LOCK_FONDO:
+        _FONDO["pendientes"].update(claves)
+        if _FONDO["pid"] != os.getpid():
+            # primera vez en este proceso (o después de un fork)
+            _FONDO["pid"] = os.getpid()
+            threading.Thread(target=_ciclo_fondo, name="ppam-grillas", daemon=True).start()
+    _HAY_PENDIENTES.set()
+
+
+def _ciclo_fondo():
+    while True:
+        _HAY_PENDIENTES.wait()
+        with _LOCK_FONDO:
+            _HAY_PENDIENTES.clear()
+            claves, _FONDO["pendientes"] = _FONDO["pendientes"], set()
+        if claves:
+            _regenerar(sorted(claves))
+
+
+def _regenerar(claves):
+    app = _ESTADO["app"]
+    por_semana = {}
+    for lunes, pid in claves:
+        por_semana.setdefault(lunes, []).append(pid)
+    try:
+        with app.app_context():
+            for lunes, pids in por_semana.items():
+                _construir(lunes, pids, {pid: _firma_grilla(lunes, pid) for pid in pids})
+            db.session.remove()
+    except Exception:
+        logger.exception("Error regenerando grillas %s", claves)
+
+
+# -------------------- Eventos de sesión --------------------
+def _claves_turno(t, claves):
+    estado = inspect(t)
+    fechas = {t.fecha} | set(estado.attrs.fecha.history.deleted or ())
+    puntos = {t.punto_id} | set(estado.attrs.punto_id.history.deleted or ())
+    for f in fechas:
+        for pid in puntos:
+            if isinstance(f, date) and pid:
+                claves.add((lunes_de(f), pid))
+
+
+def _despues_flush(session, flush_context):
+    claves = session.info.setdefault("ppam_grillas", set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Turno):
+            _claves_turno(obj, claves)
+        elif isinstance(obj, PuntoPredicacion):
+            session.info["ppam_grillas_todas"] = True
+
+
+def _despues_bulk(update_context):
+    # Query.update()/delete() no dicen qué filas tocaron: se invalida todo
+    update_context.session.info["ppam_grillas_todas"] = True
+
+
+def _despues_commit(session):
+    claves = session.info.pop("ppam_grillas", None)
+    if session.info.pop("ppam_grillas_todas", False):
+        invalidar_todas()
+    if claves:
+        invalidar(claves)
+
+
+def _despues_rollback(session):
+    session.info.pop("ppam_grillas", None)
+    session.info.pop("ppam_grillas_todas", None)
+
+
+def _podar(raiz, actual):
+    """Borra los directorios de otras bases que no se tocan hace más de DIAS_VIGENCIA."""
+    limite = _time.time() - DIAS_VIGENCIA * 86400
+    try:
+        nombres = os.listdir(raiz)
+    except OSError:
+        return
+    for nombre in nombres:
+        ruta = os.path.join(raiz, nombre)
+        try:
+            if ruta != actual and os.path.isdir(ruta) and os.stat(ruta).st_mtime < limite:
+                shutil.rmtree(ruta)
+                logger.info("Grillas viejas borradas: %s", ruta)
+        except OSError as e:
+            logger.warning("No se pudo borrar %s: %s", ruta, e)
+
+
+def init_grillas(app):
+    """Fija el directorio de grillas y engancha los eventos de sesión."""
+    directorio = os.getenv("PPAM_GRILLAS_DIR")
+    if not directorio:
+        # un directorio por base: otra PPAM_DATABASE_URI no reutiliza grillas
+        # ajenas; los de bases que ya no se usan se borran solos
+        uri = app.config.get("SQLALCHEMY_DATABASE_URI") or ""
+        raiz = os.path.join(app.instance_path, "grillas")
+        directorio = os.path.join(raiz, hashlib.sha1(uri.encode()).hexdigest()[:10])
+        _podar(raiz, directorio)
+    try:
+        os.makedirs(directorio, exist_ok=True)
+        _ESTADO["dir"] = directorio
+    except OSError as e:
+        logger.warning("Grillas sin almacenamiento (%s): %s", directorio, e)
+    _ESTADO["app"] = app
+    _ESTADO["fondo"] = os.getenv("PPAM_GRILLAS_FONDO", "1") != "0"
+
+    if not event.contains(Session, "after_flush", _despues_flush):
+        event.listen(Session, "after_flush", _despues_flush)
+        event.listen(Session, "after_bulk_update", _despues_bulk)
+        event.listen(Session, "after_bulk_delete", _despues_bulk)
+        event.listen(Session, "after_commit", _despues_commit)
+        event.listen(Session, "after_rollback", _despues_rollback)
@@ -0,0 +1,297 @@
+# importacion.py
+# Importación masiva de CSV / NDJSON (gzip opcional) a una tabla, para el adminer.
+#
+# Hasta ahora la única forma de cargar datos era new_record: una fila por POST.
+# Acá el archivo subido se lee de a líneas (nunca entero en memoria) y:
+#   - cada registro se valida contra las columnas reales de la tabla
+#     (reflexión: tipo, NOT NULL sin default, largo de VARCHAR, valores de
+#     ENUM) y se convierte al tipo de python de la columna;
+#   - las filas válidas se insertan con executemany de a `tanda` (PyMySQL lo
+#     convierte en un INSERT multi-fila) y se confirma cada `por_transaccion`
+#     filas: un error deshace solo el bloque en curso;
+#   - modo "insertar" (INSERT), "ignorar" (INSERT IGNORE / ON CONFLICT DO
+#     NOTHING; las filas descartadas no cuentan como escritas) o "actualizar"
+#     (ON DUPLICATE KEY UPDATE / ON CONFLICT DO UPDATE sobre `clave`, por
+#     defecto la pk);
+#   - simular=True valida todo el archivo sin escribir nada;
+#   - importar() es un generador de dicts de progreso (uno por transacción
+#     confirmada, el último con fin=True y el resumen), para mandarlos en
+#     streaming al navegador sin estado compartido entre workers.
+# Las filas con error se cuentan y se informan (las primeras MAX_ERRORES); con
+# saltar_errores=False la importación se corta en la primera.
+#
+# Uso:
+#   for p in importar(db.engine, "publicadores", archivo, "csv", modo="actualizar"):
+#       print(p)     # {"leidas", "escritas", "errores", ...}
+#
+# Equipo de desarrollo PPAM
+
+import csv
+import gzip
+import json
+import codecs
+import time as _time
+from decimal import Decimal, InvalidOperation
+from datetime import date, datetime, time
+
+from sqlalchemy import inspect, insert, table, column
+
+FORMATOS = ("csv", "ndjson")
+MODOS = ("insertar", "ignorar", "actualizar")
+TANDA = 500
+POR_TRANSACCION = 5000
+MAX_ERRORES = 50
+
+_VERDADERO = ("1", "true", "t", "si", "sí", "on", "yes")
+_FALSO = ("0", "false", "f", "no", "off")
+
+
+# -------------------- lectura --------------------
+def leer_registros(archivo, fmt):
+    """
+    (línea, registro, error) de un archivo binario abierto, de a una línea.
+    fmt: "csv", "ndjson", o con ".gz" al final si viene comprimido.
+    """
+    if fmt.endswith(".gz"):
+        archivo = gzip.GzipFile(fileobj=archivo)
+        fmt = fmt[:-3]
+    texto = codecs.getreader("utf-8-sig")(archivo)
+    if fmt == "csv":
+        lector = csv.DictReader(texto)
+        for fila in lector:
+            if None in fila:
+                yield lector.line_num, None, "más campos que columnas en el encabezado"
+            else:
+                yield lector.line_num, fila, None
+        return
+    for n, linea in enumerate(texto, 1):
+        if not linea.strip():
+            continue
+        try:
+            registro = json.loads(linea)
+        except ValueError as e:
+            yield n, None, f"JSON inválido: {e}"
+            continue
+        if not isinstance(registro, dict):
+            yield n, None, "se esperaba un objeto JSON"
+        else:
+            yield n, registro, None
+
+
+# -------------------- validación --------------------
+def _python_type(tipo):
+    try:
+        return tipo.python_type
+    except NotImplementedError:
+        return None
+
+
+def _convertir(valor, col):
+    """Valor del archivo -> valor para la columna. ValueError si no corresponde."""
+    tipo = _python_type(col["type"])
+    if isinstance(valor, str) and valor == "" and (tipo is not str or col["nullable"]):
+        valor = None
+    if valor is None:
+        if not col["nullable"] and col["default"] is None and not col["auto"]:
+            raise ValueError("no puede ser NULL")
+        return None
+    if tipo is bool or (tipo is int and isinstance(valor, bool)):
+        if isinstance(valor, bool):
+            return valor
+        s = str(valor).strip().lower()
+        if s in _VERDADERO:
+            return True
+        if s in _FALSO:
+            return False
+        raise ValueError(f"booleano inválido: {valor!r}")
+    if tipo is int:
+        if isinstance(valor, float) and not valor.is_integer():
+            raise ValueError(f"entero inválido: {valor!r}")
+        return int(valor)
+    if tipo is float:
+        return float(valor)
+    if tipo is Decimal:
+        try:
+            return Decimal(str(valor))
+        except InvalidOperation:
+            raise ValueError(f"número inválido: {valor!r}")
+    if tipo is datetime:
+        return datetime.fromisoformat(str(valor))
+    if tipo is date:
+        return date.fromisoformat(str(valor)[:10])
+    if tipo is time:
+        return time.fromisoformat(str(valor))
+    if tipo is str:
+        valor = str(valor)
+        enums = getattr(col["type"], "enums", None)
+        if enums and valor not in enums:
+            raise ValueError(f"{valor!r} no es uno de {list(enums)}")
+        largo = getattr(col["type"], "length", None)
+        if largo and len(valor) > largo:
+            raise ValueError(f"más de {largo} caracteres")
+    return valor
+
+
+def _columnas(conn, tabla, reflexion=None):
+    if reflexion is None:
+        insp = inspect(conn)
+        reflexion = {"columnas": insp.get_columns(tabla),
+                     "pk": (insp.get_pk_constraint(tabla) or {}).get("constrained_columns") or []}
+    pks = reflexion["pk"]
+    cols = {}
+    for c in reflexion["columnas"]:
+        # MySQL informa autoincrement True/False; sin dato ("auto") vale la regla de
+        # SQLAlchemy: pk entera de una sola columna
+        auto = c.get("autoincrement", "auto")
+        auto = c["name"] in pks and len(pks) == 1 and (
+            auto is True or (auto == "auto" and _python_type(c["type"]) is int))
+        cols[c["name"]] = {"type": c["type"], "nullable": c.get("nullable", True),
+                           "default": c.get("default"), "auto": auto}
+    return cols, pks
+
+
+def _validar(registro, cols):
+    desconocidas = [k for k in registro if k not in cols]
+    if desconocidas:
+        raise ValueError(f"columnas desconocidas: {', '.join(map(str, desconocidas))}")
+    fila = {}
+    for k, v in registro.items():
+        try:
+            fila[k] = _convertir(v, cols[k])
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"{k}: {e}")
+    return fila
+
+
+def _faltantes(nombres, cols):
+    """Columnas NOT NULL sin default que no vienen en el archivo."""
+    return [n for n, c in cols.items()
+            if n not in nombres and not c["nullable"] and c["default"] is None and not c["auto"]]
+
+
+# -------------------- escritura --------------------
+def _sentencia(conn, t, modo, clave, nombres):
+    if modo == "insertar":
+        return insert(t)
+    dialecto = conn.dialect.name
+    cambiar = [c for c in nombres if c not in clave]
+    if dialecto == "mysql":
+        from sqlalchemy.dialects.mysql import insert as insert_mysql
+        st = insert_mysql(t)
+        if modo == "ignorar" or not cambiar:
+            return st.prefix_with("IGNORE")
+        return st.on_duplicate_key_update({c: st.inserted[c] for c in cambiar})
+    if dialecto in ("sqlite", "postgresql"):
+        if dialecto == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as insert_dialecto
+        else:
+            from sqlalchemy.dialects.postgresql import insert as insert_dialecto
+        st = insert_dialecto(t)
+        if modo == "ignorar" or not cambiar:
+            return st.on_conflict_do_nothing(index_elements=clave)
+        return st.on_conflict_do_update(index_elements=clave, set_={c: st.excluded[c] for c in cambiar})
+    raise ValueError(f"modo {modo!r} no soportado en {dialecto}")
+
+
+def importar(engine, tabla, archivo, fmt, modo="insertar", clave=None, saltar_errores=False,
+             simular=False, tanda=TANDA, por_transaccion=POR_TRANSACCION, reflexion=None):
+    """
+    Importa `archivo` (binario) en `tabla`. `reflexion` ({"columnas", "pk"},
+    p. ej. de catalogo.tabla) evita reflejar la tabla. Generador de dicts de progreso:
+    {"leidas", "escritas", "errores", "segundos"} cada `por_transaccion`
+    registros leídos (después de confirmar) y al final lo mismo con fin=True,
+    ok, el detalle de errores y, si se cortó, el motivo.
+    """
+    if fmt.removesuffix(".gz") not in FORMATOS:
+        raise ValueError(f"fmt debe ser uno de {FORMATOS} (con .gz opcional)")
+    if modo not in MODOS:
+        raise ValueError(f"modo debe ser uno de {MODOS}")
+
+    inicio = _time.monotonic()
+    estado = {"leidas": 0, "escritas": 0, "errores": 0}
+    detalle = []
+
+    def progreso(**extra):
+        return {**estado, "segundos": round(_time.monotonic() - inicio, 2), **extra}
+
+    with engine.connect() as conn:
+        cols, pks = _columnas(conn, tabla, reflexion)
+        clave = list(clave or pks)
+        if modo != "insertar" and not clave:
+            yield progreso(fin=True, ok=False, motivo="la tabla no tiene pk: indicá la clave")
+            return
+        t = table(tabla, *[column(n, c["type"]) for n, c in cols.items()])
+        sentencias = {}
+        faltantes = {}
+        lote, bloque = [], 0
+        nombres_lote = None
+        motivo = None
+
+        def escribir():
+            # executemany: todas las filas del lote tienen las mismas columnas.
+            # Devuelve cuántas filas quedaron escritas.
+            st = sentencias.get(nombres_lote)
+            if st is None:
+                st = sentencias[nombres_lote] = _sentencia(conn, t, modo, clave, nombres_lote)
+            res = conn.execute(st, lote)
+            # "ignorar" descarta duplicados en silencio: solo cuentan las filas
+            # que el motor dice haber insertado. En "actualizar" MySQL informa 2
+            # por fila modificada, así que ahí (y si el driver no sabe, -1) se
+            # cuenta el lote entero.
+            if modo == "ignorar" and res.rowcount >= 0:
+                return res.rowcount
+            return len(lote)
+
+        try:
+            for linea, registro, error in leer_registros(archivo, fmt):
+                estado["leidas"] += 1
+                if error is None:
+                    nombres = tuple(registro)
+                    if nombres not in faltantes:
+                        faltantes[nombres] = _faltantes(nombres, cols)
+                    if faltantes[nombres]:
+                        error = f"faltan columnas obligatorias: {', '.join(faltantes[nombres])}"
+                    else:
+                        try:
+                            fila = _validar(registro, cols)
+                        except ValueError as e:
+                            error = str(e)
+                if error is not None:
+                    estado["errores"] += 1
+                    if len(detalle) < MAX_ERRORES:
+                        detalle.append({"linea": linea, "error": error})
+                    if not saltar_errores:
+                        motivo = f"línea {linea}: {error}"
+                        break
+                elif not simular:
+                    if lote and nombres != nombres_lote:
+                        bloque += escribir()
+                        lote = []
+                    nombres_lote = nombres
+                    lote.append(fila)
+                    if len(lote) >= tanda:
+                        bloque += escribir()
+                        lote = []
+
+                if estado["leidas"] % por_transaccion == 0:
+                    if lote:
+                        bloque += escribir()
+                        lote = []
+                    conn.commit()
+                    estado["escritas"] += bloque
+                    bloque = 0
+                    yield progreso()
+
+            if motivo is None:
+                if lote:
+                    bloque += escribir()
+                conn.commit()
+                estado["escritas"] += bloque
+            else:
+                conn.rollback()     # solo el bloque en curso: los anteriores ya están confirmados
+        except Exception as e:
+            conn.rollback()
+            motivo = f"error: {getattr(e, 'orig', e)}"
+
+    yield progreso(fin=True, ok=motivo is None, motivo=motivo, simulado=simular, modo=modo,
+                   detalle=detalle)
@@ -0,0 +1,106 @@
+# logtail.py
+# Lectura de la cola de archivos de log sin cargarlos enteros.
+#
+#   cola(ruta, lineas)   -> las últimas N líneas, leyendo bloques desde el final
+#   leer_desde(ruta, offset, inodo, huella)
+#                        -> solo lo escrito después de `offset` (O(bytes nuevos))
+#
+# Las dos devuelven un dict con el texto y el cursor para la próxima lectura:
+# offset (byte hasta donde se leyó, siempre al final de una línea completa),
+# inodo y huella (crc32 de los primeros bytes del archivo). Si el archivo fue
+# rotado (otro inodo), truncado (más chico que el offset) o vaciado y vuelto a
+# escribir (cambió la huella), se marca reset=True y se devuelve la cola del
+# archivo nuevo. Si hay más de max_bytes nuevos se devuelven solo los últimos
+# (recortado=True).
+#
+# Uso:
+#   from logtail import cola, leer_desde
+#   r = cola(LOG_FILE, 500)
+#   r = leer_desde(LOG_FILE, r["offset"], r["inodo"], r["huella"])
+#
+# Equipo de desarrollo PPAM
+
+import os
+import zlib
+
+BLOQUE = 64 * 1024
+BYTES_HUELLA = 64
+MAX_BYTES = 1024 * 1024     # tope por lectura incremental
+
+
+def _huella(fh, tam):
+    if tam < BYTES_HUELLA:
+        return None         # todavía no hay con qué comparar
+    fh.seek(0)
+    return zlib.crc32(fh.read(BYTES_HUELLA))
+
+
+def _resultado(texto, offset, st, huella, reset=False, recortado=False):
+    return {
+        "texto": texto.decode("utf-8", errors="replace"),
+        "offset": offset,
+        "inodo": st.st_ino if st else None,
+        "huella": huella,
+        "reset": reset,
+        "recortado": recortado,
+    }
+
+
+def _cola_abierta(fh, tam, lineas):
+    """(bytes, inicio) de las últimas `lineas` líneas completas hasta `tam`."""
+    pos = tam
+    datos = b""
+    while pos > 0 and datos.count(b"\n") <= lineas:
+        paso = min(BLOQUE, pos)
+        pos -= paso
+        fh.seek(pos)
+        datos = fh.read(paso) + datos
+    fin = datos.rfind(b"\n") + 1            # sin la última línea si está a medio escribir
+    datos = datos[:fin]
+    partes = datos.split(b"\n")[:-1]
+    if len(partes) > lineas:
+        partes = partes[-lineas:]
+    cuerpo = b"\n".join(partes) + b"\n" if partes else b""
+    return cuerpo, pos + fin
+
+
+def cola(ruta, lineas=300):
+    """Las últimas `lineas` líneas de `ruta` y el cursor para seguir leyendo."""
+    try:
+        fh = open(ruta, "rb")
+    except FileNotFoundError:
+        return _resultado(b"", 0, None, None)
+    with fh:
+        st = os.fstat(fh.fileno())
+        huella = _huella(fh, st.st_size)
+        datos, offset = _cola_abierta(fh, st.st_size, lineas)
+    return _resultado(datos, offset, st, huella)
+
+
+def leer_desde(ruta, offset, inodo=None, huella=None, max_bytes=MAX_BYTES, lineas_reset=300):
+    """
+    Lo escrito en `ruta` desde `offset`. `inodo` y `huella` son los del cursor
+    anterior (opcionales): si no coinciden, el archivo es otro y se devuelve
+    su cola con reset=True.
+    """
+    try:
+        fh = open(ruta, "rb")
+    except FileNotFoundError:
+        return _resultado(b"", 0, None, None, reset=offset > 0)
+    with fh:
+        st = os.fstat(fh.fileno())
+        tam = st.st_size
+        actual = _huella(fh, tam)
+        if ((inodo is not None and inodo != st.st_ino) or tam < offset
+                or (huella is not None and actual is not None and huella != actual)):
+            datos, fin = _cola_abierta(fh, tam, lineas_reset)
+            return _resultado(datos, fin, st, actual, reset=True)
+
+        recortado = tam - offset > max_bytes
+        inicio = tam - max_bytes if recortado else offset
+        fh.seek(inicio)
+        datos = fh.read(tam - inicio)
+        if recortado:
+            datos = datos[datos.find(b"\n") + 1:]    # empezar en una línea completa
+        fin = datos.rfind(b"\n") + 1
+        return _resultado(datos[:fin], tam - len(datos) + fin, st, actual, recortado=recortado)
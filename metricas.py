@@ -0,0 +1,290 @@
+# metricas.py
+# Resúmenes de actividad y métricas del sistema servidos desde memoria.
+#
+# resumen_actividad(): publicadores, solicitudes, turnos de los últimos 30
+# días y turnos por día de la última semana en cuatro consultas (una sola
+# agrupada por fecha para los 7 días, en lugar de un COUNT por día). Se
+# cachea por versión de datos (una escritura de Turno/Publicador/SolicitudTurno
+# lo recalcula) y con un TTL corto por si la base cambia por fuera del ORM.
+#
+# actividad(desde, hasta, agrupar): turnos por día / semana / mes de cualquier
+# rango, por punto y con lugares ocupados/vacíos, de una consulta GROUP BY
+# (fecha, punto). Cada día queda cacheado por separado (con la versión de
+# datos en la clave), así mover la ventana solo consulta los días que faltan.
+#
+# contadores_app(): publicadores, solicitudes y turnos de los últimos 30 días
+# cacheados solo por versión de datos (sin TTL): mientras nadie escriba no
+# consultan la base.
+#
+# MUESTREADOR: hilo de fondo que cada PPAM_MUESTREO_SEGUNDOS toma CPU,
+# memoria y uptime con psutil más contadores_app() y los guarda en un buffer
+# circular de PPAM_MUESTREO_HISTORIAL muestras. Con la app quieta el hilo no
+# hace consultas; los cambios por fuera del ORM y del adminer (que invalida)
+# aparecen recién con la próxima escritura o al cambiar el día.
+# cpu_percent(interval=None) mide contra la muestra anterior, así nadie
+# bloquea un worker esperando medio segundo; los pedidos leen la última
+# muestra o la serie ya armada.
+#
+# Uso:
+#   from metricas import resumen_actividad, actividad, MUESTREADOR
+#   r = resumen_actividad()              # {"publicadores", "solicitudes", "por_dia", ...}
+#   actividad(desde, hasta, "semana")    # {"buckets": [...], "puntos": {...}}
+#   MUESTREADOR.ultima()                 # {"ts", "cpu", "mem", "uptime_h", "publicadores", ...}
+#   MUESTREADOR.serie(60)                # últimas 60 muestras
+#
+# Equipo de desarrollo PPAM
+
+import os
+import time
+import logging
+import threading
+from collections import deque
+from datetime import date, timedelta
+
+import psutil
+from flask import current_app, has_app_context
+from sqlalchemy import func, case
+
+from extensiones import db
+from modelos import Publicador, Turno, SolicitudTurno, PuntoPredicacion
+from cacheutils import CacheLRU, version_datos
+
+logger = logging.getLogger("ppam.metricas")
+
+RESUMEN_TTL = int(os.getenv("PPAM_RESUMEN_TTL", "60"))     # segundos
+DIAS_ACTIVIDAD = 7
+
+CACHE_RESUMEN = CacheLRU("resumen_actividad", maximo=8)
+CACHE_CONTADORES = CacheLRU("contadores_app", maximo=4)
+
+
+def _contar(hoy):
+    desde_30 = hoy - timedelta(days=30)
+    return {
+        "publicadores": db.session.query(func.count(Publicador.id)).scalar() or 0,
+        "solicitudes": db.session.query(func.count(SolicitudTurno.id)).scalar() or 0,
+        "asignaciones_30d": db.session.query(func.count(Turno.id)).filter(Turno.fecha >= desde_30).scalar() or 0,
+    }
+
+
+def _calcular_resumen(hoy):
+    desde = hoy - timedelta(days=DIAS_ACTIVIDAD - 1)
+    filas = (
+        db.session.query(Turno.fecha, func.count(Turno.id))
+        .filter(Turno.fecha >= desde, Turno.fecha <= hoy)
+        .group_by(Turno.fecha)
+        .all()
+    )
+    conteos = dict(filas)
+    por_dia = [(desde + timedelta(days=i), conteos.get(desde + timedelta(days=i), 0))
+               for i in range(DIAS_ACTIVIDAD)]
+    return {
+        "hoy": hoy,
+        **_contar(hoy),
+        "por_dia": por_dia,                 # [(fecha, turnos)] de más viejo a hoy
+        "turnos_hoy": por_dia[-1][1],
+        "calculado": time.time(),
+    }
+
+
+def resumen_actividad(hoy=None):
+    """Resumen cacheado; requiere app_context."""
+    hoy = hoy or date.today()
+    clave = (version_datos(), hoy, int(time.time() // RESUMEN_TTL))
+    return CACHE_RESUMEN.obtener(clave, lambda: _calcular_resumen(hoy))
+
+
+def contadores_app(hoy=None):
+    """{"publicadores", "solicitudes", "asignaciones_30d"} por versión de datos; requiere app_context."""
+    hoy = hoy or date.today()
+    return CACHE_CONTADORES.obtener((version_datos(), hoy), lambda: _contar(hoy))
+
+
+# -------------------- Actividad por rango --------------------
+AGRUPACIONES = ("dia", "semana", "mes")
+SIN_PUNTO = "sin_punto"     # clave de por_punto para turnos con punto_id NULL
+LUGARES_POR_TURNO = 4       # publicador1..4
+MAX_DIAS_ACTIVIDAD = 3 * 366
+
+CACHE_ACTIVIDAD = CacheLRU("actividad_dias", maximo=2 * MAX_DIAS_ACTIVIDAD)
+
+_OCUPADOS = [case((col.isnot(None), 1), else_=0) for col in
+             (Turno.publicador1_id, Turno.publicador2_id, Turno.publicador3_id, Turno.publicador4_id)]
+
+
+def _consultar_dias(desde, hasta):
+    """{fecha: {punto_id: [turnos, turnos_vacios, lugares_ocupados]}} de [desde, hasta]."""
+    ocupados = _OCUPADOS[0] + _OCUPADOS[1] + _OCUPADOS[2] + _OCUPADOS[3]
+    filas = (
+        db.session.query(
+            Turno.fecha, Turno.punto_id, func.count(Turno.id),
+            func.sum(case((ocupados == 0, 1), else_=0)),
+            func.sum(ocupados),
+        )
+        .filter(Turno.fecha >= desde, Turno.fecha <= hasta)
+        .group_by(Turno.fecha, Turno.punto_id)
+        .all()
+    )
+    dias = {desde + timedelta(days=i): {} for i in range((hasta - desde).days + 1)}
+    for fecha, punto_id, turnos, vacios, lugares in filas:
+        dias[fecha][punto_id] = [int(turnos), int(vacios or 0), int(lugares or 0)]
+    return dias
+
+
+def _inicio_bucket(fecha, agrupar):
+    if agrupar == "semana":
+        return fecha - timedelta(days=fecha.weekday())
+    if agrupar == "mes":
+        return fecha.replace(day=1)
+    return fecha
+
+
+def _etiqueta(inicio, agrupar):
+    if agrupar == "mes":
+        return inicio.strftime("%m/%Y")
+    return inicio.strftime("%d/%m")
+
+
+def actividad(desde, hasta, agrupar="dia", punto_ids=None):
+    """
+    Turnos de [desde, hasta] agrupados por día, semana (lunes) o mes, con el
+    desglose por punto. Los buckets de los extremos cuentan solo los días
+    dentro del rango. Solo consulta (una vez, agrupado) los días que no
+    estén en caché. por_punto va por str(punto_id) (SIN_PUNTO si es NULL).
+    Requiere app_context.
+    """
+    if agrupar not in AGRUPACIONES:
+        raise ValueError(f"agrupar debe ser uno de {AGRUPACIONES}")
+    if hasta < desde:
+        raise ValueError("hasta es anterior a desde")
+    if (hasta - desde).days >= MAX_DIAS_ACTIVIDAD:
+        raise ValueError(f"Rango máximo: {MAX_DIAS_ACTIVIDAD} días")
+
+    version = version_datos()
+    fechas = [desde + timedelta(days=i) for i in range((hasta - desde).days + 1)]
+    dias = {}
+    faltan = []
+    for f in fechas:
+        dato = CACHE_ACTIVIDAD.get((version, f))
+        if dato is None:
+            faltan.append(f)
+        else:
+            dias[f] = dato
+    if faltan:
+        for f, dato in _consultar_dias(faltan[0], faltan[-1]).items():
+            CACHE_ACTIVIDAD.set((version, f), dato)
+            dias[f] = dato
+
+    filtro = set(punto_ids) if punto_ids else None
+    buckets = {}
+    for f in fechas:
+        inicio = _inicio_bucket(f, agrupar)
+        b = buckets.get(inicio)
+        if b is None:
+            b = buckets[inicio] = {"inicio": inicio.isoformat(), "etiqueta": _etiqueta(inicio, agrupar),
+                                   "turnos": 0, "turnos_vacios": 0, "lugares_ocupados": 0, "por_punto": {}}
+        for pid, (turnos, vacios, lugares) in dias[f].items():
+            if filtro is not None and pid not in filtro:
+                continue
+            b["turnos"] += turnos
+            b["turnos_vacios"] += vacios
+            b["lugares_ocupados"] += lugares
+            # claves str (como quedan en JSON): jsonify ordena las claves y no
+            # puede comparar un int con None
+            clave = SIN_PUNTO if pid is None else str(pid)
+            pp = b["por_punto"].setdefault(clave, {"turnos": 0, "turnos_vacios": 0, "lugares_ocupados": 0})
+            pp["turnos"] += turnos
+            pp["turnos_vacios"] += vacios
+            pp["lugares_ocupados"] += lugares
+
+    for b in buckets.values():
+        b["turnos_asignados"] = b["turnos"] - b["turnos_vacios"]
+        b["lugares_vacios"] = b["turnos"] * LUGARES_POR_TURNO - b["lugares_ocupados"]
+
+    return {
+        "desde": desde.isoformat(),
+        "hasta": hasta.isoformat(),
+        "agrupar": agrupar,
+        "buckets": list(buckets.values()),
+        "puntos": {pid: nombre for pid, nombre in
+                   db.session.query(PuntoPredicacion.id, PuntoPredicacion.punto_nombre)},
+    }
+
+
+# -------------------- Muestreo del sistema --------------------
+class Muestreador:
+    """
+    Hilo que cada `intervalo` segundos guarda CPU / memoria / uptime y los
+    contadores de la app en un buffer circular de `tamano` muestras.
+    """
+
+    def __init__(self, intervalo=5.0, tamano=120):
+        self.intervalo = intervalo
+        self.historial = deque(maxlen=tamano)
+        self._app = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _muestra(self):
+        muestra = {
+            "ts": time.time(),
+            "cpu": psutil.cpu_percent(interval=None),
+            "mem": psutil.virtual_memory().percent,
+            "uptime_h": round((time.time() - psutil.boot_time()) / 3600, 1),
+        }
+        if self._app is not None:
+            try:
+                # sin escrituras desde la muestra anterior es un acierto de caché
+                with self._app.app_context():
+                    r = contadores_app()
+                muestra.update(publicadores=r["publicadores"], solicitudes=r["solicitudes"],
+                               asignaciones=r["asignaciones_30d"])
+            except Exception as e:
+                logger.warning("Contadores de la app no disponibles: %s", e)
+        return muestra
+
+    def _ciclo(self):
+        while True:
+            try:
+                muestra = self._muestra()
+                with self._lock:
+                    self.historial.append(muestra)
+            except Exception as e:
+                logger.warning("Muestreo del sistema falló: %s", e)
+            time.sleep(self.intervalo)
+
+    def iniciar(self, app=None):
+        """Arranca el hilo (una vez por proceso; de nuevo tras un fork)."""
+        if app is None and has_app_context():
+            app = current_app._get_current_object()
+        with self._lock:
+            if app is not None:
+                self._app = app
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            psutil.cpu_percent(interval=None)     # la primera medición siempre da 0.0
+        threading.Thread(target=self._ciclo, name="ppam-muestreador", daemon=True).start()
+
+    def ultima(self):
+        """Última muestra (sin bloquear). Antes de la primera, una lectura al momento."""
+        self.iniciar()
+        with self._lock:
+            if self.historial:
+                return self.historial[-1]
+        try:
+            return self._muestra()
+        except Exception:
+            return {"ts": time.time(), "cpu": 0, "mem": 0, "uptime_h": 0}
+
+    def serie(self, n=60):
+        """Las últimas n muestras, de la más vieja a la más nueva."""
+        self.iniciar()
+        with self._lock:
+            return list(self.historial)[-n:] if n > 0 else []
+
+
+MUESTREADOR = Muestreador(
+    intervalo=float(os.getenv("PPAM_MUESTREO_SEGUNDOS", "5")),
+    tamano=int(os.getenv("PPAM_MUESTREO_HISTORIAL", "120")),
+)
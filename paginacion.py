@@ -0,0 +1,324 @@
+# paginacion.py
+# Paginación por keyset (cursor) compartida por las APIs JSON y las vistas HTML.
+#
+# En vez de OFFSET se recuerda el valor de las columnas de orden de la última
+# fila entregada y la página siguiente arranca "después" de esa fila. El costo
+# de cada página no depende de cuántas filas haya antes.
+#
+# pagina_tabla() hace lo mismo sobre una tabla cualquiera (sin modelo) para el
+# navegador del adminer: orden por la pk o por la primera columna de un índice
+# (en InnoDB todo índice secundario termina en la pk, así que ORDER BY col, pk
+# sale del índice), cursor hacia adelante y hacia atrás, solo las columnas
+# pedidas y la cantidad estimada de filas de las estadísticas de la tabla
+# (information_schema.TABLES.TABLE_ROWS) en lugar de un COUNT(*).
+#
+# Uso:
+#   limite, cursor, con_total = leer_parametros()      # sin_limite=True: sin ?limite=/?cursor= trae todo
+#   pagina = paginar(SolicitudTurno.query, [SolicitudTurno.id], cursor, limite, con_total)
+#   resp = jsonify([...pagina["items"]...])
+#   resp.headers.update(headers_paginacion(pagina))
+#
+#   with db.engine.connect() as conn:
+#       p = pagina_tabla(conn, "turnos", columnas=["id", "fecha"], orden="fecha",
+#                        despues=decode_cursor(request.args.get("despues")))
+#   p["filas"], p["siguiente"], p["anterior"], p["estimado"]
+#
+# Equipo de desarrollo PPAM
+
+import base64
+import json
+from datetime import date, datetime, time
+
+from flask import request
+from sqlalchemy import and_, or_, func, inspect, text, select, table, column, cast, String
+
+PAGINA_POR_DEFECTO = 200
+PAGINA_MAXIMA = 1000
+
+
+# -------------------- Cursor --------------------
+def encode_cursor(valores):
+    """Lista de valores -> token opaco (base64 url-safe, sin padding)."""
+    raw = json.dumps(valores, default=_a_json, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token):
+    """Token -> lista de valores (crudos, todavía como JSON). None si es inválido."""
+    if not token:
+        return None
+    try:
+        pad = "=" * (-len(token) % 4)
+        valores = json.loads(base64.urlsafe_b64decode(token + pad).decode("utf-8"))
+    except Exception:
+        return None
+    return valores if isinstance(valores, list) else None
+
+
+def _a_json(v):
+    if isinstance(v, (date, datetime, time)):
+        return v.isoformat()
+    return str(v)
+
+
+def _desde_json(col, v):
+    """Convierte un valor del cursor al tipo python de la columna (ValueError / TypeError si no se puede)."""
+    if v is None:
+        return None
+    try:
+        tipo = col.type.python_type
+    except (NotImplementedError, AttributeError):
+        return v
+    if tipo is datetime:
+        return datetime.fromisoformat(v)
+    if tipo is date:
+        return date.fromisoformat(v)
+    if tipo is time:
+        return time.fromisoformat(v)
+    if tipo is int:
+        return int(v)
+    return v
+
+
+# -------------------- Parámetros de request --------------------
+def leer_parametros(default=PAGINA_POR_DEFECTO, sin_limite=False):
+    """
+    Lee ?limite=, ?cursor= y ?total=1 del request.
+    Devuelve (limite, cursor, con_total) con el límite acotado a PAGINA_MAXIMA.
+    sin_limite=True (APIs que antes devolvían todo): si no vienen ni ?limite=
+    ni ?cursor=, limite es None y se devuelven todas las filas, así un cliente
+    que no conoce los cursores no pierde datos.
+    """
+    if sin_limite and "limite" not in request.args and "cursor" not in request.args:
+        return None, None, request.args.get("total", "").lower() in ("1", "true", "si")
+    limite = request.args.get("limite", type=int) or default
+    limite = max(1, min(limite, PAGINA_MAXIMA))
+    cursor = decode_cursor(request.args.get("cursor"))
+    con_total = request.args.get("total", "").lower() in ("1", "true", "si")
+    return limite, cursor, con_total
+
+
+# -------------------- Keyset --------------------
+def _expr_orden(col):
+    """Columnas de texto nulables se ordenan como '' para que el keyset sea total."""
+    c = col.expression
+    try:
+        es_texto = c.type.python_type is str
+    except (NotImplementedError, AttributeError):
+        es_texto = False
+    if es_texto and getattr(c, "nullable", True):
+        return func.coalesce(col, ""), True
+    return col, False
+
+
+def paginar(query, orden, cursor=None, limite=PAGINA_POR_DEFECTO, con_total=False):
+    """
+    Pagina `query` por keyset.
+
+    orden: lista de atributos del modelo (InstrumentedAttribute). La última
+           columna tiene que ser única (normalmente el id) para desempatar.
+    cursor: lista de valores devuelta por decode_cursor() o None.
+    limite: None = todas las filas (sin página siguiente).
+
+    Devuelve dict:
+      items     -> filas de esta página (a lo sumo `limite`)
+      siguiente -> token para la próxima página o None si no hay más
+      total     -> COUNT(*) de la query sin paginar (solo si con_total)
+      limite    -> límite aplicado
+    """
+    exprs = [_expr_orden(c) for c in orden]
+    total = query.order_by(None).count() if con_total else None
+
+    q = query
+    valores = None
+    if cursor and len(cursor) == len(orden):
+        try:
+            valores = []
+            for col, (expr, coalesce) in zip(orden, exprs):
+                v = _desde_json(col.expression, cursor[len(valores)])
+                valores.append("" if (coalesce and v is None) else v)
+        except (TypeError, ValueError):
+            valores = None      # cursor viejo o adulterado: primera página
+    if valores is not None:
+        # (a > x) OR (a = x AND b > y) OR (a = x AND b = y AND c > z) ...
+        condiciones = []
+        for i, (expr, _) in enumerate(exprs):
+            iguales = [exprs[j][0] == valores[j] for j in range(i)]
+            condiciones.append(and_(*iguales, expr > valores[i]))
+        q = q.filter(or_(*condiciones))
+
+    q = q.order_by(*[e for e, _ in exprs])
+    filas = (q.limit(limite + 1) if limite is not None else q).all()
+
+    siguiente = None
+    if limite is not None and len(filas) > limite:
+        filas = filas[:limite]
+        ultima = filas[-1]
+        valores = []
+        for col, (_, coalesce) in zip(orden, exprs):
+            v = getattr(ultima, col.key)
+            valores.append("" if (coalesce and v is None) else v)
+        siguiente = encode_cursor(valores)
+
+    return {"items": filas, "siguiente": siguiente, "total": total, "limite": limite}
+
+
+def headers_paginacion(pagina):
+    """Headers para APIs que devuelven un array plano (se mantiene el formato)."""
+    h = {}
+    if pagina["limite"] is not None:
+        h["X-Page-Limit"] = str(pagina["limite"])
+    if pagina["siguiente"]:
+        h["X-Next-Cursor"] = pagina["siguiente"]
+    if pagina["total"] is not None:
+        h["X-Total-Count"] = str(pagina["total"])
+    return h
+
+
+# -------------------- Tablas crudas (adminer) --------------------
+def esquema_de(columnas, pks, indices):
+    """
+    {"columnas": [(nombre, tipo)], "pk", "ordenables"} a partir de la reflexión
+    (get_columns / pk / get_indexes). pk es None si la tabla no tiene clave
+    primaria de una sola columna.
+    """
+    pk = pks[0] if len(pks) == 1 else None
+    ordenables = [pk] if pk else []
+    for ix in indices:
+        cols = ix.get("column_names") or []
+        if cols and cols[0] and cols[0] not in ordenables:
+            ordenables.append(cols[0])
+    return {"columnas": [(c["name"], c["type"]) for c in columnas], "pk": pk, "ordenables": ordenables}
+
+
+def describir_tabla(conn, tabla):
+    """esquema_de() de `tabla` reflejando en el momento (sin caché: ver catalogo.describir)."""
+    insp = inspect(conn)
+    pks = (insp.get_pk_constraint(tabla) or {}).get("constrained_columns") or []
+    return esquema_de(insp.get_columns(tabla), pks, insp.get_indexes(tabla))
+
+
+def filas_estimadas(conn, tabla):
+    """Filas según las estadísticas de la tabla (MySQL); None si no hay dato."""
+    if conn.dialect.name != "mysql":
+        return None
+    n = conn.execute(
+        text("SELECT TABLE_ROWS FROM information_schema.TABLES "
+             "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :t"),
+        {"t": tabla},
+    ).scalar()
+    return int(n) if n is not None else None
+
+
+def _texto(v):
+    if isinstance(v, (bytes, bytearray)):
+        try:
+            return v.decode("utf-8")
+        except UnicodeDecodeError:
+            return v.decode("latin1", errors="replace")
+    return v
+
+
+def _despues(col, pk, valor, clave, asc):
+    """Condición "después de (valor, clave)" en ORDER BY col, pk. NULL es el menor, como en MySQL."""
+    if col is pk:
+        return pk > clave if asc else pk < clave
+    if asc:
+        if valor is None:
+            return or_(col.isnot(None), and_(col.is_(None), pk > clave))
+        return or_(col > valor, and_(col == valor, pk > clave))
+    if valor is None:
+        return and_(col.is_(None), pk < clave)
+    return or_(col < valor, and_(col == valor, pk < clave), col.is_(None))
+
+
+def pagina_tabla(conn, tabla, columnas=None, orden=None, desc=False, despues=None, antes=None,
+                 limite=PAGINA_POR_DEFECTO, buscar=None, buscar_en=None, esquema=None):
+    """
+    Una página de `tabla` por keyset sobre (orden, pk).
+
+    despues / antes: cursor (de decode_cursor) de la última / primera fila de
+                     otra página; sin ninguno, la primera página.
+    columnas: columnas a traer (además de pk y orden); None = todas.
+    buscar:   LIKE '%texto%' en `buscar_en` o en las columnas visibles.
+
+    Devuelve dict con filas (dicts, bytes ya decodificados), columnas, todas,
+    pk, orden, desc, ordenables, limite, estimado y los tokens `siguiente` /
+    `anterior` (None si no hay más en esa dirección). Una tabla sin pk simple
+    cae a LIMIT/OFFSET (el cursor es el offset).
+    """
+    esquema = esquema or describir_tabla(conn, tabla)
+    t = table(tabla, *[column(nombre, tipo) for nombre, tipo in esquema["columnas"]])
+    todas = [nombre for nombre, _ in esquema["columnas"]]
+    pk = esquema["pk"]
+    visibles = [c for c in (columnas or []) if c in todas] or todas
+    if orden not in esquema["ordenables"]:
+        orden, desc = pk, False
+    limite = max(1, min(int(limite or PAGINA_POR_DEFECTO), PAGINA_MAXIMA))
+
+    pedidas = list(dict.fromkeys(visibles + [c for c in (pk, orden) if c]))
+    q = select(*[t.c[c] for c in pedidas]).select_from(t)
+    if buscar:
+        donde = [buscar_en] if buscar_en in todas else visibles
+        q = q.where(or_(*[cast(t.c[c], String).contains(buscar, autoescape=True) for c in donde]))
+
+    atras = antes is not None
+    cursor = antes if atras else despues
+    siguiente = anterior = None
+
+    if pk is None:
+        # sin pk simple no hay keyset posible
+        try:
+            inicio = max(0, int(cursor[0])) if cursor else 0
+        except (TypeError, ValueError):
+            inicio = 0
+        if orden:
+            q = q.order_by(t.c[orden].desc() if desc else t.c[orden].asc())
+        filas = [{k: _texto(v) for k, v in r._mapping.items()}
+                 for r in conn.execute(q.offset(inicio).limit(limite + 1))]
+        if len(filas) > limite:
+            siguiente = encode_cursor([inicio + limite])
+        if inicio > 0:
+            anterior = encode_cursor([max(0, inicio - limite)])
+        filas = filas[:limite]
+    else:
+        col, clave = t.c[orden], t.c[pk]
+        asc = desc == atras         # hacia atrás se recorre al revés y se da vuelta
+        desde = None
+        if cursor and len(cursor) == 2:
+            try:
+                desde = (_desde_json(col, cursor[0]), _desde_json(clave, cursor[1]))
+            except (TypeError, ValueError):
+                pass            # cursor viejo o adulterado: primera página
+        if desde is not None:
+            q = q.where(_despues(col, clave, *desde, asc))
+        else:
+            cursor = None
+        criterio = [col.asc() if asc else col.desc()]
+        if col is not clave:
+            criterio.append(clave.asc() if asc else clave.desc())
+        filas = [{k: _texto(v) for k, v in r._mapping.items()}
+                 for r in conn.execute(q.order_by(*criterio).limit(limite + 1))]
+        hay_mas = len(filas) > limite
+        filas = filas[:limite]
+        if atras:
+            filas.reverse()
+        if filas:
+            if hay_mas or (atras and cursor):
+                siguiente = encode_cursor([filas[-1][orden], filas[-1][pk]])
+            if hay_mas if atras else cursor:
+                anterior = encode_cursor([filas[0][orden], filas[0][pk]])
+
+    return {
+        "filas": filas,
+        "columnas": visibles,
+        "todas": todas,
+        "pk": pk,
+        "orden": orden,
+        "desc": bool(desc),
+        "ordenables": esquema["ordenables"],
+        "limite": limite,
+        "siguiente": siguiente,
+        "anterior": anterior,
+        "estimado": filas_estimadas(conn, tabla),
+    }
@@ -0,0 +1,212 @@
+# perfilador.py
+# Perfilador de requests: cantidad de sentencias SQL, tiempo en base y latencia
+# total por endpoint, más un registro de consultas lentas.
+#
+# Se engancha a los eventos before/after_cursor_execute de SQLAlchemy (todas las
+# engines) y a las señales request_started / request_tearing_down de Flask.
+# Las estadísticas quedan en memoria del proceso (cada worker tiene las suyas)
+# y se consultan desde ppamtools (/ppamtools/api/perfil).
+#
+# Uso:
+#   from perfilador import init_perfilador
+#   init_perfilador(app)
+#
+#   # fuera de un request (scripts, benchmarks):
+#   with medir() as m:
+#       bot.run_batch(...)
+#   print(m.consultas, m.db_ms)
+#
+# Equipo de desarrollo PPAM
+
+import os
+import time
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+from flask import g, has_request_context, request, request_started, request_tearing_down
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger("ppam.perfilador")
+
+LENTA_MS = float(os.getenv("PPAM_SQL_LENTA_MS", "200"))   # umbral de consulta lenta
+MUESTRAS_POR_ENDPOINT = 500                                # ventana para percentiles
+MAX_LENTAS = 100                                           # últimas consultas lentas
+
+_LOCK = threading.Lock()
+_STATS = {}                         # endpoint -> dict (ver _stats_endpoint)
+_LENTAS = deque(maxlen=MAX_LENTAS)
+_HILO = threading.local()           # medidores activos fuera de request
+_INSTALADO = {"eventos": False}
+
+
+class Medicion:
+    """Acumulador de sentencias y tiempo en base."""
+
+    __slots__ = ("consultas", "db_ms", "t0", "total_ms")
+
+    def __init__(self):
+        self.consultas = 0
+        self.db_ms = 0.0
+        self.t0 = time.perf_counter()
+        self.total_ms = 0.0
+
+    def cerrar(self):
+        self.total_ms = (time.perf_counter() - self.t0) * 1000.0
+        return self
+
+
+# -------------------- Eventos SQLAlchemy --------------------
+# El inicio se guarda en el contexto de ejecución de la sentencia: si falla,
+# after_cursor_execute no corre y el contexto se descarta con ella (una pila en
+# conn.info quedaba con un inicio viejo en la conexión del pool). Las pocas
+# sentencias internas sin contexto usan un único valor en conn.info.
+def _antes(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._perfil_t0 = time.perf_counter()
+    else:
+        conn.info["_perfil_t0"] = time.perf_counter()
+
+
+def _despues(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        t0 = getattr(context, "_perfil_t0", None)
+    else:
+        t0 = conn.info.pop("_perfil_t0", None)
+    if t0 is None:
+        return
+    ms = (time.perf_counter() - t0) * 1000.0
+
+    ruta = None
+    if has_request_context():
+        ruta = request.endpoint
+        med = g.get("_perfil")
+        if med is not None:
+            med.consultas += 1
+            med.db_ms += ms
+    for med in getattr(_HILO, "activas", ()):
+        med.consultas += 1
+        med.db_ms += ms
+
+    if ms >= LENTA_MS:
+        sql = " ".join(statement.split())[:500]
+        logger.warning("SQL lenta %.1f ms en %s: %s", ms, ruta or "-", sql)
+        with _LOCK:
+            _LENTAS.append({
+                "ts": time.time(),
+                "ms": round(ms, 1),
+                "endpoint": ruta,
+                "sql": sql,
+            })
+
+
+def _instalar_eventos():
+    if _INSTALADO["eventos"]:
+        return
+    event.listen(Engine, "before_cursor_execute", _antes)
+    event.listen(Engine, "after_cursor_execute", _despues)
+    _INSTALADO["eventos"] = True
+
+
+# -------------------- Señales Flask --------------------
+def _inicio_request(sender, **extra):
+    g._perfil = Medicion()
+
+
+def _fin_request(sender, **extra):
+    med = g.pop("_perfil", None)
+    endpoint = request.endpoint
+    if med is None or not endpoint or endpoint == "static" or endpoint.endswith(".static"):
+        return
+    registrar(endpoint, med.cerrar())
+
+
+def init_perfilador(app):
+    """Activa el perfilador para `app` (idempotente respecto de los eventos SQL)."""
+    _instalar_eventos()
+    request_started.connect(_inicio_request, app)
+    request_tearing_down.connect(_fin_request, app)
+
+
+# -------------------- Medición fuera de request --------------------
+@contextmanager
+def medir():
+    """Cuenta sentencias y tiempo en base del hilo actual mientras dura el bloque."""
+    _instalar_eventos()
+    med = Medicion()
+    activas = getattr(_HILO, "activas", None)
+    if activas is None:
+        activas = _HILO.activas = []
+    activas.append(med)
+    try:
+        yield med
+    finally:
+        activas.remove(med)
+        med.cerrar()
+
+
+# -------------------- Agregación --------------------
+def _stats_endpoint():
+    return {
+        "requests": 0,
+        "consultas_total": 0,
+        "db_ms_total": 0.0,
+        "max_consultas": 0,
+        "muestras": deque(maxlen=MUESTRAS_POR_ENDPOINT),
+    }
+
+
+def registrar(endpoint, med):
+    with _LOCK:
+        st = _STATS.get(endpoint)
+        if st is None:
+            st = _STATS[endpoint] = _stats_endpoint()
+        st["requests"] += 1
+        st["consultas_total"] += med.consultas
+        st["db_ms_total"] += med.db_ms
+        st["max_consultas"] = max(st["max_consultas"], med.consultas)
+        st["muestras"].append((med.consultas, med.db_ms, med.total_ms))
+
+
+def _percentil(ordenados, p):
+    if not ordenados:
+        return 0
+    k = min(len(ordenados) - 1, max(0, int(round(p / 100.0 * (len(ordenados) - 1)))))
+    return ordenados[k]
+
+
+def resumen():
+    """Estadísticas por endpoint (percentiles sobre las últimas muestras)."""
+    with _LOCK:
+        copia = {ep: (dict(st), list(st["muestras"])) for ep, st in _STATS.items()}
+        lentas = list(_LENTAS)
+
+    endpoints = []
+    for ep, (st, muestras) in copia.items():
+        consultas = sorted(m[0] for m in muestras)
+        db_ms = sorted(m[1] for m in muestras)
+        total = sorted(m[2] for m in muestras)
+        endpoints.append({
+            "endpoint": ep,
+            "requests": st["requests"],
+            "consultas_prom": round(st["consultas_total"] / st["requests"], 1),
+            "consultas_p95": _percentil(consultas, 95),
+            "consultas_max": st["max_consultas"],
+            "db_ms_p50": round(_percentil(db_ms, 50), 1),
+            "db_ms_p95": round(_percentil(db_ms, 95), 1),
+            "total_ms_p50": round(_percentil(total, 50), 1),
+            "total_ms_p95": round(_percentil(total, 95), 1),
+            "total_ms_p99": round(_percentil(total, 99), 1),
+            "db_ms_acumulado": round(st["db_ms_total"], 1),
+        })
+    endpoints.sort(key=lambda e: e["db_ms_acumulado"], reverse=True)
+    lentas.reverse()
+    return {"endpoints": endpoints, "lentas": lentas, "umbral_lenta_ms": LENTA_MS}
+
+
+def reiniciar():
+    with _LOCK:
+        _STATS.clear()
+        _LENTAS.clear()
@@ -9,6 +9,7 @@ from flask_login import login_required, current_user
 
 from extensiones import db
 from modelos import PuntoPredicacion, Turno
+from grillas import grilla_semana, nombres_publicadores
 
 planificacion_bp = Blueprint("planificacion", __name__, url_prefix="/api/planificacion")
 
@@ -31,6 +32,15 @@ def get_week_range(start_str=None):
     return week_start, week_end
 
 
+def version_turnos(turnos):
+    """Hash de asignaciones y estado público de los turnos (dicts de la grilla)."""
+    serial = [
+        f"{t['id']}:{int(t['is_public'])}:{t['publicador1_id'] or 0}:{t['publicador2_id'] or 0}:{t['publicador3_id'] or 0}:{t['publicador4_id'] or 0}:{t['capitan_id'] or 0}"
+        for t in sorted(turnos, key=lambda x: x["id"])
+    ]
+    return hashlib.sha1("|".join(serial).encode()).hexdigest()
+
+
 # -----------------------------------------------------------
 # 🟦 RUTA PRINCIPAL DE PLANIFICACIÓN
 # -----------------------------------------------------------
@@ -43,15 +53,12 @@ def index():
     # cargar puntos
     puntos = PuntoPredicacion.query.order_by(PuntoPredicacion.id.asc()).all()
 
-    # cargar turnos de la semana
-    turnos_raw = (
-        Turno.query.filter(
-            Turno.fecha >= week_start,
-            Turno.fecha <= week_end
-        )
-        .order_by(Turno.fecha.asc(), Turno.hora_inicio.asc())
-        .all()
-    )
+    # turnos de la semana desde la grilla precalculada (grillas.py)
+    grilla = grilla_semana(week_start, [p.id for p in puntos])
+    nombres = nombres_publicadores()
+
+    def nombre(pid):
+        return nombres[pid][0] if pid in nombres else ""
 
     # -------------------------------------------
     #  Organizar turnos => { punto_id: { dia: [turnos] } }
@@ -59,20 +66,21 @@ def index():
     dias = ["lunes", "martes", "miércoles", "jueves", "viernes", "sábado", "domingo"]
     turnos = {p.id: {d: [] for d in dias} for p in puntos}
 
-    for t in turnos_raw:
-        dia_str = dias[t.fecha.weekday()]  # weekday: lunes=0
-        turnos[t.punto_id][dia_str].append({
-            "id": t.id,
-            "fecha": t.fecha,
-            "hora_inicio": t.hora_inicio,
-            "hora_fin": t.hora_fin,
-            "capitan_nombre": t.capitan.nombre if t.capitan else "",
-            "publicador1_nombre": t.publicador1.nombre if t.publicador1 else "",
-            "publicador2_nombre": t.publicador2.nombre if t.publicador2 else "",
-            "publicador3_nombre": t.publicador3.nombre if t.publicador3 else "",
-            "publicador4_nombre": t.publicador4.nombre if t.publicador4 else "",
-            "is_public": t.is_public
-        })
+    for punto_id, lista in grilla.items():
+        for t in lista:
+            dia_str = dias[t["fecha"].weekday()]  # weekday: lunes=0
+            turnos[punto_id][dia_str].append({
+                "id": t["id"],
+                "fecha": t["fecha"],
+                "hora_inicio": t["hora_inicio"],
+                "hora_fin": t["hora_fin"],
+                "capitan_nombre": nombre(t["capitan_id"]),
+                "publicador1_nombre": nombre(t["publicador1_id"]),
+                "publicador2_nombre": nombre(t["publicador2_id"]),
+                "publicador3_nombre": nombre(t["publicador3_id"]),
+                "publicador4_nombre": nombre(t["publicador4_id"]),
+                "is_public": t["is_public"]
+            })
 
     # -------------------------------------------
     # Pasamos todo al template planificación.html
@@ -87,6 +95,42 @@ def index():
         next_week=week_start + timedelta(days=7)
     )
 
+# -----------------------------------------------------------
+# Grilla semanal en JSON (misma grilla precalculada que las vistas)
+# GET /api/planificacion/grilla?week_start=YYYY-MM-DD[&punto_id=#]
+# -----------------------------------------------------------
+@planificacion_bp.route("/grilla", methods=["GET"])
+@login_required
+def api_planificacion_grilla():
+    if current_user.rol != "Admin":
+        return jsonify({"ok": False, "error": "No autorizado"}), 403
+
+    week_start, week_end = get_week_range(request.args.get("week_start"))
+    punto_id = request.args.get("punto_id", type=int)
+    if punto_id:
+        punto_ids = [punto_id]
+    else:
+        punto_ids = [pid for (pid,) in db.session.query(PuntoPredicacion.id).order_by(PuntoPredicacion.id)]
+
+    grilla = grilla_semana(week_start, punto_ids)
+    return jsonify({
+        "ok": True,
+        "week_start": week_start.isoformat(),
+        "week_end": week_end.isoformat(),
+        "puntos": {
+            str(pid): [
+                dict(
+                    t,
+                    fecha=t["fecha"].isoformat(),
+                    hora_inicio=t["hora_inicio"].strftime("%H:%M"),
+                    hora_fin=t["hora_fin"].strftime("%H:%M"),
+                )
+                for t in lista
+            ]
+            for pid, lista in grilla.items()
+        },
+    })
+
 @planificacion_bp.route("/changes", methods=["GET"])
 @login_required
 def api_planificacion_changes():
@@ -104,18 +148,10 @@ def api_planificacion_changes():
 
     week_end = week_start + timedelta(days=6)
 
-    turnos = Turno.query.filter(
-        Turno.punto_id == punto_id,
-        Turno.fecha >= week_start,
-        Turno.fecha <= week_end
-    ).all()
+    turnos = grilla_semana(week_start, [punto_id])[punto_id] if punto_id else []
 
     # hash
-    serial = [
-        f"{t.id}:{int(t.is_public)}:{t.publicador1_id or 0}:{t.publicador2_id or 0}:{t.publicador3_id or 0}:{t.publicador4_id or 0}:{t.capitan_id or 0}"
-        for t in sorted(turnos, key=lambda x: x.id)
-    ]
-    version = hashlib.sha1("|".join(serial).encode()).hexdigest()
+    version = version_turnos(turnos)
 
     changed = (version != last_version)
 
@@ -144,29 +180,21 @@ def api_planificacion_stats():
 
     week_end = week_start + timedelta(days=6)
 
-    turnos = Turno.query.filter(
-        Turno.punto_id == punto_id,
-        Turno.fecha >= week_start,
-        Turno.fecha <= week_end
-    ).all()
+    turnos = grilla_semana(week_start, [punto_id])[punto_id] if punto_id else []
 
     # estadísticas
-    publicos = sum(1 for t in turnos if t.is_public)
+    publicos = sum(1 for t in turnos if t["is_public"])
     borradores = len(turnos) - publicos
 
     dias = {}
     for t in turnos:
-        dias.setdefault(t.fecha.isoformat(), []).append(t)
+        dias.setdefault(t["fecha"].isoformat(), []).append(t)
 
-    dias_completos = sum(1 for d in dias.values() if any(t.is_public for t in d))
+    dias_completos = sum(1 for d in dias.values() if any(t["is_public"] for t in d))
     dias_incompletos = len(dias) - dias_completos
 
     # hash versión
-    serial = [
-        f"{t.id}:{int(t.is_public)}:{t.publicador1_id or 0}:{t.publicador2_id or 0}:{t.publicador3_id or 0}:{t.publicador4_id or 0}:{t.capitan_id or 0}"
-        for t in sorted(turnos, key=lambda x: x.id)
-    ]
-    version = hashlib.sha1("|".join(serial).encode()).hexdigest()
+    version = version_turnos(turnos)
 
     return jsonify({
         "ok": True,
@@ -24,6 +24,15 @@ from flask import (
 from flask_login import login_required, current_user
 from extensiones import db
 from modelos import Publicador, Turno, SolicitudTurno
+import perfilador
+import cacheutils
+from almacen_jsonl import LogJSONL
+import ejecutor
+from ejecutor import EjecutorProgramado
+import metricas
+from metricas import resumen_actividad, MUESTREADOR
+import logtail
+import registro
 
 
 # Carpeta para datos simples (notificaciones, chat, logs)
@@ -32,21 +41,27 @@ DATA_DIR = os.path.join(BASE_DIR, "ppamtools_data")
 if not os.path.exists(DATA_DIR):
     os.makedirs(DATA_DIR, exist_ok=True)
 
-NOTIF_FILE = os.path.join(DATA_DIR, "notificaciones.json")
-CHAT_FILE = os.path.join(DATA_DIR, "chat.json")
+NOTIF_FILE = os.path.join(DATA_DIR, "notificaciones.jsonl")
+CHAT_FILE = os.path.join(DATA_DIR, "chat.jsonl")
 LOG_FILE = os.path.join(DATA_DIR, "ppamtools.log")
-# --- Lock para escrituras seguras en CHAT_FILE ---
+# Registros append-only (los .json viejos se migran la primera vez)
+NOTIFS = LogJSONL(NOTIF_FILE, maximo=1000, legado=os.path.join(DATA_DIR, "notificaciones.json"))
+CHAT = LogJSONL(CHAT_FILE, maximo=1000, legado=os.path.join(DATA_DIR, "chat.json"))
 # Configurables
 BOT_NAME = "PPAM-BOT"
 MAX_CONTEXT = 6                   # mensajes previos a guardar por usuario
 MIN_REPLY_DELAY = 0.6             # mínimo "typing" delay
 MAX_REPLY_DELAY = 2.2             # máximo "typing" delay
 USER_THROTTLE_SECONDS = 1.0       # evitar respuestas muy seguidas por usuario
-CHAT_LOCK = threading.Lock()      # usar el mismo lock que ya tenías
+BOT_TRABAJADORES = int(os.getenv("PPAM_BOT_TRABAJADORES", "2"))   # hilos fijos del bot
+BOT_MAX_COLA = int(os.getenv("PPAM_BOT_MAX_COLA", "50"))          # respuestas esperando hilo
+# long-poll (?wait=): tope de espera por request, cada espera ocupa un worker
+LONGPOLL_MAX = float(os.getenv("PPAM_LONGPOLL_MAX", "20"))
 
 # Memoria en RAM (no persistente): contexto y último reply time
 BOT_CONTEXT = defaultdict(lambda: deque(maxlen=MAX_CONTEXT))
 LAST_REPLY_AT = defaultdict(lambda: 0.0)
+EJECUTOR_BOT = EjecutorProgramado("ppam-bot", trabajadores=BOT_TRABAJADORES, max_cola=BOT_MAX_COLA)
 
 # Sinónimos y pequeñas plantillas
 COMMANDS = {
@@ -65,14 +80,12 @@ SYNONYMS = {
 }
 
 
-# asegurar archivos
-for f, empty in [(NOTIF_FILE, []), (CHAT_FILE, []), (LOG_FILE, "")]:
-    if not os.path.exists(f):
-        with open(f, "w", encoding="utf-8") as fh:
-            if isinstance(empty, list):
-                json.dump(empty, fh)
-            else:
-                fh.write(empty)
+# asegurar archivos (chat y notificaciones se crean con el primer registro)
+if not os.path.exists(LOG_FILE):
+    open(LOG_FILE, "w", encoding="utf-8").close()
+
+# ppamtools.log con buffer, rotación y segmentos .gz (ver registro.py)
+REGISTRO = registro.logger_archivo("ppamtools", LOG_FILE)
 
 ppamtools_bp = Blueprint(
     "ppamtools",
@@ -89,6 +102,10 @@ APP_OBJECT = {}   # será un contenedor mutado desde afuera
 # Bot humano, reglas + parsing simple, fuzzy, contexto pequeño,
 # seguro para usar con threads (usa current_app.app_context()).
 # --------------------- Bot V2 --------------------
+def _texto_actividad(resumen):
+    partes = [f"{dia.strftime('%d/%m')}: {n}" for dia, n in resumen["por_dia"]]
+    return "Actividad (7d): " + " | ".join(partes)
+
 # small helper functions
 def _normalize(text):
     # lower, remove accents lightly, strip punctuation edges
@@ -150,16 +167,14 @@ def ppam_bot_v4_generate(user, texto):
             return COMMANDS["/ayuda"]
         if cmd == "/hoy":
             try:
-                hoy = datetime.now().date()
-                n = Turno.query.filter(Turno.fecha == hoy).count()
-                return f"Asig. hoy ({hoy}): {n}"
+                r = resumen_actividad()
+                return f"Asig. hoy ({r['hoy']}): {r['turnos_hoy']}"
             except Exception as e:
                 current_app.logger.exception("bot /hoy error")
                 return "No pude obtener las asignaciones del día."
         if cmd == "/publicadores":
             try:
-                n = Publicador.query.count()
-                return f"Publicadores: {n}"
+                return f"Publicadores: {resumen_actividad()['publicadores']}"
             except Exception:
                 current_app.logger.exception("bot /publicadores error")
                 return "No pude leer la cantidad de publicadores."
@@ -189,28 +204,20 @@ def ppam_bot_v4_generate(user, texto):
                 return "Error al consultar solicitudes pendientes."
         if cmd == "/actividad":
             try:
-                hoy = datetime.now().date()
-                partes = []
-                for i in range(6, -1, -1):
-                    dia = hoy - timedelta(days=i)
-                    q = Turno.query.filter(Turno.fecha == dia).count()
-                    partes.append(f"{dia.strftime('%d/%m')}: {q}")
-                return "Actividad (7d): " + " | ".join(partes)
+                return _texto_actividad(resumen_actividad())
             except Exception:
                 current_app.logger.exception("bot /actividad error")
                 return "No pude obtener la actividad semanal."
         if cmd == "/estado":
             try:
-                cpu = psutil.cpu_percent(interval=0.5)
-                mem = psutil.virtual_memory().percent
-                uptime_h = round((datetime.now().timestamp() - psutil.boot_time()) / 3600, 1)
-                return f"Estado — CPU: {cpu}% | Mem: {mem}% | Uptime: {uptime_h}h"
+                m = MUESTREADOR.ultima()
+                return f"Estado — CPU: {m['cpu']}% | Mem: {m['mem']}% | Uptime: {m['uptime_h']}h"
             except Exception:
                 current_app.logger.exception("bot /estado error")
                 return "No pude obtener el estado del servidor."
         if cmd == "/notif":
             try:
-                notifs = _read_json(NOTIF_FILE)[-5:]
+                notifs = NOTIFS.ultimos(5)
                 if not notifs:
                     return "No hay notificaciones recientes."
                 return "Últimas: " + " // ".join(n.get("texto","(sin texto)") for n in notifs)
@@ -248,46 +255,37 @@ def ppam_bot_v4_generate(user, texto):
     if intent == "actividad":
         # intentar devolver resumen (misma lógica que /actividad)
         try:
-            hoy = datetime.now().date()
-            partes = []
-            for i in range(6, -1, -1):
-                dia = hoy - timedelta(days=i)
-                q = Turno.query.filter(Turno.fecha == dia).count()
-                partes.append(f"{dia.strftime('%d/%m')}: {q}")
-            return "Actividad (7d): " + " | ".join(partes)
+            return _texto_actividad(resumen_actividad())
         except Exception:
             current_app.logger.exception("bot actividad error")
             return "No pude obtener la actividad semanal."
 
     if intent == "publicadores":
         try:
-            n = Publicador.query.count()
-            return f"Ahora hay {n} publicadores."
+            return f"Ahora hay {resumen_actividad()['publicadores']} publicadores."
         except Exception:
             current_app.logger.exception("bot publicadores error")
             return "No pude leer la cantidad de publicadores."
 
     if intent == "pendientes":
         try:
-            n = SolicitudTurno.query.filter_by(estado="Pendiente").count()
-            return f"Solicitudes pendientes: {n}"
+            # SolicitudTurno no tiene estado: se informan todas (como /api/estadisticas)
+            return f"Solicitudes pendientes: {resumen_actividad()['solicitudes']}"
         except Exception:
             current_app.logger.exception("bot pendientes error")
             return "No pude consultar las solicitudes pendientes."
 
     if intent == "estado":
         try:
-            cpu = psutil.cpu_percent(interval=0.3)
-            mem = psutil.virtual_memory().percent
-            uptime_h = round((datetime.now().timestamp() - psutil.boot_time()) / 3600, 1)
-            return f"Servidor — CPU: {cpu}% | Mem: {mem}% | Uptime: {uptime_h}h"
+            m = MUESTREADOR.ultima()
+            return f"Servidor — CPU: {m['cpu']}% | Mem: {m['mem']}% | Uptime: {m['uptime_h']}h"
         except Exception:
             current_app.logger.exception("bot estado error")
             return "No pude obtener el estado del servidor."
 
     if intent == "notificaciones":
         try:
-            notifs = _read_json(NOTIF_FILE)[-5:]
+            notifs = NOTIFS.ultimos(5)
             if not notifs:
                 return "No hay notificaciones recientes."
             return "Últimas: " + " // ".join(n.get("texto","(sin texto)") for n in notifs)
@@ -308,60 +306,42 @@ def ppam_bot_v4_generate(user, texto):
     ]
     return random.choice(fallbacks)
 # --- respond_in_background corregida para V4 ---
+def _responder(user, trigger_text):
+    """
+    Genera y guarda la respuesta del bot (corre en un hilo de EJECUTOR_BOT).
+    Los errores llegan al ejecutor, que los registra y los cuenta.
+    """
+    # desde que empieza: un mensaje que llegue mientras tanto respeta el throttle
+    LAST_REPLY_AT[user] = time.time()
+    if "app" not in APP_OBJECT:
+        raise RuntimeError("BOT: APP_OBJECT sigue sin app")
+
+    # Usamos app.app_context() — NO current_app
+    flask_app = APP_OBJECT["app"]
+    with flask_app.app_context():
+        respuesta = ppam_bot_v4_generate(user, trigger_text)
+        if not respuesta:
+            return
+
+        # escribir mensaje del bot
+        CHAT.agregar({
+            "usuario": BOT_NAME,
+            "texto": respuesta,
+            "ts": datetime.now().isoformat()
+        })
+        _append_log(f"{BOT_NAME} respondió a {user}: {respuesta}")
+
+
 def respond_in_background(user, trigger_text, delay=0.8):
     """
-    Ejecuta la respuesta del bot en un thread seguro para PythonAnywhere.
-    Usa APP_OBJECT en lugar de current_app.
+    Programa la respuesta del bot en EJECUTOR_BOT (hilos fijos, cola acotada).
+    El "escribiendo..." es la demora de la tarea, no un hilo dormido. Si el
+    usuario manda varios mensajes antes de que el bot conteste, se responde
+    una sola vez al último; entre respuestas se respeta USER_THROTTLE_SECONDS.
     """
-    def worker():
-        print("BOT THREAD STARTED", user, trigger_text)
-        print(">>> APP_OBJECT asignado:", APP_OBJECT["app"])
-        try:
-            if "app" not in APP_OBJECT:
-                print("BOT: APP_OBJECT sigue sin app")
-                return
-
-            # throttle
-            now = time.time()
-            last = LAST_REPLY_AT.get(user, 0)
-            if now - last < USER_THROTTLE_SECONDS:
-                return
-
-            # typing delay
-            simulated = min(MAX_REPLY_DELAY, MIN_REPLY_DELAY + len(trigger_text) * 0.02)
-            time.sleep(simulated)
-
-            # Usamos app.app_context() — NO current_app
-            
-            flask_app = APP_OBJECT["app"]
-            with flask_app.app_context():
-            # ... aquí sigue tu código 
-            # with APP_OBJECT.app_context():
-                respuesta = ppam_bot_v4_generate(user, trigger_text)
-                if not respuesta:
-                    return
-
-                # escribir mensaje del bot
-                with CHAT_LOCK:
-                    msgs = _read_json(CHAT_FILE)
-                    new_id = (msgs[-1].get("id", 0) if msgs else 0) + 1
-                    msgs.append({
-                        "id": new_id,
-                        "usuario": BOT_NAME,
-                        "texto": respuesta,
-                        "ts": datetime.now().isoformat()
-                    })
-                    msgs = msgs[-1000:]
-                    _write_json(CHAT_FILE, msgs)
-                    _append_log(f"{BOT_NAME} respondió a {user}: {respuesta}")
-
-                LAST_REPLY_AT[user] = time.time()
-
-        except Exception as e:
-            print("ERROR en hilo BOT:", e)
-
-    t = threading.Thread(target=worker, daemon=True)
-    t.start()
+    simulated = min(MAX_REPLY_DELAY, MIN_REPLY_DELAY + len(trigger_text) * 0.02)
+    espera_throttle = LAST_REPLY_AT.get(user, 0) + USER_THROTTLE_SECONDS - time.time()
+    return EJECUTOR_BOT.programar(user, max(simulated, espera_throttle), _responder, user, trigger_text)
 
 
 # ---------------------------------------------------------
@@ -372,25 +352,34 @@ def respond_in_background(user, trigger_text, delay=0.8):
 def jinja_getattr(obj, name, default=None):
     return getattr(obj, name, default)
 # -------------------- Helpers --------------------
-# ---------------  Leer JASON --------------------------------
-
-def _read_json(path):
-    try:
-        with open(path, "r", encoding="utf-8") as fh:
-            return json.load(fh)
-    except Exception:
-        return []
+def _append_log(line):
+    REGISTRO.info(line)
 
 
-def _write_json(path, data):
-    with open(path, "w", encoding="utf-8") as fh:
-        json.dump(data, fh, ensure_ascii=False, indent=2, default=str)
+def _espera():
+    """Segundos de long-poll pedidos con ?wait= (0 = responder enseguida)."""
+    return max(0.0, min(request.args.get("wait", 0, type=float), LONGPOLL_MAX))
 
 
-def _append_log(line):
-    ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    with open(LOG_FILE, "a", encoding="utf-8") as fh:
-        fh.write(f"[{ts}] {line}\n")
+def _incremental(log, limite):
+    """
+    Sin cursor: los últimos `limite` registros (como antes).
+    Con ?since_id=N: solo los registros con id > N ([] si no hay nada nuevo),
+    esperando hasta ?wait= segundos. La ETag es (cursor, último id): un poll
+    repetido sin novedades se contesta 304.
+    """
+    since_id = request.args.get("since_id", type=int)
+    if since_id is None:
+        registros = log.ultimos(limite)
+    else:
+        espera = _espera()
+        registros = log.esperar(since_id, espera, limite) if espera else log.desde(since_id, limite)
+    ultimo = registros[-1].get("id", 0) if registros else max(since_id or 0, log.ultimo_visto())
+    resp = jsonify(registros)
+    resp.headers["X-Ultimo-Id"] = str(ultimo)
+    resp.headers["Cache-Control"] = "no-cache"
+    resp.set_etag(f"{since_id}-{ultimo}")
+    return resp.make_conditional(request)
 
 
 # -------------------- Rutas UI --------------------
@@ -407,55 +396,79 @@ def dashboard():
 @ppamtools_bp.route("/api/metrics")
 @login_required
 def metrics():
-    try:
-        total_publicadores = Publicador.query.count()
-    except Exception:
-        total_publicadores = 0
+    """
+    Última muestra de MUESTREADOR (sin consultas ni psutil en el request) y
+    la serie reciente (?n=, por defecto 60) para dibujar tendencias.
+    """
+    MUESTREADOR.iniciar(current_app._get_current_object())
+    m = MUESTREADOR.ultima()
+    n = max(0, min(request.args.get("n", 60, type=int), MUESTREADOR.historial.maxlen))
+    return jsonify({
+        "publicadores": m.get("publicadores", 0),
+        "asignaciones": m.get("asignaciones", 0),
+        "solicitudes": m.get("solicitudes", 0),
+        "cpu": m["cpu"],
+        "mem": m["mem"],
+        "uptime": m["uptime_h"],
+        "ts": m["ts"],
+        "intervalo": MUESTREADOR.intervalo,
+        "serie": [{"ts": s["ts"], "cpu": s["cpu"], "mem": s["mem"]} for s in MUESTREADOR.serie(n)],
+    })
 
-    try:
-        desde = datetime.now() - timedelta(days=30)
-        asignaciones = Turno.query.filter(Turno.fecha >= desde.date()).count()
-    except Exception:
-        asignaciones = 0
 
+@ppamtools_bp.route("/api/activity")
+@login_required
+def activity():
+    # formato original del gráfico (7 días); sale de la misma consulta agrupada
+    hoy = datetime.now().date()
     try:
-        solicitudes = SolicitudTurno.query.filter_by(estado="Pendiente").count()
+        buckets = metricas.actividad(hoy - timedelta(days=6), hoy)["buckets"]
     except Exception:
-        solicitudes = 0
+        current_app.logger.exception("activity error")
+        buckets = []
+    return jsonify([{"dia": b["etiqueta"], "valor": b["turnos"]} for b in buckets])
 
-    try:
-        cpu = psutil.cpu_percent(interval=0.5)
-        mem = psutil.virtual_memory().percent
-        uptime_seconds = datetime.now().timestamp() - psutil.boot_time()
-        uptime_h = round(uptime_seconds / 3600, 1)
-    except Exception:
-        cpu = mem = 0
-        uptime_h = 0
 
-    return jsonify({
-        "publicadores": total_publicadores,
-        "asignaciones": asignaciones,
-        "solicitudes": solicitudes,
-        "cpu": cpu,
-        "mem": mem,
-        "uptime": uptime_h,
-    })
+@ppamtools_bp.route("/api/actividad")
+@login_required
+def actividad():
+    """
+    Turnos de un rango agrupados por día, semana o mes, por punto y con
+    lugares ocupados / vacíos.
+    ?desde=AAAA-MM-DD&hasta=AAAA-MM-DD&agrupar=dia|semana|mes&punto_id=1&punto_id=2
+    (por defecto los últimos 7 días, por día)
+    """
+    if current_user.rol != "Admin":
+        abort(403)
+    try:
+        hasta = request.args.get("hasta")
+        hasta = datetime.strptime(hasta, "%Y-%m-%d").date() if hasta else datetime.now().date()
+        desde = request.args.get("desde")
+        desde = datetime.strptime(desde, "%Y-%m-%d").date() if desde else hasta - timedelta(days=6)
+        punto_ids = [int(p) for p in request.args.getlist("punto_id")]
+        return jsonify(metricas.actividad(desde, hasta, request.args.get("agrupar", "dia"), punto_ids))
+    except ValueError as e:
+        return jsonify({"ok": False, "error": str(e)}), 400
+
+
+# -------------------- Perfilador (SQL / latencia por endpoint) --------------------
+@ppamtools_bp.route("/api/perfil")
+@login_required
+def perfil():
+    if current_user.rol != "Admin":
+        abort(403)
+    return jsonify(dict(perfilador.resumen(), caches=cacheutils.estadisticas(),
+                        ejecutores=ejecutor.estadisticas()))
 
 
-@ppamtools_bp.route("/api/activity")
+@ppamtools_bp.route("/api/perfil/reiniciar", methods=["POST"])
 @login_required
-def activity():
-    hoy = datetime.now().date()
-    datos = []
-    for i in range(7):
-        dia = hoy - timedelta(days=i)
-        try:
-            count = Turno.query.filter(Turno.fecha == dia).count()
-        except Exception:
-            count = 0
-        datos.append({"dia": dia.strftime("%d/%m"), "valor": count})
-    datos.reverse()
-    return jsonify(datos)
+def perfil_reiniciar():
+    if current_user.rol != "Admin":
+        abort(403)
+    perfilador.reiniciar()
+    _append_log("Perfilador reiniciado por " + current_user.usuario)
+    return jsonify({"ok": True})
 
 
 # -------------------- Notificaciones (SSE + polling fallback) --------------------
@@ -468,13 +481,10 @@ def notificaciones_stream():
 @login_required
 def notificaciones_poll():
     try:
-        notifs = _read_json(NOTIF_FILE)
-        if not isinstance(notifs, list):
-            notifs = []
+        return _incremental(NOTIFS, 10)
     except Exception as e:
         _append_log(f"[WARN] notificaciones_poll error: {e}")
-        notifs = []
-    return jsonify(notifs[-10:])
+        return jsonify([])
 
 
 
@@ -486,11 +496,7 @@ def notificaciones_push():
     texto = data.get("texto")
     if not texto:
         return jsonify({"ok": False, "error": "Falta texto"}), 400
-    notifs = _read_json(NOTIF_FILE)
-    nid = (notifs[-1]["id"] + 1) if len(notifs) else 1
-    nuevo = {"id": nid, "texto": texto, "ts": datetime.now().isoformat(), "user": current_user.usuario}
-    notifs.append(nuevo)
-    _write_json(NOTIF_FILE, notifs)
+    nuevo = NOTIFS.agregar({"texto": texto, "ts": datetime.now().isoformat(), "user": current_user.usuario})
     _append_log(f"Notificación añadida: {texto}")
     return jsonify({"ok": True, "notif": nuevo})
 
@@ -499,9 +505,8 @@ def notificaciones_push():
 @ppamtools_bp.route("/chat/get")
 @login_required
 def chat_get():
-    msgs = _read_json(CHAT_FILE)
-    # devolver últimos 200
-    return jsonify(msgs[-200:])
+    # últimos 200, o solo los nuevos con ?since_id=
+    return _incremental(CHAT, 200)
 # --- Chat un poco mas constestador :) ----------------
 @ppamtools_bp.route("/chat/enviar", methods=["POST"])
 @login_required
@@ -512,18 +517,12 @@ def chat_enviar():
     if not texto:
         return jsonify({"status": "error", "msg": "Texto vacío"}), 400
 
-    # 1. Guardar mensaje del usuario
-    msgs = _read_json(CHAT_FILE)
-    nuevo_id = (msgs[-1].get("id", 0) + 1) if msgs else 1
-    nuevo = {
-        "id": nuevo_id,
+    # 1. Guardar mensaje del usuario (append atómico, sin reescribir el historial)
+    CHAT.agregar({
         "usuario": current_user.usuario,
         "texto": texto,
         "ts": datetime.now().isoformat()
-    }
-    msgs.append(nuevo)
-    msgs = msgs[-1000:]
-    _write_json(CHAT_FILE, msgs)
+    })
 
     # 2. BOT en background
     try:
@@ -536,21 +535,48 @@ def chat_enviar():
 @ppamtools_bp.route("/logs")
 @login_required
 def logs():
+    """
+    Últimas ?lines= líneas del log (500 por defecto), o con ?since_offset=N
+    (&inode=&huella= del cursor anterior) solo lo escrito desde el byte N,
+    esperando hasta ?wait= segundos. Los headers X-Log-Offset / X-Log-Inode /
+    X-Log-Huella traen el próximo cursor; X-Log-Reset: 1 avisa que el log se
+    limpió o rotó y el texto reemplaza al anterior.
+    """
+    desde = request.args.get("since_offset", type=int)
     try:
-        with open(LOG_FILE, "r", encoding="utf-8") as fh:
-            txt = fh.read()
+        if desde is None:
+            r = logtail.cola(LOG_FILE, max(1, min(request.args.get("lines", 500, type=int), 5000)))
+        else:
+            inodo = request.args.get("inode", type=int)
+            huella = request.args.get("huella", type=int)
+            limite_t = time.monotonic() + _espera()
+            while True:
+                r = logtail.leer_desde(LOG_FILE, desde, inodo, huella)
+                if r["texto"] or r["reset"] or time.monotonic() >= limite_t:
+                    break
+                time.sleep(0.5)
     except Exception:
-        txt = ""
-    return Response(txt, mimetype="text/plain; charset=utf-8")
+        r = {"texto": "", "offset": 0, "inodo": None, "huella": None, "reset": False}
+    resp = Response(r["texto"], mimetype="text/plain; charset=utf-8")
+    resp.headers["X-Log-Offset"] = str(r["offset"])
+    if r["inodo"] is not None:
+        resp.headers["X-Log-Inode"] = str(r["inodo"])
+    if r["huella"] is not None:
+        resp.headers["X-Log-Huella"] = str(r["huella"])
+    if r["reset"]:
+        resp.headers["X-Log-Reset"] = "1"
+    return resp
 # -------------- LOGS LIMPIAR ------------------------
 @ppamtools_bp.route("/logs/limpiar", methods=["POST"])
 @login_required
 def logs_limpiar():
+    # se rota en lugar de truncar: lo anterior queda en ppamtools.log.<fecha>.gz
     try:
-        open(LOG_FILE, "w", encoding="utf-8").close()
+        REGISTRO.handlers[0].flush()
+        registro.rotar(LOG_FILE)
         _append_log("Logs limpiados por " + current_user.usuario)
     except Exception:
-        pass
+        current_app.logger.exception("No se pudo rotar " + LOG_FILE)
     return jsonify({"ok": True})
 
 # -------------------- Archivos estáticos (si necesitás servir desde blueprint) --------------------
@@ -0,0 +1,237 @@
+# registro.py
+# Logs propios de la app: escritura con buffer, rotación por tamaño o por día,
+# segmentos viejos comprimidos con gzip y retención.
+#
+# Antes cada línea abría y cerraba el archivo (_append_log) y "limpiar" era
+# truncar: se perdía todo el historial. Ahora:
+#   - ArchivoRotativo (logging.Handler) junta las líneas en memoria y las
+#     escribe en bloque cada `buffer` registros, cada `flush_segundos` (hilo
+#     de fondo) o enseguida si son WARNING o más graves;
+#   - al escribir, si el archivo pasó de max_bytes o es de un día anterior, se
+#     rota: el segmento actual pasa a <log>.AAAAMMDD-HHMMSS.gz;
+#   - la rotación se serializa con flock sobre <log>.lock: entre workers solo
+#     uno rota, y como cada bloque se escribe abriendo con O_APPEND, los demás
+#     escriben directamente en el archivo nuevo;
+#   - retención: se conservan los últimos `conservar` segmentos y ninguno de
+#     más de `dias` días.
+#
+# rotar(ruta, copiar_y_truncar=True) sirve para logs que escribe otro proceso
+# (los de PythonAnywhere): copia comprimida y después trunca, como logrotate.
+#
+# Uso:
+#   log = logger_archivo("ppamtools", LOG_FILE)      # logging.Logger
+#   log.info("algo pasó")
+#   rotar(LOG_FILE)                                  # en vez de truncar
+#   podar("/ruta/bot_pipeline_*.txt", conservar=50)  # solo retención
+#
+# Equipo de desarrollo PPAM
+
+import os
+import glob
+import gzip
+import time
+import shutil
+import atexit
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import datetime, date
+
+try:
+    import fcntl
+except ImportError:     # Windows: solo el lock entre hilos
+    fcntl = None
+
+MAX_BYTES = 1024 * 1024
+CONSERVAR = 10
+DIAS = 30
+
+_LOCK = threading.Lock()
+_HANDLERS = []
+
+
+@contextmanager
+def _bloqueo(ruta):
+    with _LOCK:
+        with open(f"{ruta}.lock", "a") as fh:
+            if fcntl is not None:
+                fcntl.flock(fh, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+def _comprimir(origen, destino):
+    with open(origen, "rb") as src, gzip.open(destino, "wb", compresslevel=6) as dst:
+        shutil.copyfileobj(src, dst)
+
+
+def segmentos(ruta):
+    """Segmentos comprimidos de `ruta`, del más viejo al más nuevo."""
+    return sorted(glob.glob(glob.escape(ruta) + ".*.gz"))
+
+
+def podar(patron, conservar=CONSERVAR, dias=DIAS):
+    """Borra los archivos de `patron` que sobren (más viejos primero) o superen `dias`."""
+    archivos = sorted(glob.glob(patron), key=lambda p: os.path.getmtime(p))
+    limite = time.time() - dias * 86400 if dias else None
+    sobran = len(archivos) - conservar if conservar is not None else 0
+    borrados = 0
+    for i, p in enumerate(archivos):
+        try:
+            if i < sobran or (limite is not None and os.path.getmtime(p) < limite):
+                os.remove(p)
+                borrados += 1
+        except OSError:
+            continue
+    return borrados
+
+
+def _rotar_bloqueado(ruta, copiar_y_truncar, conservar, dias):
+    if not os.path.exists(ruta) or os.path.getsize(ruta) == 0:
+        return None
+    destino = f"{ruta}.{datetime.now().strftime('%Y%m%d-%H%M%S')}.gz"
+    n = 1
+    while os.path.exists(destino):
+        destino = f"{ruta}.{datetime.now().strftime('%Y%m%d-%H%M%S')}-{n}.gz"
+        n += 1
+    if copiar_y_truncar:
+        _comprimir(ruta, destino)
+        with open(ruta, "r+b") as fh:
+            fh.truncate(0)
+    else:
+        apartado = f"{ruta}.{os.getpid()}.rotando"
+        os.replace(ruta, apartado)
+        open(ruta, "ab").close()
+        try:
+            _comprimir(apartado, destino)
+        finally:
+            os.remove(apartado)
+    podar(glob.escape(ruta) + ".*.gz", conservar, dias)
+    return destino
+
+
+def rotar(ruta, copiar_y_truncar=False, conservar=CONSERVAR, dias=DIAS):
+    """
+    Rota `ruta` ya: el contenido pasa a un segmento .gz y el log queda vacío.
+    copiar_y_truncar=True para archivos que otro proceso mantiene abiertos.
+    Devuelve la ruta del segmento (None si no había nada).
+    """
+    with _bloqueo(ruta):
+        return _rotar_bloqueado(ruta, copiar_y_truncar, conservar, dias)
+
+
+class ArchivoRotativo(logging.Handler):
+    """Handler con buffer, rotación por tamaño / día y segmentos gzip."""
+
+    def __init__(self, ruta, max_bytes=MAX_BYTES, diario=True, conservar=CONSERVAR, dias=DIAS,
+                 buffer=50, flush_segundos=2.0):
+        super().__init__()
+        self.ruta = ruta
+        self.max_bytes = max_bytes
+        self.diario = diario
+        self.conservar = conservar
+        self.dias = dias
+        self.capacidad = buffer
+        self.flush_segundos = flush_segundos
+        self._pendientes = []
+        self._ultimo_flush = time.monotonic()
+        os.makedirs(os.path.dirname(os.path.abspath(ruta)), exist_ok=True)
+        _HANDLERS.append(self)
+        _asegurar_hilo()
+
+    def emit(self, record):
+        if _HILO["pid"] != os.getpid():
+            _asegurar_hilo()        # proceso hijo de un fork: el hilo no vino
+        try:
+            linea = self.format(record) + "\n"
+        except Exception:
+            self.handleError(record)
+            return
+        with self.lock:
+            self._pendientes.append(linea)
+            urgente = record.levelno >= logging.WARNING
+        if urgente or len(self._pendientes) >= self.capacidad:
+            self.flush()
+
+    def _debe_rotar(self):
+        try:
+            st = os.stat(self.ruta)
+        except OSError:
+            return False
+        if st.st_size == 0:
+            return False
+        if st.st_size >= self.max_bytes:
+            return True
+        return self.diario and date.fromtimestamp(st.st_mtime) < date.today()
+
+    def flush(self):
+        with self.lock:
+            if not self._pendientes:
+                return
+            datos = "".join(self._pendientes).encode("utf-8")
+            self._pendientes = []
+            self._ultimo_flush = time.monotonic()
+            try:
+                with _bloqueo(self.ruta):
+                    if self._debe_rotar():
+                        _rotar_bloqueado(self.ruta, False, self.conservar, self.dias)
+                    # O_APPEND por escritura: siempre al final del archivo vigente
+                    fd = os.open(self.ruta, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+                    try:
+                        os.write(fd, datos)
+                    finally:
+                        os.close(fd)
+            except OSError:
+                logging.getLogger("ppam.registro").exception("No se pudo escribir %s", self.ruta)
+
+    def vencido(self):
+        return self._pendientes and time.monotonic() - self._ultimo_flush >= self.flush_segundos
+
+    def close(self):
+        self.flush()
+        if self in _HANDLERS:
+            _HANDLERS.remove(self)
+        super().close()
+
+
+_HILO = {"pid": None}
+
+
+def _ciclo_flush():
+    while True:
+        time.sleep(0.5)
+        for h in list(_HANDLERS):
+            if h.vencido():
+                h.flush()
+
+
+def _asegurar_hilo():
+    with _LOCK:
+        if _HILO["pid"] == os.getpid():
+            return
+        _HILO["pid"] = os.getpid()
+    threading.Thread(target=_ciclo_flush, name="ppam-registro", daemon=True).start()
+
+
+@atexit.register
+def _flush_todo():
+    for h in list(_HANDLERS):
+        h.flush()
+
+
+def logger_archivo(nombre, ruta, formato="[%(asctime)s] %(message)s", datefmt="%Y-%m-%d %H:%M:%S", **opciones):
+    """
+    Logger `ppam.<nombre>` que escribe en `ruta` con ArchivoRotativo (no se
+    propaga al logger raíz). Llamarlo dos veces devuelve el mismo.
+    """
+    logger = logging.getLogger(f"ppam.{nombre}")
+    if not any(isinstance(h, ArchivoRotativo) and h.ruta == ruta for h in logger.handlers):
+        h = ArchivoRotativo(ruta, **opciones)
+        h.setFormatter(logging.Formatter(formato, datefmt=datefmt))
+        logger.addHandler(h)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+    return logger
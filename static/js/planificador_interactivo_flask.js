@@ -11,8 +11,9 @@
   const apiBasePost   = "/api/postulantes";
 
   // safeFetch: wrapper que usa jQuery.ajax y devuelve Promise que resuelve JSON (o lanza error)
+  // con opts.withHeaders resuelve { data, header(nombre) } para leer headers de la respuesta
   function safeFetch(url, opts = {}) {
-    // opts can include method, headers, body (object or string)
+    // opts can include method, headers, body (object or string), withHeaders
     const method = (opts.method || "GET").toUpperCase();
     const contentType = (opts.headers && opts.headers["Content-Type"]) || opts.contentType || "application/json";
     let data = opts.body;
@@ -30,8 +31,8 @@
         contentType: contentType,
         processData: false, // we'll send stringified JSON or FormData; let jQuery not process by default
         dataType: "json",
-        success: function (resp) {
-          resolve(resp);
+        success: function (resp, textStatus, jqXHR) {
+          resolve(opts.withHeaders ? { data: resp, header: (nombre) => jqXHR.getResponseHeader(nombre) } : resp);
         },
         error: function (jqXHR, textStatus, errorThrown) {
           // try parse JSON error body if possible
@@ -198,9 +199,16 @@
 
     async function cargarTurnos() {
       try {
-        const url = `${apiBaseTurnos}?accion=listar`;
-        const data = await safeFetch(url);
-        turnos = Array.isArray(data) ? data : [];
+        // listar pagina por cursor (header X-Next-Cursor): se recorren todas las páginas
+        const url = `${apiBaseTurnos}?accion=listar&limite=1000`;
+        const todos = [];
+        let cursor = null;
+        do {
+          const res = await safeFetch(cursor ? `${url}&cursor=${encodeURIComponent(cursor)}` : url, { withHeaders: true });
+          if (Array.isArray(res.data)) todos.push(...res.data);
+          cursor = res.header("X-Next-Cursor");
+        } while (cursor);
+        turnos = todos;
       } catch (err) {
         console.error("Error cargarTurnos:", err);
         turnos = [];
@@ -29,8 +29,38 @@ async function cargarWidgets(){
     document.getElementById('w_cpu').innerText = d.cpu;
     document.getElementById('w_mem').innerText = d.mem;
     document.getElementById('w_uptime').innerText = d.uptime;
+    dibujarSerie(d.serie || []);
   }catch(e){ console.warn(e) }
 }
+
+// tendencia de CPU / MEM con la serie que ya trae /api/metrics (sin pedidos extra)
+let serieChart = null;
+function dibujarSerie(serie){
+  const ctx = document.getElementById('w_serie');
+  if (!ctx || typeof Chart === 'undefined') return;
+  const labels = serie.map(s => new Date(s.ts * 1000).toLocaleTimeString());
+  const cpu = serie.map(s => s.cpu);
+  const mem = serie.map(s => s.mem);
+  if (!serieChart) {
+    serieChart = new Chart(ctx, {
+      type: 'line',
+      data: { labels, datasets: [
+        { label: 'CPU', data: cpu, borderWidth: 1, pointRadius: 0, fill: false },
+        { label: 'MEM', data: mem, borderWidth: 1, pointRadius: 0, fill: false },
+      ]},
+      options: {
+        animation: false,
+        plugins: { legend: { display:false } },
+        scales: { x: { display:false }, y: { display:false, min: 0, max: 100 } }
+      }
+    });
+  } else {
+    serieChart.data.labels = labels;
+    serieChart.data.datasets[0].data = cpu;
+    serieChart.data.datasets[1].data = mem;
+    serieChart.update();
+  }
+}
 setInterval(cargarWidgets, 15000);
 cargarWidgets();
 
@@ -40,17 +70,27 @@ cargarWidgets();
 
 let graficoChart = null;
 
+function isoLocal(d){
+  return `${d.getFullYear()}-${String(d.getMonth() + 1).padStart(2, '0')}-${String(d.getDate()).padStart(2, '0')}`;
+}
+
 async function grafico(){
   try{
-    const res = await fetch('/ppamtools/api/activity');
+    // ventana elegida: "<días>-<agrupación>" (una consulta agrupada en el servidor)
+    const sel = document.getElementById('grafico_ventana');
+    const [dias, agrupar] = (sel ? sel.value : '7-dia').split('-');
+    const hasta = new Date();
+    const desde = new Date(hasta.getTime() - (parseInt(dias, 10) - 1) * 86400000);
+    const res = await fetch(`/ppamtools/api/actividad?desde=${isoLocal(desde)}&hasta=${isoLocal(hasta)}&agrupar=${agrupar}`);
     if (!res.ok) return;
 
-    const datos = await res.json();
+    const datos = (await res.json()).buckets;
     const ctx = document.getElementById('grafico_semanal');
     if (!ctx) return;
 
-    const labels = datos.map(x => x.dia);
-    const valores = datos.map(x => x.valor);
+    const labels = datos.map(x => x.etiqueta);
+    const valores = datos.map(x => x.turnos);
+    const vacios = datos.map(x => x.turnos_vacios);
 
     if (!graficoChart) {
       // Crear UNA sola instancia
@@ -64,17 +104,24 @@ async function grafico(){
             borderWidth: 3,
             tension: 0.3,
             fill: false
+          }, {
+            label: 'Sin publicadores',
+            data: vacios,
+            borderWidth: 2,
+            tension: 0.3,
+            fill: false
           }]
         },
         options: {
           animation: false,
-          plugins: { legend: { display:false } }
+          plugins: { legend: { display:true, position:'bottom' } }
         }
       });
     } else {
       // Actualizar sin recrear
       graficoChart.data.labels = labels;
       graficoChart.data.datasets[0].data = valores;
+      graficoChart.data.datasets[1].data = vacios;
       graficoChart.update();
     }
 
@@ -86,6 +133,8 @@ async function grafico(){
 // actualizar gráfico cada 30 s (suficiente)
 grafico();
 setInterval(grafico, 30000);
+const graficoVentana = document.getElementById('grafico_ventana');
+if (graficoVentana) graficoVentana.addEventListener('change', grafico);
 
 
 // ----------------- NOTIFICACIONES SOLO POLLING -----------------
@@ -125,14 +174,22 @@ try{
   useSSE = true;
 }catch(e){ fallbackNoti(); }
    */
+// cursor: id de la última notificación vista (null = todavía no se pidió)
+let notifUltimoId = null;
 async function fallbackNoti(){
 	setInterval(async () => {
     try {
-      const r = await fetch('/ppamtools/notificaciones_poll');
+      // la primera vez solo se toma el cursor; después llegan únicamente las nuevas
+      const url = notifUltimoId === null ? '/ppamtools/notificaciones_poll'
+                                         : `/ppamtools/notificaciones_poll?since_id=${notifUltimoId}`;
+      const r = await fetch(url);
+      if (r.status === 304 || !r.ok) return;
       const arr = await r.json();
+      const primera = notifUltimoId === null;
+      notifUltimoId = parseInt(r.headers.get('X-Ultimo-Id') || '0', 10);
 
       // mostrar SOLO las últimas 5 para evitar spam
-      arr.slice(-5).forEach(a => mostrarNotificacion(a));
+      if (!primera) arr.slice(-5).forEach(a => mostrarNotificacion(a));
 
     } catch (e) {
       console.warn("Error en notificaciones_poll", e);
@@ -147,21 +204,43 @@ if (chatBtn) chatBtn.addEventListener('click', ()=> chatBox.classList.toggle('d-
 const chatClose = document.getElementById('chat-close');
 if (chatClose) chatClose.addEventListener('click', ()=> chatBox.classList.add('d-none'));
 
-async function cargarChat(){
+// cursor del chat: la primera carga trae los últimos 200, después solo los nuevos
+let chatUltimoId = null;
+async function cargarChat(espera = 0){
   try{
-    const r = await fetch('/ppamtools/chat/get');
+    const url = chatUltimoId === null ? '/ppamtools/chat/get'
+                                      : `/ppamtools/chat/get?since_id=${chatUltimoId}&wait=${espera}`;
+    const r = await fetch(url);
+    if (r.status === 304) return true;
+    if (!r.ok) return false;
     const msgs = await r.json();
     const box = document.getElementById('chat-mensajes');
-    box.innerHTML = '';
-    msgs.slice(-200).forEach(m => {
+    if (chatUltimoId === null) box.innerHTML = '';
+    msgs.forEach(m => {
+      // un envío y un long-poll pueden traer el mismo mensaje
+      if (chatUltimoId !== null && m.id <= chatUltimoId) return;
       const div = document.createElement('div');
       div.innerHTML = `<small><strong>${m.usuario}</strong> <span class="text-muted">${new Date(m.ts).toLocaleString()}</span></small><div>${m.texto}</div><hr/>`;
       box.appendChild(div);
+      chatUltimoId = m.id;
     });
-    box.scrollTop = box.scrollHeight;
-  }catch(e){ console.warn(e) }
+    if (chatUltimoId === null) chatUltimoId = parseInt(r.headers.get('X-Ultimo-Id') || '0', 10);
+    while (box.children.length > 200) box.removeChild(box.firstChild);
+    if (msgs.length) box.scrollTop = box.scrollHeight;
+    return true;
+  }catch(e){ console.warn(e); return false; }
+}
+// con el chat abierto se usa long-poll (responde apenas hay un mensaje);
+// cerrado, un poll corto cada 3 s que casi siempre vuelve vacío
+async function cicloChat(){
+  await cargarChat();
+  while (true){
+    const abierto = chatBox && !chatBox.classList.contains('d-none');
+    const ok = await cargarChat(abierto ? 20 : 0);
+    if (!abierto || !ok) await new Promise(res => setTimeout(res, 3000));
+  }
 }
-setInterval(cargarChat, 3000); cargarChat();
+cicloChat();
 
 const chatSend = document.getElementById('chat-send');
 if (chatSend) chatSend.addEventListener('click', async ()=>{
@@ -176,19 +255,80 @@ if (chatSend) chatSend.addEventListener('click', async ()=>{
 const chatInput = document.getElementById('chat-texto');
 if (chatInput) chatInput.addEventListener('keydown', async (e)=>{ if (e.key==='Enter'){ e.preventDefault(); chatSend.click(); } });
 
+// ----------------- PERFILADOR -----------------
+async function cargarPerfil(){
+  try{
+    const r = await fetch('/ppamtools/api/perfil');
+    if (!r.ok) return;
+    const d = await r.json();
+    const tbody = document.getElementById('perfil_endpoints');
+    if (!tbody) return;
+    tbody.innerHTML = '';
+    d.endpoints.forEach(e => {
+      const tr = document.createElement('tr');
+      [e.endpoint, e.requests, e.consultas_prom, e.consultas_p95, e.consultas_max,
+       e.db_ms_p50, e.db_ms_p95, e.total_ms_p50, e.total_ms_p95, e.total_ms_p99].forEach(v => {
+        const td = document.createElement('td');
+        td.innerText = v;
+        tr.appendChild(td);
+      });
+      tbody.appendChild(tr);
+    });
+    if (!d.endpoints.length) tbody.innerHTML = '<tr><td colspan="10">Sin datos todavía</td></tr>';
+    document.getElementById('perfil_umbral').innerText = d.umbral_lenta_ms;
+    document.getElementById('perfil_lentas').innerText = d.lentas.length
+      ? d.lentas.map(l => `[${new Date(l.ts * 1000).toLocaleTimeString()}] ${l.ms} ms ${l.endpoint || '-'}: ${l.sql}`).join('\n')
+      : 'Ninguna';
+    const caches = document.getElementById('perfil_caches');
+    if (caches) caches.innerText = (d.caches || []).length
+      ? d.caches.map(c => `${c.nombre}: ${c.entradas}/${c.maximo} entradas, ${c.aciertos} aciertos, ${c.fallos} fallos`
+          + (c.tasa_aciertos !== null ? ` (${Math.round(c.tasa_aciertos * 100)}%)` : '')).join(' · ')
+      : '–';
+    const ejecutores = document.getElementById('perfil_ejecutores');
+    if (ejecutores) ejecutores.innerText = (d.ejecutores || []).length
+      ? d.ejecutores.map(e => `${e.nombre}: ${e.en_cola}/${e.max_cola} en cola, ${e.programadas} programadas, `
+          + `${e.activas}/${e.trabajadores} activas, ${e.procesadas} procesadas, ${e.coalescidas} coalescidas, `
+          + `${e.descartadas} descartadas`).join(' · ')
+      : '–';
+  }catch(e){ console.warn(e) }
+}
+setInterval(cargarPerfil, 15000); cargarPerfil();
+
+async function reiniciarPerfil(){
+  await fetch('/ppamtools/api/perfil/reiniciar', { method:'POST' });
+  cargarPerfil();
+}
+
 // ----------------- LOGS -----------------
+// cursor (offset en bytes + inodo + huella) de lo ya mostrado: cada poll trae solo lo nuevo
+let logsCursor = null;
+const LOGS_MAX_CHARS = 200000;
 async function cargarLogs(){
   try{
-    const r = await fetch('/ppamtools/logs');
+    const url = logsCursor === null ? '/ppamtools/logs'
+      : `/ppamtools/logs?since_offset=${logsCursor.offset}&inode=${logsCursor.inodo}&huella=${logsCursor.huella}`;
+    const r = await fetch(url);
     const txt = await r.text();
     const pre = document.getElementById('logs_sistema');
-    if (pre) pre.innerText = txt;
+    const completo = logsCursor === null || r.headers.get('X-Log-Reset') === '1';
+    logsCursor = {
+      offset: r.headers.get('X-Log-Offset') || '0',
+      inodo: r.headers.get('X-Log-Inode') || '',
+      huella: r.headers.get('X-Log-Huella') || '',
+    };
+    if (!pre) return;
+    if (completo) pre.innerText = txt;
+    else if (txt) {
+      pre.innerText += txt;
+      if (pre.innerText.length > LOGS_MAX_CHARS) pre.innerText = pre.innerText.slice(-LOGS_MAX_CHARS);
+    }
   }catch(e){ console.warn(e) }
 }
 setInterval(cargarLogs, 5000); cargarLogs();
 
 async function limpiarLogs(){
   await fetch('/ppamtools/logs/limpiar', { method:'POST' });
+  logsCursor = null;
   cargarLogs();
 }
 
@@ -14,6 +14,7 @@ import datetime
 import textwrap
 import curses
 import envloader
+import registro
 
 # Carga automática de var.env
 envloader.load_env()
@@ -47,18 +48,21 @@ def api_post(path, json_body=None):
 
 # ----- Utilities -----
 def limpiar_logs():
+    # rota (copia .gz + truncado, con retención) en lugar de vaciar sin historial
     root = os.path.expanduser("~/logs")
     count = 0
     for path, _, files in os.walk(root):
         for f in files:
             full = os.path.join(path, f)
+            if f.endswith((".gz", ".lock")):
+                continue
             try:
                 if os.path.getsize(full) > 1_000_000:
-                    open(full, "w").close()
+                    registro.rotar(full, copiar_y_truncar=True)
                     count += 1
             except Exception:
                 continue
-    return f"Truncated {count} log files in {root}"
+    return f"Rotated {count} log files in {root} (old segments kept as .gz)"
 
 def backup_mysite():
     target = os.path.expanduser(f"/home/{USER}/mysite")
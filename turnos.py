@@ -1,7 +1,10 @@
 # turnos.py
-from flask import Blueprint, request, jsonify, render_template, session
+import json
+from flask import Blueprint, request, jsonify, render_template, session, Response, stream_with_context
 from extensiones import db
 from modelos import Turno, PuntoPredicacion, Publicador, SolicitudTurno
+from paginacion import leer_parametros, paginar, headers_paginacion
+from validador import validar_rango
 from datetime import datetime, date, time
 from flask_login import (
     LoginManager,
@@ -11,14 +14,103 @@ from flask_login import (
     current_user,
 )
 
+try:
+    import orjson  # opcional: encoder JSON en C
+except ImportError:
+    orjson = None
+
 bp_turnos = Blueprint("turnos", __name__, url_prefix="/api")
 
+# filas que se leen de la DB por tanda al serializar listados largos
+FILAS_POR_TANDA = 500
+
 def time_to_str(t):
     return t.strftime("%H:%M") if t else ""
 
 def date_to_iso(d):
     return d.isoformat() if d else None
 
+# -----------------------------------------------------------
+# Proyección liviana para los listados JSON
+# -----------------------------------------------------------
+# Solo las columnas que usa turno_to_dict, con un único JOIN a
+# puntos_predicacion. No se hidratan objetos Turno (ni su relación
+# joined `punto`): cada fila es una tupla de SQLAlchemy.
+TURNO_COLUMNAS = (
+    Turno.id,
+    Turno.punto_id,
+    PuntoPredicacion.punto_nombre,
+    Turno.fecha,
+    Turno.dia,
+    Turno.hora_inicio,
+    Turno.hora_fin,
+    Turno.publicador1_id,
+    Turno.publicador2_id,
+    Turno.publicador3_id,
+    Turno.publicador4_id,
+    Turno.capitan_id,
+    Turno.is_public,
+)
+
+def turnos_proyeccion():
+    """Query de columnas de Turno + nombre del punto (LEFT JOIN)."""
+    return (
+        db.session.query(*TURNO_COLUMNAS)
+        .outerjoin(PuntoPredicacion, PuntoPredicacion.id == Turno.punto_id)
+    )
+
+def fila_to_dict(r):
+    """Mismo formato que turno_to_dict, pero a partir de una fila proyectada."""
+    return {
+        "id": r.id,
+        "punto_id": r.punto_id,
+        "punto": r.punto_nombre,
+        "fecha": date_to_iso(r.fecha),
+        "dia": r.dia,
+        "hora_inicio": time_to_str(r.hora_inicio),
+        "hora_fin": time_to_str(r.hora_fin),
+        "publicador1": r.publicador1_id,
+        "publicador2": r.publicador2_id,
+        "publicador3": r.publicador3_id,
+        "publicador4": r.publicador4_id,
+        "capitan": r.capitan_id,
+        "is_public": bool(r.is_public)
+    }
+
+def _dumps(obj):
+    if orjson is not None:
+        return orjson.dumps(obj).decode("utf-8")
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+def _stream_por_fecha(q):
+    """
+    Genera {"YYYY-MM-DD": [turnos...], ...} sin armar el dict completo.
+    Requiere que la query venga ordenada por fecha.
+    """
+    buf = ["{"]
+    fecha_actual = None
+    for r in q.yield_per(FILAS_POR_TANDA):
+        key = date_to_iso(r.fecha)
+        if key != fecha_actual:
+            if fecha_actual is not None:
+                buf.append("],")
+            buf.append(_dumps(key) + ":[")
+            fecha_actual = key
+        else:
+            buf.append(",")
+        buf.append(_dumps(fila_to_dict(r)))
+        if len(buf) >= FILAS_POR_TANDA:
+            yield "".join(buf)
+            buf = []
+    if fecha_actual is not None:
+        buf.append("]")
+    buf.append("}")
+    yield "".join(buf)
+
+def json_stream(gen):
+    """Respuesta chunked (sin Content-Length) a partir de un generador."""
+    return Response(stream_with_context(gen), mimetype="application/json")
+
 def turno_to_dict(t: Turno):
     return {
         "id": t.id,
@@ -48,7 +140,7 @@ def api_turnos():
         punto_id = request.args.get("punto", type=int)
         fecha = request.args.get("fecha")
 
-        q = Turno.query
+        q = turnos_proyeccion()
 
         if punto_id:
             q = q.filter(Turno.punto_id == punto_id)
@@ -60,9 +152,32 @@ def api_turnos():
             except:
                 pass
 
-        turnos = q.order_by(Turno.fecha, Turno.hora_inicio).all()
-        data = [turno_to_dict(t) for t in turnos]
-        return jsonify(data)
+        limite, cursor, con_total = leer_parametros(sin_limite=True)
+        pagina = paginar(q, [Turno.fecha, Turno.hora_inicio, Turno.id], cursor, limite, con_total)
+        resp = jsonify([fila_to_dict(r) for r in pagina["items"]])
+        resp.headers.update(headers_paginacion(pagina))
+        return resp
+    # ---------------------
+    # VALIDAR un rango (todos los puntos o uno)
+    # GET /api/turnos?accion=validar&desde=YYYY-MM-DD[&hasta=YYYY-MM-DD][&punto=#]
+    # ---------------------
+    if accion == "validar":
+        if current_user.rol != "Admin":
+            return jsonify({"ok": False, "error": "No autorizado"}), 403
+        try:
+            desde = datetime.strptime(request.args.get("desde", ""), "%Y-%m-%d").date()
+            hasta = request.args.get("hasta")
+            hasta = datetime.strptime(hasta, "%Y-%m-%d").date() if hasta else None
+        except ValueError:
+            return jsonify({"ok": False, "error": "desde/hasta inválidos (YYYY-MM-DD)"}), 400
+        if hasta and hasta < desde:
+            return jsonify({"ok": False, "error": "hasta es anterior a desde"}), 400
+        if hasta and (hasta - desde).days > 92:
+            return jsonify({"ok": False, "error": "rango máximo: 93 días"}), 400
+
+        punto_id = request.args.get("punto", type=int)
+        res = validar_rango(desde, hasta, punto_ids=[punto_id] if punto_id else None)
+        return jsonify(res.como_dict())
     if accion == "solicitar":
         data = request.get_json() or {}
         turno_id = data.get("turno_id")
@@ -126,7 +241,7 @@ def api_turnos():
         except Exception:
             return jsonify({"error":"Formato de fecha inválido. Use YYYY-MM-DD"}), 400
 
-        q = Turno.query
+        q = turnos_proyeccion()
 
         # Filtros
         if fecha_desde:
@@ -136,14 +251,9 @@ def api_turnos():
         if punto_id:
             q = q.filter(Turno.punto_id == punto_id)
 
+        # ordenado por fecha: el stream agrupa sin armar el dict en memoria
         q = q.order_by(Turno.fecha, Turno.hora_inicio)
-        turnos = q.all()
-
-        out = {}
-        for t in turnos:
-            key = date_to_iso(t.fecha)
-            out.setdefault(key, []).append(turno_to_dict(t))
-        return jsonify(out)
+        return json_stream(_stream_por_fecha(q))
     # ---------------------
     # GET por id
     # ---------------------
@@ -0,0 +1,262 @@
+# validador.py
+# Motor de validación de turnos para cualquier rango de fechas y todos los puntos.
+#
+# Reglas (configurables en config.json):
+#   - turno sin capitán / sin publicadores / con un solo publicador
+#     (alerta = error, advertencia, cualquier otro valor = no se controla)
+#   - cantidad mínima de publicadores por turno
+#   - turnos consecutivos o solapados del mismo publicador en el día
+#   - más de un turno por día (o más de dos si dos_turnos_mismo_dia)
+#   - mismo publicador en dos puntos a la vez (solo se ve validando todos los
+#     puntos juntos; validar_turnos por punto no lo detectaba), con el nivel de
+#     alerta_dos_turnos; acá el capitán cuenta como asignado al turno
+#
+# Los turnos se leen en una consulta de columnas; cada publicador queda con
+# sus turnos ordenados por (fecha, hora) y las reglas por día se resuelven
+# recorriendo esa lista una vez.
+#
+# Uso:
+#   res = validar_rango(desde, hasta)                 # todos los puntos
+#   res = validar(turnos, Reglas.desde_config(cfg))   # turnos ya cargados
+#   res.como_dict()     -> JSON para la UI / API / bot
+#   res.como_tupla()    -> (errores, advertencias, marcados) de validar_turnos
+#
+# Equipo de desarrollo PPAM
+
+from datetime import timedelta
+
+from extensiones import db
+from modelos import Turno
+
+ERROR = "error"
+ADVERTENCIA = "advertencia"
+
+COLUMNAS = (
+    Turno.id, Turno.punto_id, Turno.fecha, Turno.dia, Turno.hora_inicio, Turno.hora_fin,
+    Turno.publicador1_id, Turno.publicador2_id, Turno.publicador3_id, Turno.publicador4_id,
+    Turno.capitan_id,
+)
+
+
+def _nivel(modo):
+    return {"alerta": ERROR, "advertencia": ADVERTENCIA}.get(modo)
+
+
+class Reglas:
+    """Reglas ya resueltas desde la configuración (se arman una vez por validación)."""
+
+    def __init__(self, sin_capitan=ADVERTENCIA, sin_publicadores=ADVERTENCIA, un_publicador=ADVERTENCIA,
+                 min_publicadores=2, turnos_consecutivos=False, dos_turnos_mismo_dia=False, dos_puntos=ERROR):
+        self.sin_capitan = sin_capitan
+        self.sin_publicadores = sin_publicadores
+        self.un_publicador = un_publicador
+        self.min_publicadores = min_publicadores
+        self.turnos_consecutivos = turnos_consecutivos
+        self.dos_turnos_mismo_dia = dos_turnos_mismo_dia
+        self.dos_puntos = dos_puntos
+
+    @classmethod
+    def desde_config(cls, cfg):
+        """
+        Acepta las claves turno_* / cantidad_minima_por_turno y, si no están,
+        las alerta_* / min_publicadores que guarda la pantalla de configuración.
+        """
+        cfg = cfg or {}
+
+        def modo(clave, alternativa):
+            return _nivel(cfg.get(clave, cfg.get(alternativa, "advertencia")))
+
+        try:
+            minimo = int(cfg.get("cantidad_minima_por_turno", cfg.get("min_publicadores", 2)))
+        except (TypeError, ValueError):
+            minimo = 2
+        return cls(
+            sin_capitan=modo("turno_sin_capitan", "alerta_sin_capitan"),
+            sin_publicadores=modo("turno_sin_publicadores", "alerta_sin_publicadores"),
+            un_publicador=modo("turno_un_publicador", "alerta_un_publicador"),
+            min_publicadores=minimo,
+            turnos_consecutivos=bool(cfg.get("turnos_consecutivos", False)),
+            dos_turnos_mismo_dia=bool(cfg.get("dos_turnos_mismo_dia", False)),
+            # "Publicador con dos turnos en simultáneo" de la pantalla de configuración
+            dos_puntos=_nivel(cfg.get("alerta_dos_turnos")),
+        )
+
+
+def reglas_actuales():
+    """Reglas según config.json (cacheadas mientras el archivo no cambie)."""
+    from configuracion import config_actual
+    return config_actual().reglas
+
+
+class ResultadoValidacion:
+    """Hallazgos de una validación: cada uno con nivel, regla, mensaje, turnos y publicador."""
+
+    def __init__(self):
+        self.hallazgos = []
+        self.turnos_validados = 0
+
+    def agregar(self, nivel, regla, mensaje, turno_ids=(), publicador_id=None, publicadores=(), fecha=None):
+        self.hallazgos.append({
+            "nivel": nivel,
+            "regla": regla,
+            "mensaje": mensaje,
+            "turno_ids": list(turno_ids),
+            "publicador_id": publicador_id,
+            # publicadores a marcar en la grilla (los del turno o el afectado)
+            "marcar": list(publicadores) if publicadores else ([publicador_id] if publicador_id else []),
+            "fecha": fecha.isoformat() if fecha else None,
+        })
+
+    def de_nivel(self, nivel):
+        return [h for h in self.hallazgos if h["nivel"] == nivel]
+
+    @property
+    def ok(self):
+        return not self.de_nivel(ERROR)
+
+    def marcados(self):
+        out = {ERROR: set(), ADVERTENCIA: set()}
+        for h in self.hallazgos:
+            out[h["nivel"]].update(h["marcar"])
+        return out
+
+    def como_tupla(self):
+        """(errores, advertencias, marcados) como devolvía validar_turnos."""
+        return (
+            [h["mensaje"] for h in self.de_nivel(ERROR)],
+            [h["mensaje"] for h in self.de_nivel(ADVERTENCIA)],
+            self.marcados(),
+        )
+
+    def como_dict(self):
+        marcados = self.marcados()
+        return {
+            "ok": self.ok,
+            "turnos_validados": self.turnos_validados,
+            "errores": len(self.de_nivel(ERROR)),
+            "advertencias": len(self.de_nivel(ADVERTENCIA)),
+            "hallazgos": self.hallazgos,
+            "marcados": {nivel: sorted(ids) for nivel, ids in marcados.items()},
+        }
+
+
+def _minutos(t):
+    return t.hour * 60 + t.minute + t.second / 60.0
+
+
+def validar(turnos, reglas=None):
+    """
+    Valida turnos ya cargados (objetos Turno o filas con las mismas columnas).
+    Los controles por publicador y día abarcan todos los turnos recibidos,
+    aunque sean de distintos puntos.
+    """
+    reglas = reglas or reglas_actuales()
+    res = ResultadoValidacion()
+
+    # publicador -> fecha -> [(inicio, fin, turno)]; se respeta el orden de
+    # aparición para que los mensajes salgan en el mismo orden que antes
+    por_publicador = {}
+
+    for t in turnos:
+        res.turnos_validados += 1
+        llenos = [p for p in (t.publicador1_id, t.publicador2_id, t.publicador3_id, t.publicador4_id) if p]
+
+        # === 1. Capitán ===
+        if not t.capitan_id and reglas.sin_capitan:
+            res.agregar(reglas.sin_capitan, "sin_capitan", f"Turno {t.id} sin capitán",
+                        [t.id], publicadores=llenos, fecha=t.fecha)
+
+        # === 2. Cantidad de publicadores ===
+        if len(llenos) == 0:
+            if reglas.sin_publicadores:
+                res.agregar(reglas.sin_publicadores, "sin_publicadores", f"Turno {t.id} sin publicadores",
+                            [t.id], fecha=t.fecha)
+        elif len(llenos) == 1 and reglas.un_publicador:
+            res.agregar(reglas.un_publicador, "un_publicador", f"Turno {t.id} con un solo publicador",
+                        [t.id], publicadores=llenos, fecha=t.fecha)
+
+        # === 3. Cantidad mínima ===
+        if len(llenos) < reglas.min_publicadores:
+            res.agregar(ERROR, "minimo_publicadores",
+                        f"Turno {t.id} no cumple la cantidad mínima ({len(llenos)}/{reglas.min_publicadores})",
+                        [t.id], publicadores=llenos, fecha=t.fecha)
+        elif len(llenos) == reglas.min_publicadores:
+            res.agregar(ADVERTENCIA, "justo_minimo",
+                        f"Turno {t.id} justo con la cantidad mínima de publicadores",
+                        [t.id], publicadores=llenos, fecha=t.fecha)
+
+        # el capitán también ocupa el horario (como en disponibilidad.py): cuenta
+        # para "dos puntos a la vez", pero si no está entre los publicadores del
+        # turno no entra en consecutivos ni en turnos por día: esas reglas no cambian
+        inicio, fin = _minutos(t.hora_inicio), _minutos(t.hora_fin)
+        for p in llenos:
+            por_publicador.setdefault(p, {}).setdefault(t.fecha, []).append((inicio, fin, t, False))
+        if t.capitan_id and t.capitan_id not in llenos:
+            por_publicador.setdefault(t.capitan_id, {}).setdefault(t.fecha, []).append((inicio, fin, t, True))
+
+    # === 4. Por publicador y día: solapamientos, dos puntos a la vez, cantidad ===
+    for pub, dias in por_publicador.items():
+        for fecha, lista in dias.items():
+            lista.sort(key=lambda x: x[0])
+            dia = f"{lista[0][2].dia} {fecha.strftime('%d/%m')}"
+
+            previo = None       # último turno como publicador (no solo capitán)
+            for i, (ini, fin, t, solo_capitan) in enumerate(lista):
+                # pocos turnos por día: se compara contra todos los anteriores.
+                # Primero entre turnos como publicador (igual que antes); los
+                # cruces con un turno de solo capitán se agregan aparte
+                cruces = [(o, o_cap or solo_capitan) for _, o_fin, o, o_cap in lista[:i]
+                          if ini < o_fin and o.punto_id != t.punto_id]
+                cruce_pub = next((o for o, con_capitan in cruces if not con_capitan), None)
+                cruce = cruce_pub or next((o for o, con_capitan in cruces if con_capitan), None)
+                if cruce is not None and reglas.dos_puntos:
+                    res.agregar(reglas.dos_puntos, "dos_puntos",
+                                f"Publicador {pub} está en dos puntos a la vez el {dia} "
+                                f"(turnos {cruce.id} y {t.id})",
+                                [cruce.id, t.id], publicador_id=pub, fecha=fecha)
+                informado = cruce_pub is not None and reglas.dos_puntos
+                if (not informado and not solo_capitan and previo is not None and ini <= previo[1]
+                        and not reglas.turnos_consecutivos):
+                    res.agregar(ERROR, "consecutivos",
+                                f"Publicador {pub} tiene turnos consecutivos o solapados el {dia}",
+                                [previo[2].id, t.id], publicador_id=pub, fecha=fecha)
+                if not solo_capitan:
+                    previo = (ini, fin, t)
+
+            ids = [x[2].id for x in lista if not x[3]]
+            cant = len(ids)
+            if not reglas.dos_turnos_mismo_dia and cant > 1:
+                res.agregar(ERROR, "turnos_por_dia", f"Publicador {pub} tiene más de un turno el {dia}",
+                            ids, publicador_id=pub, fecha=fecha)
+            elif reglas.dos_turnos_mismo_dia:
+                if cant > 2:
+                    res.agregar(ERROR, "turnos_por_dia", f"Publicador {pub} tiene más de 2 turnos el {dia}",
+                                ids, publicador_id=pub, fecha=fecha)
+                elif cant == 2:
+                    res.agregar(ADVERTENCIA, "turnos_por_dia",
+                                f"Publicador {pub} tiene 2 turnos el {dia} (advertencia)",
+                                ids, publicador_id=pub, fecha=fecha)
+
+    return res
+
+
+def validar_rango(desde, hasta=None, punto_ids=None, reglas=None, session=None):
+    """
+    Valida todos los turnos de [desde, hasta] (por defecto una semana).
+    punto_ids limita los hallazgos por turno a esos puntos, pero los cruces
+    entre puntos se siguen controlando contra todos.
+    """
+    session = session or db.session
+    hasta = hasta or desde + timedelta(days=6)
+    filas = (
+        session.query(*COLUMNAS)
+        .filter(Turno.fecha >= desde, Turno.fecha <= hasta)
+        .order_by(Turno.fecha, Turno.hora_inicio, Turno.id)
+        .all()
+    )
+    res = validar(filas, reglas)
+    if punto_ids:
+        propios = {f.id for f in filas if f.punto_id in set(punto_ids)}
+        res.hallazgos = [h for h in res.hallazgos if propios.intersection(h["turno_ids"])]
+        res.turnos_validados = len(propios)
+    return res
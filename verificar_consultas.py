@@ -0,0 +1,165 @@
+# verificar_consultas.py
+# Presupuesto de sentencias SQL por vista.
+#
+# Levanta la app contra una base SQLite temporal, carga datos de prueba,
+# entra como Admin y cuenta cuántas sentencias SQL emite cada endpoint.
+# Si alguna vista supera su presupuesto termina con código 1 (sirve para
+# detectar un N+1 antes de subir un cambio).
+#
+# Uso:
+#   python verificar_consultas.py            # 40 filas por tabla
+#   python verificar_consultas.py --filas 200 -v
+#
+# Los presupuestos no dependen de --filas: una vista que hace una consulta por
+# fila los supera en cuanto hay más datos que presupuesto.
+#
+# Equipo de desarrollo PPAM
+
+import os
+import sys
+import atexit
+import shutil
+import argparse
+import tempfile
+from datetime import date, time, timedelta
+
+# La base se fuerza SIEMPRE a un SQLite temporal: el script hace drop_all().
+# Grillas y archivos de versión también van al temporal: en instance/ dejarían
+# directorios huérfanos e invalidarían las cachés de la app que esté corriendo.
+_TMP_DIR = tempfile.mkdtemp(prefix="ppam_sql_")
+os.environ["PPAM_DATABASE_URI"] = "sqlite:///" + os.path.join(_TMP_DIR, "ppam.db")
+os.environ["PPAM_GRILLAS_DIR"] = os.path.join(_TMP_DIR, "grillas")
+os.environ["PPAM_GRILLAS_FONDO"] = "0"
+os.environ["PPAM_VERSION_DATOS"] = os.path.join(_TMP_DIR, "version_datos")
+os.environ["PPAM_VERSION_ESQUEMA"] = os.path.join(_TMP_DIR, "version_esquema")
+atexit.register(shutil.rmtree, _TMP_DIR, ignore_errors=True)
+
+# (url, máximo de sentencias). Incluye la carga del usuario logueado.
+PRESUPUESTOS = [
+    ("/publicadores", 3),
+    ("/solicitudes", 5),
+    ("/api/solicitudez", 2),
+    ("/experiencias", 5),
+    ("/ausencias", 4),
+    ("/turnos", 5),
+    ("/planificacion", 8),
+    ("/api/planificacion/", 9),
+]
+
+DIAS = ["lunes", "martes", "miercoles", "jueves", "viernes", "sabado", "domingo"]
+
+
+def sembrar(db, filas):
+    """Datos de prueba: 3 puntos, `filas` publicadores y `filas` filas por tabla."""
+    from werkzeug.security import generate_password_hash
+    from modelos import Publicador, PuntoPredicacion, Turno, SolicitudTurno, Experiencia, Ausencia
+
+    horario = {}
+    for d in DIAS:
+        horario[f"{d}_inicio"] = time(8, 0)
+        horario[f"{d}_fin"] = time(12, 0)
+    puntos = [
+        PuntoPredicacion(punto_nombre=f"Punto {i}", duracion_turno=60, **horario)
+        for i in range(3)
+    ]
+    pubs = [
+        Publicador(
+            nombre=f"Nombre{i}", apellido=f"Apellido{i}", usuario=f"user{i}",
+            rol="Admin" if i == 0 else "Publicador",
+            password_hash=generate_password_hash("x"),
+        )
+        for i in range(filas)
+    ]
+    db.session.add_all(puntos + pubs)
+    db.session.flush()
+
+    hoy = date.today()
+    lunes = hoy - timedelta(days=hoy.weekday())
+    for k in range(filas):
+        punto = puntos[k % 3]
+        pub = pubs[k]
+        fecha = lunes + timedelta(days=k % 7)
+        db.session.add(SolicitudTurno(
+            punto_id=punto.id, publicador_id=pub.id, dia=DIAS[k % 7],
+            hora_inicio=time(8, 0), hora_fin=time(12, 0), frecuencia="semanal",
+        ))
+        db.session.add(Experiencia(
+            publicador_id=pub.id, punto_id=punto.id, fecha=fecha, notas=f"Experiencia {k}",
+        ))
+        db.session.add(Ausencia(
+            publicador_id=pub.id, fecha_inicio=fecha, fecha_fin=fecha, motivo="prueba",
+        ))
+        # turnos de la semana actual con equipo completo
+        db.session.add(Turno(
+            punto_id=punto.id, dia=DIAS[k % 7], fecha=fecha,
+            hora_inicio=time(8 + (k // 21) % 4, 0), hora_fin=time(9 + (k // 21) % 4, 0),
+            capitan_id=pubs[k].id,
+            publicador1_id=pubs[(k + 1) % filas].id,
+            publicador2_id=pubs[(k + 2) % filas].id,
+            publicador3_id=pubs[(k + 3) % filas].id,
+            publicador4_id=pubs[(k + 4) % filas].id,
+        ))
+    db.session.commit()
+    return pubs[0].id
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Presupuesto de sentencias SQL por vista")
+    parser.add_argument("--filas", type=int, default=40, help="filas por tabla (default 40)")
+    parser.add_argument("-v", "--verbose", action="store_true", help="mostrar las sentencias")
+    args = parser.parse_args()
+
+    config_previo = os.path.exists(os.path.join(os.path.dirname(os.path.abspath(__file__)), "config.json"))
+
+    from sqlalchemy import event
+    from flask_app import app, CONFIG_FILE
+    from extensiones import db
+
+    app.config["TESTING"] = True
+    app.config["PROPAGATE_EXCEPTIONS"] = True
+    if not app.config.get("SECRET_KEY"):
+        app.config["SECRET_KEY"] = "verificar-consultas"
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        admin_id = sembrar(db, max(args.filas, 5))
+
+        sentencias = []
+
+        def contar(conn, cursor, statement, parameters, context, executemany):
+            sentencias.append(statement)
+
+        event.listen(db.engine, "before_cursor_execute", contar)
+
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess["_user_id"] = str(admin_id)
+        sess["_fresh"] = True
+
+    # /turnos crea los slots faltantes la primera vez: se mide la segunda
+    client.get("/turnos")
+
+    fallas = 0
+    for url, maximo in PRESUPUESTOS:
+        sentencias.clear()
+        resp = client.get(url)
+        n = len(sentencias)
+        ok = resp.status_code == 200 and n <= maximo
+        estado = "OK " if ok else "FALLA"
+        print(f"{estado} {url:<28} {n:>4} sentencias (máx {maximo})  HTTP {resp.status_code}")
+        if args.verbose or not ok:
+            for s in sentencias:
+                print("       " + " ".join(s.split())[:160])
+        if not ok:
+            fallas += 1
+
+    if not config_previo and os.path.exists(CONFIG_FILE):
+        os.remove(CONFIG_FILE)
+
+    print(f"\n{len(PRESUPUESTOS) - fallas}/{len(PRESUPUESTOS)} vistas dentro del presupuesto")
+    return 1 if fallas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())